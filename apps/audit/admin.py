@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import ChangeLogEntry
+
+
+@admin.register(ChangeLogEntry)
+class ChangeLogEntryAdmin(admin.ModelAdmin):
+    list_display = ['timestamp', 'model', 'object_id', 'action', 'actor_id']
+    list_filter = ['model', 'action']
+    search_fields = ['=object_id']
+    ordering = ['-timestamp']
+    # Counting millions of rows on every changelist page is too slow
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
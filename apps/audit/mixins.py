@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from rest_framework.decorators import action
+from spa_central.pagination import HistoryCursorPagination
+from .models import ChangeLogEntry
+from .recorder import model_label
+from .serializers import ChangeLogEntrySerializer
+
+
+class HistoryMixin:
+    """Adds ``GET <detail>/history/`` listing the object's change log, newest first"""
+
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Field-level change history, cursor-paginated (?cursor=, ?page_size=)"""
+        instance = self.get_object()
+        entries = ChangeLogEntry.objects.filter(model=model_label(type(instance)), object_id=instance.pk)
+
+        paginator = HistoryCursorPagination()
+        # No view: the viewset's OrderingFilter fields do not apply to log entries
+        page = paginator.paginate_queryset(entries, request)
+        actor_ids = {entry.actor_id for entry in page if entry.actor_id is not None}
+        actor_names = {
+            user.pk: user.get_full_name() or user.get_username()
+            for user in get_user_model().objects.filter(pk__in=actor_ids)
+        }
+        serializer = ChangeLogEntrySerializer(page, many=True, context={'actor_names': actor_names})
+        return paginator.get_paginated_response(serializer.data)
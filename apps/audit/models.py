@@ -0,0 +1,58 @@
+from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+
+class AuditedModel:
+    """
+    Mixin for the models in recorder.AUDITED_MODELS
+
+    Keeps a reference to the row as loaded; the snapshot a save is diffed
+    against is only built from it when the instance is saved or deleted,
+    so reads pay nothing for auditing.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._audit_loaded = (field_names, values)
+        return instance
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only field-level change log
+
+    ``changes`` stores only the fields that changed as
+    ``{"field": [old, new]}``; creates store the initial non-empty values
+    and deletes the last known ones. Rows are never updated.
+    """
+    ACTION_CREATE = 'create'
+    ACTION_UPDATE = 'update'
+    ACTION_DELETE = 'delete'
+
+    ACTION_CHOICES = [
+        (ACTION_CREATE, 'Create'),
+        (ACTION_UPDATE, 'Update'),
+        (ACTION_DELETE, 'Delete'),
+    ]
+
+    model = models.CharField(max_length=50, help_text="App label and model name, e.g. machine.machine")
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    # Plain id rather than a FK: the log must outlive users and never lock the user table
+    actor_id = models.PositiveBigIntegerField(null=True, blank=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'audit_change_log'
+        ordering = ['-timestamp', '-id']
+        indexes = [
+            models.Index(fields=['model', 'object_id', '-timestamp'], name='idx_audit_object_time'),
+            models.Index(fields=['actor_id', '-timestamp'], name='idx_audit_actor_time'),
+        ]
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id} {self.action} @ {self.timestamp:%Y-%m-%d %H:%M:%S}"
+
@@ -0,0 +1,211 @@
+"""
+Field-level change capture for audited models
+
+Each audited instance is diffed against a snapshot of its concrete field
+values: built on first use from the row it was loaded from (see
+models.AuditedModel) and refreshed after every save, so a save diffs in
+memory without an extra SELECT and plain reads do no audit work. Entries are buffered per
+savepoint and written with one bulk INSERT per savepoint when the
+surrounding transaction commits (immediately in autocommit mode); an
+atomic block that rolls back discards its entries with its on_commit
+callbacks.
+"""
+
+from contextvars import ContextVar
+from weakref import WeakValueDictionary
+from django.db import connections, router, transaction
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+from .models import ChangeLogEntry
+
+# Models whose changes are logged (app_label.ModelName); each also inherits
+# models.AuditedModel
+AUDITED_MODELS = [
+    'machine.Machine',
+    'machine.AccountHolder',
+    'simcard.SimCard',
+    'spas.Spa',
+]
+
+# Bookkeeping columns that change on every save and carry no information
+IGNORED_FIELDS = {'created_at', 'updated_at', 'updated_by'}
+
+_current_request = ContextVar('audit_current_request', default=None)
+
+
+def set_current_request(request):
+    return _current_request.set(request)
+
+
+def reset_current_request(token):
+    _current_request.reset(token)
+
+
+def current_actor_id():
+    """Id of the authenticated user of the current request, if any"""
+    request = _current_request.get()
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def _tracked_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key and field.name not in IGNORED_FIELDS
+        # Derived search columns (spa_central.models.NormalizedFieldsModel)
+        and field.name not in getattr(model, 'normalized_fields', {})
+    ]
+
+
+def _plain(value):
+    if isinstance(value, FieldFile):
+        return value.name or None
+    return value
+
+
+def take_snapshot(instance):
+    """Remember current field values (deferred fields are skipped)"""
+    values = instance.__dict__
+    instance._audit_snapshot = {
+        field.attname: _plain(values[field.attname])
+        for field in _tracked_fields(type(instance))
+        if field.attname in values
+    }
+
+
+def snapshot(instance):
+    """Field values as loaded or last saved, ``{attname: value}``"""
+    values = instance.__dict__
+    if '_audit_snapshot' not in values:
+        if '_audit_loaded' not in values:
+            return {}
+        tracked = {field.attname for field in _tracked_fields(type(instance))}
+        field_names, row = values['_audit_loaded']
+        instance._audit_snapshot = {
+            attname: _plain(value) for attname, value in zip(field_names, row) if attname in tracked
+        }
+    return instance._audit_snapshot
+
+
+def diff(instance):
+    """Changed fields since the last snapshot as ``{attname: [old, new]}``"""
+    snapshot_values = snapshot(instance)
+    values = instance.__dict__
+    changes = {}
+    for field in _tracked_fields(type(instance)):
+        attname = field.attname
+        if attname not in values or attname not in snapshot_values:
+            continue
+        new = _plain(values[attname])
+        if snapshot_values[attname] != new:
+            changes[attname] = [snapshot_values[attname], new]
+    return changes
+
+
+def initial_values(instance):
+    """Non-empty field values of a new instance as ``{attname: [None, value]}``"""
+    changes = {}
+    for field in _tracked_fields(type(instance)):
+        value = _plain(field.value_from_object(instance))
+        if value not in (None, ''):
+            changes[field.attname] = [None, value]
+    return changes
+
+
+class _Batch:
+    """Entries logged in one savepoint, waiting for the transaction to commit"""
+
+    def __init__(self, using):
+        self.using = using
+        self.entries = []
+
+    def flush(self):
+        # Emptied so a batch still reachable afterwards queues a new flush
+        entries, self.entries = self.entries, []
+        if entries:
+            ChangeLogEntry.objects.using(self.using).bulk_create(entries, batch_size=1000)
+
+
+def _pending_batch(using):
+    """
+    Batch of the innermost savepoint (or outermost atomic block) on ``using``
+
+    Batches are held weakly: the strong reference is the flush callback
+    queued with transaction.on_commit, so a batch disappears as soon as
+    Django runs or discards that callback (commit, rollback, or rollback
+    of its savepoint) and is never reused by a later block.
+    """
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        return _Batch(using)
+    batches = connection.__dict__.setdefault('_audit_batches', WeakValueDictionary())
+    key = tuple(connection.savepoint_ids)
+    batch = batches.get(key)
+    if batch is None:
+        batch = batches[key] = _Batch(using)
+    return batch
+
+
+def log(model, object_id, action, changes, actor_id=None, using=None):
+    """Queue one change log entry for the current transaction"""
+    using = using or router.db_for_write(ChangeLogEntry)
+    entry = ChangeLogEntry(
+        model=model_label(model),
+        object_id=object_id,
+        action=action,
+        changes=changes,
+        actor_id=actor_id if actor_id is not None else current_actor_id(),
+        timestamp=timezone.now(),
+    )
+    batch = _pending_batch(using)
+    first = not batch.entries
+    batch.entries.append(entry)
+    if first:
+        transaction.on_commit(batch.flush, using=using)
+
+
+def log_instance(instance, action):
+    """Diff ``instance`` against its snapshot and queue an entry if anything changed"""
+    if action == ChangeLogEntry.ACTION_CREATE:
+        changes = initial_values(instance)
+    elif action == ChangeLogEntry.ACTION_DELETE:
+        changes = {attname: [value, None] for attname, value in snapshot(instance).items() if value not in (None, '')}
+    else:
+        changes = diff(instance)
+        if not changes:
+            return
+    log(type(instance), instance.pk, action, changes)
+    take_snapshot(instance)
+
+
+def log_many(instances, action):
+    """Queue entries for instances changed by bulk_create/bulk_update"""
+    for instance in instances:
+        log_instance(instance, action)
+
+
+def log_queryset_update(model, before, values):
+    """
+    Queue entries for a queryset ``update()``
+
+    Args:
+        before: Rows read before the update, as dicts with ``id`` and the
+            keys of ``values``
+        values: Field values passed to ``update()``, keyed by attname
+    """
+    tracked = {field.attname for field in _tracked_fields(model)}
+    new = {attname: _plain(value) for attname, value in values.items() if attname in tracked}
+    for row in before:
+        changes = {
+            attname: [row[attname], value]
+            for attname, value in new.items()
+            if row[attname] != value
+        }
+        if changes:
+            log(model, row['id'], ChangeLogEntry.ACTION_UPDATE, changes)
@@ -0,0 +1,14 @@
+from rest_framework import serializers
+from .models import ChangeLogEntry
+
+
+class ChangeLogEntrySerializer(serializers.ModelSerializer):
+    """Serializer for change log entries; actor names come from the view's lookup"""
+    actor_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChangeLogEntry
+        fields = ['id', 'action', 'changes', 'actor_id', 'actor_name', 'timestamp']
+
+    def get_actor_name(self, obj):
+        return self.context.get('actor_names', {}).get(obj.actor_id)
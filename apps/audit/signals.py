@@ -0,0 +1,20 @@
+from django.apps import apps
+from django.db.models.signals import post_save, post_delete
+from .models import ChangeLogEntry
+from .recorder import AUDITED_MODELS, log_instance
+
+
+def audit_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    log_instance(instance, ChangeLogEntry.ACTION_CREATE if created else ChangeLogEntry.ACTION_UPDATE)
+
+
+def audit_deleted(sender, instance, **kwargs):
+    log_instance(instance, ChangeLogEntry.ACTION_DELETE)
+
+
+for label in AUDITED_MODELS:
+    model = apps.get_model(label)
+    post_save.connect(audit_saved, sender=model, dispatch_uid=f'audit_save_{label}')
+    post_delete.connect(audit_deleted, sender=model, dispatch_uid=f'audit_delete_{label}')
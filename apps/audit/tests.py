@@ -0,0 +1,66 @@
+from unittest import mock
+from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.machine.models import Machine
+from apps.users.models import User
+from . import recorder
+from .models import ChangeLogEntry
+
+
+class ChangeCaptureTests(TestCase):
+    """Audit snapshots are built from the loaded row only when something is written"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='admin@example.com', password='x', first_name='Ada', last_name='Admin', user_type='admin',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.machines = [
+                Machine.objects.create(serial_number=f'SN{index}', status='in_use') for index in range(5)
+            ]
+
+    def entries(self, machine):
+        return list(
+            ChangeLogEntry.objects.filter(object_id=machine.id).order_by('id').values_list('action', 'changes')
+        )
+
+    def test_reads_do_no_audit_work(self):
+        with mock.patch.object(recorder, '_tracked_fields', wraps=recorder._tracked_fields) as tracked:
+            response = self.client.get('/api/machines/')
+            list(Machine.objects.all())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(tracked.call_count, 0)
+        self.assertFalse(any('_audit_snapshot' in machine.__dict__ for machine in Machine.objects.all()))
+
+    def test_update_diffs_against_loaded_row(self):
+        machine = Machine.objects.get(id=self.machines[0].id)
+        machine.status = 'broken'
+        machine.remark = 'Screen cracked'
+        with self.captureOnCommitCallbacks(execute=True):
+            machine.save()
+            # A second save diffs against the first one, not the loaded row
+            machine.status = 'in_use'
+            machine.save()
+        self.assertEqual(self.entries(machine)[1:], [
+            ('update', {'status': ['in_use', 'broken'], 'remark': [None, 'Screen cracked']}),
+            ('update', {'status': ['broken', 'in_use']}),
+        ])
+
+    def test_deferred_fields_and_delete(self):
+        machine = Machine.objects.only('id', 'status').get(id=self.machines[1].id)
+        machine.status = 'broken'
+        with self.captureOnCommitCallbacks(execute=True):
+            machine.save(update_fields=['status'])
+            Machine.objects.get(id=machine.id).delete()
+        update, delete = self.entries(machine)[1:]
+        self.assertEqual(update, ('update', {'status': ['in_use', 'broken']}))
+        self.assertEqual(delete[0], 'delete')
+        self.assertEqual(delete[1]['serial_number'], ['SN1', None])
+
+    def test_unchanged_save_logs_nothing(self):
+        machine = Machine.objects.get(id=self.machines[2].id)
+        with self.captureOnCommitCallbacks(execute=True):
+            machine.save()
+        self.assertEqual([action for action, _ in self.entries(machine)], ['create'])
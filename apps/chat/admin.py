@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import ChatMessage
+from .unread import mark_messages_read
 
 
 @admin.register(ChatMessage)
@@ -19,7 +20,7 @@ class ChatMessageAdmin(admin.ModelAdmin):
     actions = ['mark_as_read']
 
     def mark_as_read(self, request, queryset):
-        updated = queryset.update(is_read=True)
+        updated = mark_messages_read(queryset)
         self.message_user(request, f"Marked {updated} messages as read.")
     mark_as_read.short_description = 'Mark selected as read'
 
@@ -0,0 +1,9 @@
+from django.urls import path
+from .async_views import ChatUnreadCountView, ConversationsView, NotificationUnreadCountView
+
+# Same paths and names as the router's routes in urls.py
+urlpatterns = [
+    path('chat/conversations/', ConversationsView.as_view(), name='chat-conversations'),
+    path('chat/unread_count/', ChatUnreadCountView.as_view(), name='chat-unread-count'),
+    path('notifications/unread_count/', NotificationUnreadCountView.as_view(), name='notifications-unread-count'),
+]
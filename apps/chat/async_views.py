@@ -0,0 +1,36 @@
+"""ASGI-native chat reads polled by the dashboard (see spa_central/async_views.py)"""
+from rest_framework.permissions import IsAuthenticated
+from spa_central.async_views import AsyncReadView, ViewSetReadView, gather_queries
+from .unread import aget_unread_counts
+from .views import ChatViewSet
+
+
+class ChatUnreadCountView(AsyncReadView):
+    """ChatViewSet.unread_count"""
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request, *args, **kwargs):
+        counts = await aget_unread_counts(request.user.id)
+        return self.respond(request, {'unread_count': counts['messages']})
+
+
+class NotificationUnreadCountView(AsyncReadView):
+    """ChatNotificationViewSet.unread_count"""
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request, *args, **kwargs):
+        counts = await aget_unread_counts(request.user.id)
+        return self.respond(request, {'unread_count': counts['notifications']})
+
+
+class ConversationsView(ViewSetReadView):
+    """ChatViewSet.conversations with the partner and unread queries run concurrently"""
+    viewset_class = ChatViewSet
+    action = 'conversations'
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.get_viewset(request, kwargs)
+        queries = viewset.conversation_queries()
+        results = dict(zip(queries, await gather_queries(*queries.values())))
+        messages = {message.pk: message async for message in viewset.last_messages(results['partners'])}
+        return self.respond(request, viewset._build_conversations(results, messages))
@@ -2,13 +2,15 @@ import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
-from django.utils import timezone
-from .models import ChatMessage, ChatNotification
+from apps.monitoring.consumers import ConnectionMetricsMixin, ProfiledConsumerMixin
+from .models import ChatMessage, ChatNotification, ChatRoom, ChatRoomMember
+from .rooms import is_member, mark_room_read, post_room_message, room_activity_group, room_group
+from .unread import aget_unread_counts, mark_conversation_read, user_group
 
 User = get_user_model()
 
 
-class DirectChatConsumer(AsyncWebsocketConsumer):
+class DirectChatConsumer(ConnectionMetricsMixin, ProfiledConsumerMixin, AsyncWebsocketConsumer):
     async def connect(self):
         # Get user from token
         user = self.scope.get('user')
@@ -185,11 +187,12 @@ class DirectChatConsumer(AsyncWebsocketConsumer):
     
     @database_sync_to_async
     def _mark_messages_read(self, message_ids):
-        """Mark messages as read"""
-        ChatMessage.objects.filter(
-            id__in=message_ids,
-            receiver=self.user
-        ).update(is_read=True, read_at=timezone.now())
+        """Move the read cursor past the newest of ``message_ids``"""
+        try:
+            newest = max(int(message_id) for message_id in message_ids)
+        except (TypeError, ValueError):
+            return
+        mark_conversation_read(self.user.id, self.other_user_id, newest)
     
     @database_sync_to_async
     def get_user(self, user_id):
@@ -198,3 +201,218 @@ class DirectChatConsumer(AsyncWebsocketConsumer):
             return User.objects.get(id=user_id)
         except User.DoesNotExist:
             return None
+
+
+class NotificationConsumer(ConnectionMetricsMixin, ProfiledConsumerMixin, AsyncWebsocketConsumer):
+    """
+    Per-user push channel replacing polling of the unread_count endpoints
+
+    Joins the user's ``user_<id>`` group and sends the current counters on
+    connect and whenever the client sends ``{"type": "sync"}``; after that,
+    counter changes arrive as ``unread_delta`` and new notifications as
+    ``notification`` (see unread.py).
+
+    It also joins the activity group of each of the user's rooms, so posts
+    arrive as ``room_message`` notices and membership changes as
+    ``room_joined`` / ``room_left`` (see rooms.py).
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if not user or user.is_anonymous:
+            await self.close()
+            return
+
+        self.user = user
+        self.group_name = user_group(user.id)
+        self.room_ids = set()
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        for room_id in await self._room_ids():
+            await self._join_room(room_id)
+        await self.accept()
+        await self._send_counts()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            for room_id in list(self.room_ids):
+                await self._leave_room(room_id)
+
+    async def _join_room(self, room_id):
+        self.room_ids.add(room_id)
+        await self.channel_layer.group_add(room_activity_group(room_id), self.channel_name)
+
+    async def _leave_room(self, room_id):
+        self.room_ids.discard(room_id)
+        await self.channel_layer.group_discard(room_activity_group(room_id), self.channel_name)
+
+    @database_sync_to_async
+    def _room_ids(self):
+        return list(ChatRoomMember.objects.filter(user=self.user, room__is_active=True).values_list('room_id', flat=True))
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = json.loads(text_data or '{}')
+        except ValueError:
+            return
+        if data.get('type') == 'sync':
+            await self._send_counts()
+
+    async def _send_counts(self):
+        counts = await aget_unread_counts(self.user.id)
+        await self.send(text_data=json.dumps({'type': 'unread_counts', **counts}))
+
+    async def unread_counts(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'unread_counts',
+            'messages': event['messages'],
+            'notifications': event['notifications'],
+        }))
+
+    async def unread_delta(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'unread_delta',
+            'messages': event['messages'],
+            'notifications': event['notifications'],
+        }))
+
+    async def notification_created(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'notification',
+            'id': event['id'],
+            'notification_type': event['notification_type'],
+            'message': event['message'],
+            'sender_id': event['sender_id'],
+            'related_message_id': event['related_message_id'],
+            'created_at': event['created_at'],
+        }))
+
+    async def room_activity(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'room_message',
+            'room_id': event['room_id'],
+            'message_id': event['message_id'],
+            'sender_id': event['sender_id'],
+            'timestamp': event['timestamp'],
+        }))
+
+    async def room_joined(self, event):
+        await self._join_room(event['room_id'])
+        await self.send(text_data=json.dumps({'type': 'room_joined', 'room_id': event['room_id']}))
+
+    async def room_left(self, event):
+        await self._leave_room(event['room_id'])
+        await self.send(text_data=json.dumps({'type': 'room_left', 'room_id': event['room_id']}))
+
+
+class RoomConsumer(ConnectionMetricsMixin, ProfiledConsumerMixin, AsyncWebsocketConsumer):
+    """
+    Live group chat in one room (``ws/rooms/<room_id>/``), members only
+
+    Clients send ``message``, ``typing`` and ``read`` frames. A message is
+    stored once and broadcast to the room's group; ``read`` moves the
+    member's cursor and tells the room (see rooms.py).
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if not user or user.is_anonymous:
+            await self.close()
+            return
+
+        self.user = user
+        self.room_id = int(self.scope['url_route']['kwargs']['room_id'])
+        if not await database_sync_to_async(is_member)(self.room_id, user.id):
+            await self.close()
+            return
+
+        self.group_name = room_group(self.room_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            data = json.loads(text_data or '{}')
+        except ValueError:
+            return
+        message_type = data.get('type', 'message')
+
+        if message_type == 'message':
+            await self._handle_message(data)
+        elif message_type == 'typing':
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'room.typing',
+                'user_id': self.user.id,
+                'is_typing': bool(data.get('is_typing', False)),
+            })
+        elif message_type == 'read':
+            await self._handle_read(data)
+
+    async def _handle_message(self, data):
+        content = data.get('message')
+        if not content:
+            return
+        # Broadcast by post_room_message once stored
+        if not await self._post(content):
+            await self.close()
+
+    async def _handle_read(self, data):
+        try:
+            message_id = int(data['message_id']) if data.get('message_id') is not None else None
+        except (TypeError, ValueError):
+            return
+        message_id = await database_sync_to_async(mark_room_read)(self.room_id, self.user.id, message_id)
+        if message_id is not None:
+            await self.channel_layer.group_send(self.group_name, {
+                'type': 'room.read',
+                'user_id': self.user.id,
+                'message_id': message_id,
+            })
+
+    @database_sync_to_async
+    def _post(self, content):
+        """Store and broadcast a text message; False once the user left the room"""
+        room = ChatRoom.objects.filter(id=self.room_id, is_active=True, members=self.user).first()
+        if room is None:
+            return False
+        post_room_message(room, self.user, message=content)
+        return True
+
+    async def room_message(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'message',
+            'id': event['id'],
+            'room_id': event['room_id'],
+            'sender_id': event['sender_id'],
+            'message': event['message'],
+            'message_type': event['message_type'],
+            'file_url': event['file_url'],
+            'file_name': event['file_name'],
+            'file_size': event['file_size'],
+            'file_type': event['file_type'],
+            'timestamp': event['timestamp'],
+        }))
+
+    async def room_typing(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'typing',
+            'user_id': event['user_id'],
+            'is_typing': event['is_typing'],
+        }))
+
+    async def room_read(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'read',
+            'user_id': event['user_id'],
+            'message_id': event['message_id'],
+        }))
+
+    async def room_member_removed(self, event):
+        if event['user_id'] == self.user.id:
+            await self.close()
+            return
+        await self.send(text_data=json.dumps({'type': 'member_removed', 'user_id': event['user_id']}))
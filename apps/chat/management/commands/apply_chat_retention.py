@@ -0,0 +1,61 @@
+"""
+Management command to prune read notifications and archive old messages
+Run this as a cron job (e.g. nightly); add --compact on a quiet night to
+hand the freed space back to the database
+"""
+from django.core.management.base import BaseCommand
+from apps.chat.retention import apply_retention
+
+
+def _size(value):
+    if value is None:
+        return 'unknown'
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(value) < 1024:
+            return f'{value:.1f} {unit}'
+        value /= 1024
+    return f'{value:.1f} TB'
+
+
+class Command(BaseCommand):
+    help = 'Delete old read chat notifications and move old chat messages to the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--notification-days',
+            type=int,
+            help='Delete read notifications older than this many days (default: CHAT_RETENTION setting)',
+        )
+        parser.add_argument(
+            '--archive-after-days',
+            type=int,
+            help='Archive messages older than this many days (default: CHAT_RETENTION setting)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Rows deleted or moved per transaction (default: CHAT_RETENTION setting)',
+        )
+        parser.add_argument(
+            '--compact',
+            action='store_true',
+            help='Run OPTIMIZE TABLE / VACUUM afterwards so the space is reclaimed',
+        )
+
+    def handle(self, *args, **options):
+        report = apply_retention(
+            notification_days=options['notification_days'],
+            archive_after_days=options['archive_after_days'],
+            batch_size=options['batch_size'],
+            compact=options['compact'],
+        )
+
+        for table, (before, after) in report['tables'].items():
+            reclaimed = before - after if before is not None and after is not None else None
+            self.stdout.write(f'{table}: {_size(before)} -> {_size(after)} (reclaimed {_size(reclaimed)})')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully deleted {report['notifications_deleted']} notifications "
+                f"and archived {report['messages_archived']} messages"
+            )
+        )
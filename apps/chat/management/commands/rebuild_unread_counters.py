@@ -0,0 +1,20 @@
+"""
+Management command to reseed the unread counters
+Run after chat messages or notifications were changed outside the ORM
+(raw SQL, fixtures, imports with signals disabled)
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.chat.unread import rebuild_unread_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount unread messages and notifications for every user with a counter'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_unread_counters()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {total} unread counters')
+        )
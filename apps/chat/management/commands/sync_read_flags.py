@@ -0,0 +1,18 @@
+"""
+Management command to write is_read/read_at behind the conversation read cursors
+Run this as a frequent cron job (e.g. every few minutes); the unread counts
+are right without it, but older clients and reports read the flags
+"""
+from django.core.management.base import BaseCommand
+from apps.chat.unread import sync_read_flags
+
+
+class Command(BaseCommand):
+    help = 'Flag direct messages read up to each conversation read cursor'
+
+    def handle(self, *args, **options):
+        total = sync_read_flags()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully flagged {total} messages as read')
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 21:40
+
+from django.db import migrations
+from django.db.models import F
+
+
+def mark_archived_read(apps, schema_editor):
+    """Archived rows left unread are outside the counters and cursors, so read them"""
+    ArchivedChatMessage = apps.get_model('chat', 'ArchivedChatMessage')
+    ArchivedChatMessage.objects.filter(is_read=False).update(is_read=True, read_at=F('archived_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_conversationreadcursor'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_archived_read, migrations.RunPython.noop),
+    ]
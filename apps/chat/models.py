@@ -1,9 +1,31 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 import os
 
 
-class ChatMessage(models.Model):
+class MessageFileMixin:
+    """File type helpers shared by live and archived messages"""
+
+    def get_file_extension(self):
+        if self.file and self.file.name:
+            return os.path.splitext(self.file.name)[1].lower()
+        return None
+    
+    def is_image(self):
+        image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
+        return self.get_file_extension() in image_extensions
+    
+    def is_audio(self):
+        audio_extensions = ['.mp3', '.wav', '.ogg', '.m4a', '.aac']
+        return self.get_file_extension() in audio_extensions
+    
+    def is_video(self):
+        video_extensions = ['.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm']
+        return self.get_file_extension() in video_extensions
+
+
+class ChatMessage(MessageFileMixin, models.Model):
     MESSAGE_TYPES = (
         ('text', 'Text Message'),
         ('file', 'File Attachment'),
@@ -53,23 +75,53 @@ class ChatMessage(models.Model):
 
     def __str__(self):
         return f"{self.sender_id}->{self.receiver_id} @ {self.timestamp}"
-    
-    def get_file_extension(self):
-        if self.file and self.file.name:
-            return os.path.splitext(self.file.name)[1].lower()
-        return None
-    
-    def is_image(self):
-        image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']
-        return self.get_file_extension() in image_extensions
-    
-    def is_audio(self):
-        audio_extensions = ['.mp3', '.wav', '.ogg', '.m4a', '.aac']
-        return self.get_file_extension() in audio_extensions
-    
-    def is_video(self):
-        video_extensions = ['.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm']
-        return self.get_file_extension() in video_extensions
+
+
+class ArchivedChatMessage(MessageFileMixin, models.Model):
+    """
+    Messages moved out of chat_messages by the retention job (see retention.py)
+
+    Rows keep their original id and timestamps. ``reply_to`` is not
+    constrained: the message replied to may still be in chat_messages.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    sender = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='archived_sent_messages', on_delete=models.CASCADE)
+    receiver = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='archived_recv_messages', on_delete=models.CASCADE)
+    message = models.TextField(blank=True, null=True)
+    message_type = models.CharField(max_length=10, choices=ChatMessage.MESSAGE_TYPES, default='text')
+
+    file = models.FileField(upload_to='chat_files/%Y/%m/%d/', blank=True, null=True)
+    file_name = models.CharField(max_length=255, blank=True, null=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    file_type = models.CharField(max_length=100, blank=True, null=True)
+
+    is_read = models.BooleanField(default=False)
+    read_at = models.DateTimeField(null=True, blank=True)
+    is_delivered = models.BooleanField(default=False)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    timestamp = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    is_edited = models.BooleanField(default=False)
+    is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    reply_to = models.ForeignKey(
+        'self', on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+'
+    )
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'chat_messages_archive'
+        indexes = [
+            models.Index(fields=['sender', 'receiver', 'timestamp']),
+        ]
+        ordering = ['timestamp']
+
+    def __str__(self):
+        return f"{self.sender_id}->{self.receiver_id} @ {self.timestamp} (archived)"
+
 
 
 class ChatNotification(models.Model):
@@ -104,12 +156,43 @@ class ChatNotification(models.Model):
         return f"{self.notification_type} for {self.user.email}"
 
 
+class ConversationReadCursor(models.Model):
+    """How far a user has read the direct messages received from another user (see unread.py)"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='read_cursors', on_delete=models.CASCADE)
+    other_user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+', on_delete=models.CASCADE)
+    # Highest ChatMessage id from other_user that user has read; only moves forward
+    last_read_message_id = models.BigIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    # ChatMessage.is_read/read_at are written up to this id by sync_read_flags
+    flags_synced_message_id = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'chat_read_cursors'
+        unique_together = [('user', 'other_user')]
+
+    def __str__(self):
+        return f"{self.user_id} read {self.other_user_id} up to {self.last_read_message_id}"
+
+
+class UnreadCounter(models.Model):
+    """Maintained unread message/notification counts per user (see unread.py)"""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True, related_name='unread_counter', on_delete=models.CASCADE)
+    messages = models.PositiveIntegerField(default=0)
+    notifications = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'chat_unread_counters'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.messages} messages, {self.notifications} notifications"
+
+
 class ChatRoom(models.Model):
-    """Group chat rooms (future implementation)"""
+    """Group chat rooms (see rooms.py)"""
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='created_rooms', on_delete=models.CASCADE)
-    members = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='chat_rooms')
+    members = models.ManyToManyField(settings.AUTH_USER_MODEL, through='ChatRoomMember', related_name='chat_rooms')
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -120,3 +203,47 @@ class ChatRoom(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class ChatRoomMember(models.Model):
+    """Room membership with the member's read cursor"""
+    room = models.ForeignKey(ChatRoom, related_name='memberships', on_delete=models.CASCADE, db_column='chatroom_id')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='room_memberships', on_delete=models.CASCADE)
+    # Highest RoomMessage id read; messages above it are unread. Only moves forward
+    last_read_message_id = models.BigIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    joined_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # The table Django created for the original auto M2M
+        db_table = 'chat_rooms_members'
+        unique_together = [('room', 'user')]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.room_id}"
+
+
+class RoomMessage(MessageFileMixin, models.Model):
+    """A message posted to a ChatRoom; read state lives in ChatRoomMember cursors"""
+    room = models.ForeignKey(ChatRoom, related_name='messages', on_delete=models.CASCADE, db_index=False)
+    sender = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='room_messages', on_delete=models.CASCADE)
+    message = models.TextField(blank=True, null=True)
+    message_type = models.CharField(max_length=10, choices=ChatMessage.MESSAGE_TYPES, default='text')
+
+    file = models.FileField(upload_to='chat_files/%Y/%m/%d/', blank=True, null=True)
+    file_name = models.CharField(max_length=255, blank=True, null=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    file_type = models.CharField(max_length=100, blank=True, null=True)
+
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'chat_room_messages'
+        indexes = [
+            # History pages and unread counts are id ranges within a room
+            models.Index(fields=['room', 'id']),
+        ]
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.sender_id} in {self.room_id} @ {self.timestamp}"
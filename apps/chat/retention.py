@@ -0,0 +1,182 @@
+"""
+Retention for the chat tables
+
+- Read notifications older than CHAT_RETENTION['NOTIFICATION_DAYS'] are
+  deleted.
+- Messages older than CHAT_RETENTION['ARCHIVE_AFTER_DAYS'] are moved to
+  ArchivedChatMessage (chat_messages_archive) with their ids. The history
+  endpoint and file downloads read both tables.
+
+Rows go in batches of CHAT_RETENTION['BATCH_SIZE'], one short transaction
+each, so the hot tables are never locked for long. A message is only
+archived once no message left in chat_messages replies to it. That keeps
+every ``reply_to`` pointing into chat_messages, and batches walk ids
+downwards so replies leave before the messages they answer.
+Notifications about an archived message are deleted with it. Read flags
+are synced from the read cursors first, so archived rows keep them;
+messages still unread are archived as read, since the delete already
+takes them out of the unread counters and no cursor reaches the archive.
+
+Run it with the ``apply_chat_retention`` command or the celery task in
+tasks.py.
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, router, transaction
+from django.utils import timezone
+from .models import ArchivedChatMessage, ChatMessage, ChatNotification
+from .unread import sync_read_flags
+
+logger = logging.getLogger(__name__)
+
+# Columns copied from chat_messages (archived_at is set on insert)
+ARCHIVED_COLUMNS = [
+    field.attname for field in ArchivedChatMessage._meta.concrete_fields if field.name != 'archived_at'
+]
+
+# Per vendor: total size in bytes (data + indexes) of the table named by the parameter
+TABLE_SIZE_SQL = {
+    'mysql': (
+        'SELECT data_length + index_length FROM information_schema.tables '
+        'WHERE table_schema = DATABASE() AND table_name = %s'
+    ),
+    'postgresql': 'SELECT pg_total_relation_size(%s)',
+    'sqlite': 'SELECT SUM(pgsize) FROM dbstat WHERE name IN (SELECT name FROM sqlite_master WHERE tbl_name = %s)',
+}
+
+# Per vendor: statement returning freed pages to the file system or the free list
+COMPACT_SQL = {
+    'mysql': 'OPTIMIZE TABLE {table}',
+    'postgresql': 'VACUUM ANALYZE {table}',
+    'sqlite': 'VACUUM',
+}
+
+
+def get_setting(name):
+    return settings.CHAT_RETENTION[name]
+
+
+def _cutoff(days):
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_cutoff():
+    """Messages sent before this may have been moved to the archive"""
+    return _cutoff(get_setting('ARCHIVE_AFTER_DAYS'))
+
+
+def prune_notifications(days=None, batch_size=None):
+    """Delete read notifications older than ``days``; returns how many were deleted"""
+    days = get_setting('NOTIFICATION_DAYS') if days is None else days
+    batch_size = batch_size or get_setting('BATCH_SIZE')
+    expired = ChatNotification.objects.filter(is_read=True, created_at__lt=_cutoff(days)).order_by('id')
+    total = 0
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            ChatNotification.objects.filter(id__in=ids).delete()
+        total += len(ids)
+
+
+def _archivable(ids):
+    """``ids`` minus messages that a message outside the set replies to, directly or through a chain"""
+    candidates = set(ids)
+    while candidates:
+        blocked = set(
+            ChatMessage.objects.filter(reply_to_id__in=candidates).exclude(id__in=candidates)
+            .values_list('reply_to_id', flat=True)
+        )
+        if not blocked:
+            break
+        candidates -= blocked
+    return candidates
+
+
+def archive_messages(days=None, batch_size=None):
+    """Move messages older than ``days`` to the archive table; returns how many were moved"""
+    days = get_setting('ARCHIVE_AFTER_DAYS') if days is None else days
+    batch_size = batch_size or get_setting('BATCH_SIZE')
+    expired = ChatMessage.objects.filter(timestamp__lt=_cutoff(days)).order_by('-id')
+    total = 0
+    below = None
+    while True:
+        batch = expired if below is None else expired.filter(id__lt=below)
+        ids = list(batch.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return total
+        below = ids[-1]
+        try:
+            with transaction.atomic():
+                archived = _archivable(ids)
+                if not archived:
+                    continue
+                rows = ChatMessage.objects.filter(id__in=archived).values(*ARCHIVED_COLUMNS)
+                now = timezone.now()
+                ArchivedChatMessage.objects.bulk_create(
+                    ArchivedChatMessage(**{**row, 'is_read': True, 'read_at': row['read_at'] or now}) for row in rows
+                )
+                # Cascades to their notifications; signals keep unread counters right
+                ChatMessage.objects.filter(id__in=archived).delete()
+        except IntegrityError:
+            # A reply to one of them arrived meanwhile; the next run retries
+            logger.warning('Skipped archiving chat messages %d-%d', ids[-1], ids[0])
+            continue
+        total += len(archived)
+
+
+def table_size(model):
+    """Bytes used by the model's table and its indexes, or None where the database cannot tell"""
+    connection = connections[router.db_for_write(model)]
+    sql = TABLE_SIZE_SQL.get(connection.vendor)
+    if sql is None:
+        return None
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                # information_schema caches table statistics for up to a day
+                cursor.execute(f'ANALYZE TABLE {connection.ops.quote_name(table)}')
+                cursor.fetchall()
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def compact_table(model):
+    """Let the database reclaim the space of deleted rows (OPTIMIZE TABLE / VACUUM)"""
+    connection = connections[router.db_for_write(model)]
+    sql = COMPACT_SQL.get(connection.vendor)
+    if sql is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(table=connection.ops.quote_name(model._meta.db_table)))
+        if cursor.description:
+            cursor.fetchall()
+
+
+def apply_retention(notification_days=None, archive_after_days=None, batch_size=None, compact=False):
+    """
+    Prune notifications and archive messages
+
+    Returns:
+        ``{'notifications_deleted': n, 'messages_archived': n,
+        'tables': {table: (bytes before, bytes after)}}``; sizes are None
+        where the database cannot report them
+    """
+    models = [ChatNotification, ChatMessage]
+    before = {model: table_size(model) for model in models}
+    sync_read_flags()
+    report = {
+        'notifications_deleted': prune_notifications(notification_days, batch_size),
+        'messages_archived': archive_messages(archive_after_days, batch_size),
+    }
+    if compact:
+        for model in models:
+            compact_table(model)
+    report['tables'] = {model._meta.db_table: (before[model], table_size(model)) for model in models}
+    return report
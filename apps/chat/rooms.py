@@ -0,0 +1,126 @@
+"""
+Group chat rooms
+
+A room message is stored once (RoomMessage) whatever the room's size,
+and delivered with one channel layer send per group:
+
+- ``room_<id>``: RoomConsumer sockets with the room open get full
+  messages plus typing and read events.
+- ``room_<id>_activity``: members' NotificationConsumer sockets get a
+  short notice per new message to update their badges.
+
+Each member has a read cursor (ChatRoomMember.last_read_message_id).
+Marking a room read is one single-row UPDATE, and a member's unread count
+is the number of room messages above the cursor, an index range on
+chat_room_messages(room_id, id).
+"""
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import ChatRoomMember, RoomMessage
+from .unread import push, send_to_group
+
+
+def room_group(room_id):
+    return f'room_{room_id}'
+
+
+def room_activity_group(room_id):
+    return f'room_{room_id}_activity'
+
+
+def is_member(room_id, user_id):
+    return ChatRoomMember.objects.filter(room_id=room_id, user_id=user_id, room__is_active=True).exists()
+
+
+def latest_message_id(room_id):
+    return RoomMessage.objects.filter(room_id=room_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def add_member(room, user):
+    """Add ``user`` with everything already posted marked read; returns False if already a member"""
+    _, created = ChatRoomMember.objects.get_or_create(
+        room=room, user=user, defaults={'last_read_message_id': latest_message_id(room.id)},
+    )
+    if created:
+        transaction.on_commit(lambda: push(user.id, {'type': 'room.joined', 'room_id': room.id}))
+    return created
+
+
+def remove_member(room, user):
+    """Remove ``user`` and close their open room sockets; returns False if not a member"""
+    deleted, _ = ChatRoomMember.objects.filter(room=room, user=user).delete()
+    if deleted:
+        def notify():
+            push(user.id, {'type': 'room.left', 'room_id': room.id})
+            send_to_group(room_group(room.id), {'type': 'room.member_removed', 'room_id': room.id, 'user_id': user.id})
+        transaction.on_commit(notify)
+    return bool(deleted)
+
+
+def message_event(message):
+    return {
+        'id': message.id,
+        'room_id': message.room_id,
+        'sender_id': message.sender_id,
+        'message': message.message,
+        'message_type': message.message_type,
+        'file_url': message.file.url if message.file else None,
+        'file_name': message.file_name,
+        'file_size': message.file_size,
+        'file_type': message.file_type,
+        'timestamp': message.timestamp.isoformat(),
+    }
+
+
+def post_room_message(room, sender, **fields):
+    """Store a message, advance the sender's cursor past it and broadcast it after commit"""
+    with transaction.atomic():
+        message = RoomMessage.objects.create(room=room, sender=sender, **fields)
+        mark_room_read(room.id, sender.id, message.id)
+
+    event = message_event(message)
+
+    def broadcast():
+        send_to_group(room_group(room.id), {'type': 'room.message', **event})
+        send_to_group(room_activity_group(room.id), {
+            'type': 'room.activity',
+            'room_id': room.id,
+            'message_id': message.id,
+            'sender_id': sender.id,
+            'timestamp': event['timestamp'],
+        })
+    transaction.on_commit(broadcast)
+    return message
+
+
+def mark_room_read(room_id, user_id, message_id=None):
+    """
+    Move the member's cursor forward to ``message_id`` (default: the latest message)
+
+    Returns:
+        The id the cursor now points at, or None if it did not move
+    """
+    messages = RoomMessage.objects.filter(room_id=room_id).order_by('-id')
+    if message_id is not None:
+        # Never past the newest message that exists
+        messages = messages.filter(id__lte=message_id)
+    message_id = messages.values_list('id', flat=True).first()
+    if message_id is None:
+        return None
+    moved = ChatRoomMember.objects.filter(
+        room_id=room_id, user_id=user_id, last_read_message_id__lt=message_id,
+    ).update(last_read_message_id=message_id, last_read_at=timezone.now())
+    return message_id if moved else None
+
+
+def with_unread(rooms, user):
+    """Annotate rooms with the user's ``last_read_message_id`` and ``unread_count``"""
+    cursor = ChatRoomMember.objects.filter(room=OuterRef('pk'), user=user).values('last_read_message_id')[:1]
+    unread = RoomMessage.objects.filter(
+        room=OuterRef('pk'), id__gt=OuterRef('last_read_message_id'),
+    ).order_by().values('room').annotate(count=Count('id')).values('count')
+    return rooms.annotate(last_read_message_id=Subquery(cursor)).annotate(
+        unread_count=Coalesce(Subquery(unread), 0),
+    )
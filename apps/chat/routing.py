@@ -1,8 +1,10 @@
 from django.urls import re_path
-from .consumers import DirectChatConsumer
+from .consumers import DirectChatConsumer, NotificationConsumer, RoomConsumer
 
 websocket_urlpatterns = [
     re_path(r'^ws/chat/(?P<user_id>\d+)/$', DirectChatConsumer.as_asgi()),
+    re_path(r'^ws/notifications/$', NotificationConsumer.as_asgi()),
+    re_path(r'^ws/rooms/(?P<room_id>\d+)/$', RoomConsumer.as_asgi()),
 ]
 
 
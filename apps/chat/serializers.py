@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import ChatMessage, ChatNotification, ChatRoom
+from .models import ArchivedChatMessage, ChatMessage, ChatNotification, ChatRoom, RoomMessage
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
@@ -24,6 +24,25 @@ class UserBasicSerializer(serializers.ModelSerializer):
         return None
 
 
+def file_fields(file_obj):
+    """message_type and file_* values for an uploaded attachment"""
+    file_ext = file_obj.name.split('.')[-1].lower()
+    if file_ext in ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp']:
+        message_type = 'image'
+    elif file_ext in ['mp3', 'wav', 'ogg', 'm4a', 'aac']:
+        message_type = 'audio'
+    elif file_ext in ['mp4', 'avi', 'mov', 'wmv', 'flv', 'webm']:
+        message_type = 'video'
+    else:
+        message_type = 'file'
+    return {
+        'message_type': message_type,
+        'file_name': file_obj.name,
+        'file_size': file_obj.size,
+        'file_type': file_obj.content_type,
+    }
+
+
 class ChatMessageSerializer(serializers.ModelSerializer):
     sender = UserBasicSerializer(read_only=True)
     receiver = UserBasicSerializer(read_only=True)
@@ -52,6 +71,15 @@ class ChatMessageSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'timestamp', 'updated_at', 'read_at', 'delivered_at', 'deleted_at']
     
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Read by cursor but not yet flagged by sync_read_flags (see unread.py)
+        cursor = self.context.get('read_cursors', {}).get((instance.receiver_id, instance.sender_id))
+        if cursor and not data['is_read'] and instance.id <= cursor[0]:
+            data['is_read'] = True
+            data['read_at'] = self.fields['read_at'].to_representation(cursor[1]) if cursor[1] else None
+        return data
+    
     def get_file_url(self, obj):
         if obj.file:
             return obj.file.url
@@ -87,27 +115,37 @@ class ChatMessageSerializer(serializers.ModelSerializer):
         return None
     
     def create(self, validated_data):
-        # Set message type based on file presence
+        # Set message type and file information based on file presence
         if validated_data.get('file'):
-            file_ext = validated_data['file'].name.split('.')[-1].lower()
-            if file_ext in ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp']:
-                validated_data['message_type'] = 'image'
-            elif file_ext in ['mp3', 'wav', 'ogg', 'm4a', 'aac']:
-                validated_data['message_type'] = 'audio'
-            elif file_ext in ['mp4', 'avi', 'mov', 'wmv', 'flv', 'webm']:
-                validated_data['message_type'] = 'video'
-            else:
-                validated_data['message_type'] = 'file'
-            
-            # Set file information
-            file_obj = validated_data['file']
-            validated_data['file_name'] = file_obj.name
-            validated_data['file_size'] = file_obj.size
-            validated_data['file_type'] = file_obj.content_type
+            validated_data.update(file_fields(validated_data['file']))
         
         return super().create(validated_data)
 
 
+class ArchivedChatMessageSerializer(ChatMessageSerializer):
+    """Archived messages in the same shape as live ones (read-only)"""
+
+    class Meta(ChatMessageSerializer.Meta):
+        model = ArchivedChatMessage
+
+    def get_reply_to_message(self, obj):
+        # The message replied to may still be live
+        if obj.reply_to_id is None:
+            return None
+        reply_to = (
+            ChatMessage.objects.select_related('sender').filter(id=obj.reply_to_id).first()
+            or ArchivedChatMessage.objects.select_related('sender').filter(id=obj.reply_to_id).first()
+        )
+        if reply_to is None:
+            return None
+        return {
+            'id': reply_to.id,
+            'message': reply_to.message,
+            'sender': UserBasicSerializer(reply_to.sender).data,
+            'message_type': reply_to.message_type,
+        }
+
+
 class ConversationSerializer(serializers.Serializer):
     """Serializer for conversation list with last message"""
     user = UserBasicSerializer()
@@ -136,15 +174,50 @@ class ChatRoomSerializer(serializers.ModelSerializer):
     created_by = UserBasicSerializer(read_only=True)
     members = UserBasicSerializer(many=True, read_only=True)
     member_count = serializers.SerializerMethodField()
+    # Annotated by rooms.with_unread
+    last_read_message_id = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
     
     class Meta:
         model = ChatRoom
         fields = [
             'id', 'name', 'description', 'created_by', 'members', 
-            'member_count', 'is_active', 'created_at', 'updated_at'
+            'member_count', 'is_active', 'created_at', 'updated_at',
+            'last_read_message_id', 'unread_count'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_member_count(self, obj):
-        return obj.members.count()
+        return len(obj.members.all())
+    
+    def get_last_read_message_id(self, obj):
+        return getattr(obj, 'last_read_message_id', None) or 0
+    
+    def get_unread_count(self, obj):
+        return getattr(obj, 'unread_count', 0)
+
+
+class RoomMessageSerializer(serializers.ModelSerializer):
+    sender = UserBasicSerializer(read_only=True)
+    file_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = RoomMessage
+        fields = [
+            'id', 'room', 'sender', 'message', 'message_type', 'file', 'file_url',
+            'file_name', 'file_size', 'file_type', 'timestamp'
+        ]
+        read_only_fields = ['id', 'room', 'message_type', 'file_name', 'file_size', 'file_type', 'timestamp']
+    
+    def get_file_url(self, obj):
+        if obj.file:
+            return obj.file.url
+        return None
+    
+    def validate(self, attrs):
+        if not attrs.get('message') and not attrs.get('file'):
+            raise serializers.ValidationError('A message or a file is required')
+        if attrs.get('file'):
+            attrs.update(file_fields(attrs['file']))
+        return attrs
 
@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from .models import ChatMessage, ChatNotification
+from .unread import adjust_unread, push, read_up_to
+
+# Per model: the user whose counter a row feeds, which counter, and the
+# fields that decide whether the row is counted
+UNREAD_RULES = {
+    ChatMessage: ('receiver_id', 'messages', ('is_read', 'is_deleted')),
+    ChatNotification: ('user_id', 'notifications', ('is_read',)),
+}
+
+
+def _unread_state(instance):
+    """``(owner_id, counted)``, or None when a field involved is deferred"""
+    owner_field, _, flags = UNREAD_RULES[type(instance)]
+    values = instance.__dict__
+    if owner_field not in values or any(flag not in values for flag in flags):
+        return None
+    return values[owner_field], not any(values[flag] for flag in flags)
+
+
+def _apply(instance, before, after, created=False):
+    counter = UNREAD_RULES[type(instance)][1]
+    deltas = {}
+    if before is not None and before[1]:
+        deltas[before[0]] = deltas.get(before[0], 0) - 1
+    if after is not None and after[1]:
+        deltas[after[0]] = deltas.get(after[0], 0) + 1
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if deltas and not created and isinstance(instance, ChatMessage):
+        # Messages behind the receiver's read cursor are read whatever is_read says
+        if instance.id <= read_up_to(instance.receiver_id, instance.sender_id):
+            return
+    for user_id, delta in deltas.items():
+        adjust_unread(user_id, **{counter: delta})
+
+
+@receiver(post_init, sender=ChatMessage)
+@receiver(post_init, sender=ChatNotification)
+def remember_unread_state(sender, instance, **kwargs):
+    """Snapshot the counted state as loaded, so saves diff without a SELECT"""
+    instance._unread_state = _unread_state(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=ChatMessage)
+@receiver(post_save, sender=ChatNotification)
+def unread_state_saved(sender, instance, created, raw=False, **kwargs):
+    before = None if created else instance._unread_state
+    after = _unread_state(instance)
+    instance._unread_state = after
+    if raw or (not created and (before is None or after is None)):
+        return
+    _apply(instance, before, after, created)
+
+
+@receiver(post_delete, sender=ChatMessage)
+@receiver(post_delete, sender=ChatNotification)
+def unread_row_deleted(sender, instance, **kwargs):
+    _apply(instance, instance._unread_state, None)
+
+
+@receiver(post_save, sender=ChatNotification)
+def notification_created(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    event = {
+        'type': 'notification.created',
+        'id': instance.id,
+        'notification_type': instance.notification_type,
+        'message': instance.message,
+        'sender_id': instance.sender_id,
+        'related_message_id': instance.related_message_id,
+        'created_at': instance.created_at.isoformat(),
+    }
+    transaction.on_commit(lambda: push(instance.user_id, event))
@@ -0,0 +1,22 @@
+import logging
+from celery import shared_task
+from .retention import apply_retention
+from .unread import sync_read_flags
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def apply_chat_retention_task(compact=False):
+    """Periodic (celery beat) variant of the apply_chat_retention command"""
+    report = apply_retention(compact=compact)
+    logger.info(
+        'Chat retention: %d notifications deleted, %d messages archived',
+        report['notifications_deleted'], report['messages_archived'],
+    )
+
+
+@shared_task(ignore_result=True)
+def sync_read_flags_task():
+    """Periodic (celery beat) variant of the sync_read_flags command"""
+    logger.info('Chat read flags: %d messages flagged', sync_read_flags())
@@ -1,3 +1,432 @@
-from django.test import TestCase
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError
+from django.db import connection
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from spa_central.testing import AsyncParityTestCase
+from apps.users.models import User
+from . import rooms
+from .models import ArchivedChatMessage, ChatMessage, ChatNotification, ChatRoom, ChatRoomMember, UnreadCounter
+from .retention import archive_messages
+from .routing import websocket_urlpatterns
+from .unread import (
+    get_unread_counts, mark_conversation_read, mark_messages_read, mark_notifications_read,
+    rebuild_unread_counters, sync_read_flags,
+)
 
-# Create your tests here.
+
+class ChatAsyncViewTests(AsyncParityTestCase):
+    """chat-conversations and the unread counts under ASGI match the sync viewsets"""
+
+    def setUp(self):
+        super().setUp()
+        self.bob = User.objects.create_user(
+            email='bob@example.com', password='x', first_name='Bob', last_name='Builder', user_type='manager',
+        )
+        ChatMessage.objects.create(sender=self.user, receiver=self.bob, message='hi')
+        ChatMessage.objects.create(sender=self.bob, receiver=self.user, message='hello')
+        ChatMessage.objects.create(sender=self.bob, receiver=self.user, message='still there?')
+        ChatNotification.objects.create(user=self.user, sender=self.bob, notification_type='message', message='New message')
+
+    def test_conversations(self):
+        response = self.assertSameResponse('/api/chat/conversations/')
+        self.assertEqual(response.json()[0]['unread_count'], 2)
+        self.assertSameResponse('/api/chat/conversations/', user=self.bob)
+
+    def test_unread_counts(self):
+        self.assertSameResponse('/api/chat/unread_count/')
+        self.assertSameResponse('/api/notifications/unread_count/')
+
+
+class UnreadCounterTests(TestCase):
+    """The maintained counters follow every change that affects what is unread"""
+
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            email='alice@example.com', password='x', first_name='Alice', last_name='Reader', user_type='admin',
+        )
+        self.bob = User.objects.create_user(
+            email='bob@example.com', password='x', first_name='Bob', last_name='Builder', user_type='manager',
+        )
+        self.first = self.send('one')
+        self.second = self.send('two')
+        # Seeds the counter; from here on only deltas keep it current
+        self.assertEqual(get_unread_counts(self.alice.id), {'messages': 2, 'notifications': 0})
+
+    def send(self, text):
+        return ChatMessage.objects.create(sender=self.bob, receiver=self.alice, message=text)
+
+    def assertCounts(self, messages, notifications=0):
+        self.assertEqual(get_unread_counts(self.alice.id), {'messages': messages, 'notifications': notifications})
+        # The deltas agree with a recount from the chat tables
+        rebuild_unread_counters()
+        self.assertEqual(get_unread_counts(self.alice.id), {'messages': messages, 'notifications': notifications})
+
+    def test_create(self):
+        self.send('three')
+        ChatMessage.objects.create(sender=self.alice, receiver=self.bob, message='sent, not received')
+        self.assertCounts(3)
+
+    def test_counter_seeded_on_first_read(self):
+        UnreadCounter.objects.all().delete()
+        self.send('three')
+        self.assertEqual(get_unread_counts(self.alice.id), {'messages': 3, 'notifications': 0})
+
+    def test_read_flag(self):
+        self.first.is_read = True
+        self.first.save()
+        self.assertCounts(1)
+        self.first.is_read = False
+        self.first.save()
+        self.assertCounts(2)
+
+    def test_delete(self):
+        self.first.is_deleted = True
+        self.first.save()
+        self.assertCounts(1)
+        self.second.delete()
+        self.assertCounts(0)
+
+    def test_cursor_move(self):
+        self.assertEqual(mark_conversation_read(self.alice.id, self.bob.id, self.first.id), 1)
+        self.assertCounts(1)
+        # Cursors never move back, and passing the same messages twice counts nothing
+        self.assertEqual(mark_conversation_read(self.alice.id, self.bob.id, self.first.id), 0)
+        self.assertEqual(mark_conversation_read(self.alice.id, self.bob.id), 1)
+        self.assertCounts(0)
+        self.send('three')
+        self.assertCounts(1)
+
+    def test_changes_behind_cursor(self):
+        mark_conversation_read(self.alice.id, self.bob.id)
+        # Already read through the cursor, so flag changes and deletes are no-ops
+        self.first.is_read = True
+        self.first.save()
+        self.second.delete()
+        self.assertCounts(0)
+
+    def test_mark_messages_read(self):
+        self.assertEqual(mark_messages_read(ChatMessage.objects.filter(id=self.second.id)), 2)
+        self.assertCounts(0)
+        self.assertEqual(sync_read_flags(), 2)
+        self.assertCounts(0)
+
+    def test_notifications(self):
+        ChatNotification.objects.create(user=self.alice, sender=self.bob, notification_type='message', message='a')
+        ChatNotification.objects.create(user=self.alice, sender=self.bob, notification_type='message', message='b')
+        self.assertCounts(2, 2)
+        self.assertEqual(mark_notifications_read(ChatNotification.objects.filter(user=self.alice)), 2)
+        self.assertCounts(2, 0)
+        self.assertEqual(mark_notifications_read(ChatNotification.objects.filter(user=self.alice)), 0)
+        self.assertCounts(2, 0)
+
+
+@override_settings(CHAT_RETENTION={'NOTIFICATION_DAYS': 90, 'ARCHIVE_AFTER_DAYS': 30, 'BATCH_SIZE': 1000})
+class ChatRetentionTests(TestCase):
+    """archive_messages and reading history across the live and archive tables"""
+
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            email='alice@example.com', password='x', first_name='Alice', last_name='Reader', user_type='admin',
+        )
+        self.bob = User.objects.create_user(
+            email='bob@example.com', password='x', first_name='Bob', last_name='Builder', user_type='manager',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def send(self, text, days_ago=0, reply_to=None, sender=None):
+        sender = sender or self.bob
+        receiver = self.alice if sender == self.bob else self.bob
+        message = ChatMessage.objects.create(sender=sender, receiver=receiver, message=text, reply_to=reply_to)
+        if days_ago:
+            ChatMessage.objects.filter(id=message.id).update(timestamp=timezone.now() - timedelta(days=days_ago))
+        return message
+
+    def history(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/chat/history/', {'user_id': self.bob.id, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.archive_read = any('chat_messages_archive' in query['sql'] for query in queries.captured_queries)
+        return [message['message'] for message in response.data]
+
+    def test_history_reads_archive_only_when_paging_back(self):
+        for text in ('a', 'b', 'c'):
+            self.send(text, days_ago=60)
+        newer = self.send('d')
+        self.send('e')
+        self.assertEqual(archive_messages(), 3)
+
+        self.assertEqual(self.history(), ['d', 'e'])
+        self.assertFalse(self.archive_read)
+        self.assertEqual(self.history(before=newer.id), ['a', 'b', 'c'])
+        self.assertEqual(self.history(before=newer.id, limit=2), ['b', 'c'])
+        # A page that runs out of live messages continues in the archive
+        self.assertEqual(self.history(limit=3), ['d', 'e'])
+        self.assertFalse(self.archive_read)
+        self.assertEqual(self.history(before=ChatMessage.objects.latest('id').id, limit=3), ['b', 'c', 'd'])
+        self.assertTrue(self.archive_read)
+
+    def test_history_rejects_bad_paging(self):
+        for params in ({'before': 'x'}, {'limit': 0}, {'limit': '-1'}):
+            response = self.client.get('/api/chat/history/', {'user_id': self.bob.id, **params})
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_archived_unread_messages_are_read(self):
+        old = self.send('old', days_ago=60)
+        self.assertEqual(get_unread_counts(self.alice.id)['messages'], 1)
+        archive_messages()
+        self.assertEqual(get_unread_counts(self.alice.id)['messages'], 0)
+        archived = ArchivedChatMessage.objects.get(id=old.id)
+        self.assertTrue(archived.is_read)
+        self.assertIsNotNone(archived.read_at)
+
+    def test_reply_chain_across_cutoff(self):
+        root = self.send('root', days_ago=60)
+        reply = self.send('reply', days_ago=50, reply_to=root)
+        lone = self.send('lone', days_ago=40)
+        recent = self.send('recent', reply_to=reply)
+        # root <- reply <- recent: only the message outside the chain moves
+        self.assertEqual(archive_messages(), 1)
+        self.assertEqual(list(ArchivedChatMessage.objects.values_list('id', flat=True)), [lone.id])
+
+        # The live chain is older than the cutoff, so history interleaves the archive
+        self.assertEqual(self.history(), ['root', 'reply', 'lone', 'recent'])
+        self.assertTrue(self.archive_read)
+
+        ChatMessage.objects.filter(id=recent.id).update(timestamp=timezone.now() - timedelta(days=31))
+        self.assertEqual(archive_messages(), 3)
+        self.assertEqual(ArchivedChatMessage.objects.get(id=recent.id).reply_to_id, reply.id)
+        self.assertFalse(ChatMessage.objects.exists())
+
+    def test_batches_walk_down(self):
+        root = self.send('root', days_ago=60)
+        for index in range(4):
+            self.send(f'filler {index}', days_ago=55)
+        # Its reply sits in the first (newest) batch, so root is free by its own batch
+        self.send('late reply', days_ago=50, reply_to=root)
+        self.assertEqual(archive_messages(batch_size=2), 6)
+        self.assertEqual(ArchivedChatMessage.objects.count(), 6)
+
+    def test_batch_skipped_on_integrity_error(self):
+        for index in range(4):
+            self.send(f'old {index}', days_ago=60)
+        real = ArchivedChatMessage.objects.bulk_create
+        calls = []
+
+        def fail_first(rows):
+            calls.append(1)
+            if len(calls) == 1:
+                raise IntegrityError('reply arrived')
+            return real(rows)
+
+        with mock.patch.object(ArchivedChatMessage.objects, 'bulk_create', fail_first), \
+                self.assertLogs('apps.chat.retention', 'WARNING'):
+            self.assertEqual(archive_messages(batch_size=2), 2)
+        # The skipped batch stays live for the next run
+        self.assertEqual(ChatMessage.objects.count(), 2)
+        self.assertEqual(archive_messages(batch_size=2), 2)
+
+    def test_notifications_go_with_their_message(self):
+        old = self.send('old', days_ago=60)
+        ChatNotification.objects.create(user=self.alice, sender=self.bob, notification_type='message',
+                                        message='New message', related_message=old)
+        ChatNotification.objects.create(user=self.alice, sender=self.bob, notification_type='system', message='Other')
+        archive_messages()
+        self.assertEqual(list(ChatNotification.objects.values_list('message', flat=True)), ['Other'])
+        self.assertEqual(get_unread_counts(self.alice.id), {'messages': 0, 'notifications': 1})
+
+    def test_file_download_from_archive(self):
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            message = ChatMessage.objects.create(
+                sender=self.bob, receiver=self.alice, message_type='file', file_name='report.txt',
+                file_type='text/plain', file=SimpleUploadedFile('report.txt', b'quarterly numbers'),
+            )
+            ChatMessage.objects.filter(id=message.id).update(timestamp=timezone.now() - timedelta(days=60))
+            archive_messages()
+            self.assertFalse(ChatMessage.objects.filter(id=message.id).exists())
+
+            response = self.client.get(f'/api/files/download/{message.id}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b'quarterly numbers')
+            self.assertIn('report.txt', response['Content-Disposition'])
+
+            outsider = APIClient()
+            outsider.force_authenticate(User.objects.create_user(
+                email='eve@example.com', password='x', first_name='Eve', last_name='Else', user_type='manager',
+            ))
+            self.assertEqual(outsider.get(f'/api/files/download/{message.id}/').status_code, 403)
+            self.assertEqual(self.client.get(f'/api/files/download/{message.id + 1}/').status_code, 404)
+
+
+class ChatRoomTests(TestCase):
+    """Room membership, read cursors and unread counts"""
+
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            email='alice@example.com', password='x', first_name='Alice', last_name='Reader', user_type='admin',
+        )
+        self.bob = User.objects.create_user(
+            email='bob@example.com', password='x', first_name='Bob', last_name='Builder', user_type='manager',
+        )
+        self.eve = User.objects.create_user(
+            email='eve@example.com', password='x', first_name='Eve', last_name='Else', user_type='manager',
+        )
+        self.room = ChatRoom.objects.create(name='Ops', created_by=self.bob)
+        rooms.add_member(self.room, self.bob)
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def post(self, text):
+        return rooms.post_room_message(self.room, self.bob, message=text)
+
+    def cursor(self, user):
+        return ChatRoomMember.objects.get(room=self.room, user=user).last_read_message_id
+
+    def unread(self, user):
+        return rooms.with_unread(ChatRoom.objects.filter(id=self.room.id), user).get().unread_count
+
+    def test_membership(self):
+        self.post('before alice')
+        self.assertTrue(rooms.add_member(self.room, self.alice))
+        self.assertFalse(rooms.add_member(self.room, self.alice))
+        # Joining marks the backlog read
+        self.assertEqual(self.unread(self.alice), 0)
+        self.assertTrue(rooms.is_member(self.room.id, self.alice.id))
+        self.assertFalse(rooms.is_member(self.room.id, self.eve.id))
+        self.assertTrue(rooms.remove_member(self.room, self.alice))
+        self.assertFalse(rooms.remove_member(self.room, self.alice))
+        self.assertFalse(rooms.is_member(self.room.id, self.alice.id))
+        ChatRoom.objects.filter(id=self.room.id).update(is_active=False)
+        self.assertFalse(rooms.is_member(self.room.id, self.bob.id))
+
+    def test_cursor_only_moves_forward(self):
+        rooms.add_member(self.room, self.alice)
+        first, second, third = self.post('1'), self.post('2'), self.post('3')
+        self.assertEqual(self.unread(self.alice), 3)
+        self.assertEqual(rooms.mark_room_read(self.room.id, self.alice.id, second.id), second.id)
+        self.assertEqual(self.unread(self.alice), 1)
+        self.assertIsNone(rooms.mark_room_read(self.room.id, self.alice.id, first.id))
+        self.assertEqual(self.cursor(self.alice), second.id)
+        # Never past the newest message
+        self.assertEqual(rooms.mark_room_read(self.room.id, self.alice.id, third.id + 100), third.id)
+        self.assertIsNone(rooms.mark_room_read(self.room.id, self.alice.id))
+        self.assertEqual(self.unread(self.alice), 0)
+        # Posting moves the sender's own cursor
+        self.assertEqual(self.cursor(self.bob), third.id)
+        self.assertIsNone(rooms.mark_room_read(self.room.id, self.eve.id))
+
+    def test_messages_endpoint(self):
+        rooms.add_member(self.room, self.alice)
+        self.post('1')
+        self.post('2')
+        response = self.client.get(f'/api/rooms/{self.room.id}/messages/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([message['message'] for message in response.data['results']], ['2', '1'])
+
+        response = self.client.post(f'/api/rooms/{self.room.id}/messages/', {'message': '3'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.cursor(self.alice), response.data['id'])
+        self.assertEqual(self.unread(self.bob), 1)
+
+    def test_read_endpoint(self):
+        rooms.add_member(self.room, self.alice)
+        first = self.post('1')
+        self.post('2')
+        response = self.client.post(f'/api/rooms/{self.room.id}/read/', {'message_id': first.id}, format='json')
+        self.assertEqual(response.data, {'last_read_message_id': first.id})
+        response = self.client.post(f'/api/rooms/{self.room.id}/read/', {'message_id': 'abc'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/rooms/')
+        self.assertEqual(response.data['results'][0]['unread_count'], 1)
+
+    def test_non_members_are_refused(self):
+        self.post('secret')
+        for method, path in (
+            ('get', f'/api/rooms/{self.room.id}/messages/'),
+            ('post', f'/api/rooms/{self.room.id}/messages/'),
+            ('post', f'/api/rooms/{self.room.id}/read/'),
+        ):
+            response = getattr(self.client, method)(path, {'message': 'hi'}, format='json')
+            self.assertEqual(response.status_code, 404, path)
+        self.assertEqual(self.room.messages.count(), 1)
+
+
+class RoomConsumerTests(TransactionTestCase):
+    """ws/rooms/<id>/ accepts members only and broadcasts their messages"""
+
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            email='alice@example.com', password='x', first_name='Alice', last_name='Reader', user_type='admin',
+        )
+        self.eve = User.objects.create_user(
+            email='eve@example.com', password='x', first_name='Eve', last_name='Else', user_type='manager',
+        )
+        self.room = ChatRoom.objects.create(name='Ops', created_by=self.alice)
+        rooms.add_member(self.room, self.alice)
+
+    def communicator(self, user):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/rooms/{self.room.id}/')
+        if user is not None:
+            communicator.scope['user'] = user
+        return communicator
+
+    def test_non_members_refused(self):
+        async def connect(user):
+            communicator = self.communicator(user)
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+
+        self.assertFalse(async_to_sync(connect)(self.eve))
+        self.assertFalse(async_to_sync(connect)(None))
+        self.assertTrue(async_to_sync(connect)(self.alice))
+
+    def test_member_message_round_trip(self):
+        async def talk():
+            communicator = self.communicator(self.alice)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await communicator.send_json_to({'type': 'message', 'message': 'hello room'})
+            event = await communicator.receive_json_from(timeout=5)
+            await communicator.disconnect()
+            return event
+
+        event = async_to_sync(talk)()
+        self.assertEqual((event['type'], event['message']), ('message', 'hello room'))
+        self.assertEqual(ChatRoomMember.objects.get(room=self.room, user=self.alice).last_read_message_id, event['id'])
+
+
+class RoomMembersMigrationTests(TransactionTestCase):
+    """0004 adopts the auto-created members table as ChatRoomMember without losing rows"""
+
+    before = [('chat', '0003_archivedchatmessage')]
+    after = [('chat', '0004_room_messages_and_cursors')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_members_kept(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        old_apps = executor.loader.project_state(self.before).apps
+        user = old_apps.get_model('users', 'User').objects.create(email='alice@example.com', first_name='Alice')
+        room = old_apps.get_model('chat', 'ChatRoom').objects.create(name='Ops', created_by_id=user.id)
+        room.members.add(user)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        new_apps = executor.loader.project_state(self.after).apps
+        member = new_apps.get_model('chat', 'ChatRoomMember').objects.get()
+        self.assertEqual((member.room_id, member.user_id, member.last_read_message_id), (room.id, user.id, 0))
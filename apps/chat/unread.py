@@ -0,0 +1,220 @@
+"""
+Maintained unread counters and their websocket fan-out
+
+UnreadCounter keeps each user's unread message count (received, unread,
+not deleted) and unread notification count, so a badge is one primary-key
+read instead of a COUNT(*) over chat_messages/chat_notifications. A
+counter is seeded from those COUNTs the first time it is read, then kept
+current by the ChatMessage/ChatNotification signals (signals.py) and by
+the bulk mark-read helpers below, since queryset.update() sends no signals.
+
+Direct messages are read through a cursor per (reader, sender) pair,
+ConversationReadCursor.last_read_message_id: a message is read once its
+id is at or below that cursor, or once its is_read flag is set. Opening a
+conversation moves one cursor row instead of updating every message in
+it. ``sync_read_flags`` later writes is_read/read_at behind the cursors,
+for older clients and so the unread scans over the (receiver, is_read)
+index stay short. Serializers show messages behind a cursor as read
+before that happens (``read_cursors``).
+
+Every change is pushed once the transaction commits to the user's
+``user_<id>`` group, which NotificationConsumer joins. Run
+``rebuild_unread_counters`` after changing chat rows outside the ORM.
+"""
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from .models import ChatMessage, ChatNotification, ConversationReadCursor, UnreadCounter
+
+logger = logging.getLogger(__name__)
+
+
+def user_group(user_id):
+    return f'user_{user_id}'
+
+
+def unread_messages(user_id):
+    cursor = ConversationReadCursor.objects.filter(
+        user_id=user_id, other_user_id=OuterRef('sender_id'),
+    ).values('last_read_message_id')[:1]
+    return ChatMessage.objects.filter(receiver_id=user_id, is_read=False, is_deleted=False).alias(
+        read_up_to=Coalesce(Subquery(cursor), 0),
+    ).filter(id__gt=F('read_up_to'))
+
+
+def unread_notifications(user_id):
+    return ChatNotification.objects.filter(user_id=user_id, is_read=False)
+
+
+def _counts(counter):
+    return {'messages': counter.messages, 'notifications': counter.notifications}
+
+
+def get_unread_counts(user_id):
+    """``{'messages': n, 'notifications': n}``, seeding the counter on first use"""
+    counter = UnreadCounter.objects.filter(user_id=user_id).first()
+    if counter is None:
+        counter, _ = UnreadCounter.objects.get_or_create(user_id=user_id, defaults={
+            'messages': unread_messages(user_id).count(),
+            'notifications': unread_notifications(user_id).count(),
+        })
+    return _counts(counter)
+
+
+async def aget_unread_counts(user_id):
+    counter = await UnreadCounter.objects.filter(user_id=user_id).afirst()
+    if counter is None:
+        counter, _ = await UnreadCounter.objects.aget_or_create(user_id=user_id, defaults={
+            'messages': await unread_messages(user_id).acount(),
+            'notifications': await unread_notifications(user_id).acount(),
+        })
+    return _counts(counter)
+
+
+def rebuild_unread_counters():
+    """Reseed every existing counter from the chat tables; returns how many were rebuilt"""
+    user_ids = list(UnreadCounter.objects.values_list('user_id', flat=True))
+    for user_id in user_ids:
+        counts = {
+            'messages': unread_messages(user_id).count(),
+            'notifications': unread_notifications(user_id).count(),
+        }
+        UnreadCounter.objects.filter(user_id=user_id).update(**counts)
+        transaction.on_commit(lambda user_id=user_id, counts=counts: push(user_id, {'type': 'unread.counts', **counts}))
+    return len(user_ids)
+
+
+def adjust_unread(user_id, messages=0, notifications=0):
+    """Apply deltas to a user's counters and push them once the transaction commits"""
+    deltas = {name: delta for name, delta in (('messages', messages), ('notifications', notifications)) if delta}
+    if not deltas:
+        return
+    # No row yet: the counter is seeded from the committed rows on first read
+    UnreadCounter.objects.filter(user_id=user_id).update(**{
+        name: Greatest(F(name) + delta, 0) for name, delta in deltas.items()
+    })
+    transaction.on_commit(lambda: push(user_id, {
+        'type': 'unread.delta', 'messages': messages, 'notifications': notifications,
+    }))
+
+
+def send_to_group(group, event):
+    """Send a channel layer event from sync code; failures are logged, not raised"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(group, event)
+    except Exception:
+        # The rows are committed either way; clients resync on reconnect
+        logger.exception('Could not send %s to %s', event['type'], group)
+
+
+def push(user_id, event):
+    """Send a channel layer event to every socket of the user"""
+    send_to_group(user_group(user_id), event)
+
+
+def read_up_to(user_id, other_user_id):
+    """Id of the last message from ``other_user_id`` that ``user_id`` has read (0 if none)"""
+    return ConversationReadCursor.objects.filter(
+        user_id=user_id, other_user_id=other_user_id,
+    ).values_list('last_read_message_id', flat=True).first() or 0
+
+
+def read_cursors(user_id, other_user_id=None):
+    """
+    Cursors of the conversations the user takes part in, both directions;
+    only the conversation with ``other_user_id`` when given
+
+    Returns:
+        ``{(reader_id, sender_id): (last_read_message_id, last_read_at)}``
+    """
+    if other_user_id is None:
+        cursors = ConversationReadCursor.objects.filter(Q(user_id=user_id) | Q(other_user_id=user_id))
+    else:
+        cursors = ConversationReadCursor.objects.filter(
+            Q(user_id=user_id, other_user_id=other_user_id) | Q(user_id=other_user_id, other_user_id=user_id)
+        )
+    return {
+        (cursor.user_id, cursor.other_user_id): (cursor.last_read_message_id, cursor.last_read_at)
+        for cursor in cursors
+    }
+
+
+def mark_conversation_read(user_id, other_user_id, message_id=None):
+    """
+    Move the user's cursor on messages from ``other_user_id`` forward to
+    ``message_id`` (default: the latest message)
+
+    Returns:
+        How many unread messages the cursor passed
+    """
+    received = ChatMessage.objects.filter(receiver_id=user_id, sender_id=other_user_id)
+    latest = received.order_by('-id')
+    if message_id is not None:
+        # Never past the newest message that exists
+        latest = latest.filter(id__lte=message_id)
+    message_id = latest.values_list('id', flat=True).first()
+    # Cursors only move forward, so one already past needs no lock
+    if message_id is None or read_up_to(user_id, other_user_id) >= message_id:
+        return 0
+    with transaction.atomic():
+        # The row lock keeps concurrent readers from decrementing twice
+        cursor, _ = ConversationReadCursor.objects.select_for_update().get_or_create(
+            user_id=user_id, other_user_id=other_user_id,
+        )
+        if cursor.last_read_message_id >= message_id:
+            return 0
+        passed = received.filter(
+            is_read=False, is_deleted=False, id__gt=cursor.last_read_message_id, id__lte=message_id,
+        ).count()
+        cursor.last_read_message_id = message_id
+        cursor.last_read_at = timezone.now()
+        cursor.save(update_fields=['last_read_message_id', 'last_read_at'])
+        adjust_unread(user_id, messages=-passed)
+    return passed
+
+
+def mark_messages_read(queryset):
+    """Move each conversation's cursor past the newest message in ``queryset``; returns how many became read"""
+    newest = queryset.order_by().values('receiver_id', 'sender_id').annotate(newest=Max('id'))
+    return sum(
+        mark_conversation_read(row['receiver_id'], row['sender_id'], row['newest']) for row in newest
+    )
+
+
+def sync_read_flags():
+    """Write is_read/read_at on the messages behind each cursor; returns how many rows were updated"""
+    updated = 0
+    pending = ConversationReadCursor.objects.filter(flags_synced_message_id__lt=F('last_read_message_id'))
+    for cursor in pending.iterator():
+        with transaction.atomic():
+            updated += ChatMessage.objects.filter(
+                receiver_id=cursor.user_id,
+                sender_id=cursor.other_user_id,
+                is_read=False,
+                id__gt=cursor.flags_synced_message_id,
+                id__lte=cursor.last_read_message_id,
+            ).update(is_read=True, read_at=cursor.last_read_at)
+            ConversationReadCursor.objects.filter(pk=cursor.pk).update(
+                flags_synced_message_id=cursor.last_read_message_id,
+            )
+    return updated
+
+
+def mark_notifications_read(queryset):
+    """Mark the unread notifications in ``queryset`` read; returns how many were updated"""
+    queryset = queryset.filter(is_read=False)
+    now = timezone.now()
+    changed = 0
+    with transaction.atomic():
+        for user_id in set(queryset.values_list('user_id', flat=True)):
+            rows = queryset.filter(user_id=user_id).update(is_read=True, read_at=now)
+            changed += rows
+            adjust_unread(user_id, notifications=-rows)
+    return changed
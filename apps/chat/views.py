@@ -9,15 +9,38 @@ from django.db.models import Q, Max, Count, Case, When, Value, IntegerField, Out
 from django.utils import timezone
 from django.http import HttpResponse, Http404
 from django.conf import settings
+import heapq
+from datetime import datetime, timezone as dt_timezone
 import os
-from .models import ChatMessage, ChatNotification, ChatRoom
+from spa_central.pagination import MessageCursorPagination
+from .models import ArchivedChatMessage, ChatMessage, ChatNotification, ChatRoom, ChatRoomMember
+from . import rooms
+from .retention import archive_cutoff
+from .unread import (
+    get_unread_counts, mark_conversation_read, mark_notifications_read, read_cursors, unread_messages
+)
 from .serializers import (
-    ChatMessageSerializer, UserBasicSerializer, ConversationSerializer,
-    ChatNotificationSerializer, ChatRoomSerializer
+    ArchivedChatMessageSerializer, ChatMessageSerializer, UserBasicSerializer, ConversationSerializer,
+    ChatNotificationSerializer, ChatRoomSerializer, RoomMessageSerializer
 )
 
 User = get_user_model()
 
+_OLDEST = datetime.min.replace(tzinfo=dt_timezone.utc)
+
+# history: largest ?limit= and the archive page size when none is given
+HISTORY_MAX_LIMIT = 500
+HISTORY_ARCHIVE_PAGE = 50
+
+
+def _optional_int(value):
+    if value in (None, ''):
+        return None
+    value = int(value)
+    if value < 1:
+        raise ValueError(value)
+    return value
+
 
 class ChatViewSet(viewsets.ModelViewSet):
     """ViewSet for chat messages"""
@@ -31,6 +54,25 @@ class ChatViewSet(viewsets.ModelViewSet):
             Q(sender=user) | Q(receiver=user)
         ).select_related('sender', 'receiver').order_by('timestamp')
     
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # The list spans every conversation; other actions load one pair's cursors
+        if self.action == 'list' and self.request.user.is_authenticated:
+            context['read_cursors'] = read_cursors(self.request.user.id)
+        return context
+    
+    def get_conversation_context(self, user_id, other_user_id):
+        """Serializer context with the read cursors of one conversation"""
+        context = self.get_serializer_context()
+        context['read_cursors'] = read_cursors(user_id, other_user_id)
+        return context
+    
+    def get_serializer(self, *args, **kwargs):
+        instance = args[0] if args else kwargs.get('instance')
+        if isinstance(instance, ChatMessage) and 'context' not in kwargs:
+            kwargs['context'] = self.get_conversation_context(instance.receiver_id, instance.sender_id)
+        return super().get_serializer(*args, **kwargs)
+    
     def create(self, request, *args, **kwargs):
         """Send a new message"""
         serializer = self.get_serializer(data=request.data)
@@ -41,75 +83,114 @@ class ChatViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def conversations(self, request):
         """Get list of all conversations with last message"""
-        user = request.user
-        
-        # Get all users the current user has chatted with
-        sent_to = ChatMessage.objects.filter(sender=user).values_list('receiver_id', flat=True).distinct()
-        received_from = ChatMessage.objects.filter(receiver=user).values_list('sender_id', flat=True).distinct()
-        user_ids = set(sent_to) | set(received_from)
-        
+        results = {name: query() for name, query in self.conversation_queries().items()}
+        messages = self.last_messages(results['partners']).in_bulk()
+        return Response(self._build_conversations(results, messages))
+
+    def conversation_queries(self):
+        """
+        Independent conversation queries by name (the async endpoint runs
+        them concurrently): the partners annotated with their last message
+        id, and the unread counts per sender
+        """
+        user = self.request.user
+        last_message = ChatMessage.objects.filter(
+            Q(sender=user, receiver=OuterRef('pk')) | Q(sender=OuterRef('pk'), receiver=user)
+        ).order_by('-timestamp').values('pk')[:1]
+        partners = User.objects.filter(
+            Q(pk__in=ChatMessage.objects.filter(sender=user).values('receiver_id'))
+            | Q(pk__in=ChatMessage.objects.filter(receiver=user).values('sender_id'))
+        ).annotate(last_message_id=Subquery(last_message))
+        unread = unread_messages(user.id).values('sender_id').annotate(count=Count('id')).order_by()
+        return {
+            'partners': lambda: list(partners),
+            'unread': lambda: dict(unread.values_list('sender_id', 'count')),
+        }
+
+    @staticmethod
+    def last_messages(partners):
+        return ChatMessage.objects.filter(
+            pk__in=[partner.last_message_id for partner in partners if partner.last_message_id]
+        ).only('id', 'sender_id', 'message', 'message_type', 'timestamp')
+
+    def _build_conversations(self, results, messages):
+        user_id = self.request.user.pk
         conversations = []
-        for other_user_id in user_ids:
-            other_user = User.objects.get(id=other_user_id)
-            
-            # Get last message in conversation
-            last_msg = ChatMessage.objects.filter(
-                Q(sender=user, receiver=other_user) | Q(sender=other_user, receiver=user)
-            ).order_by('-timestamp').first()
-            
-            # Count unread messages from other user
-            unread_count = ChatMessage.objects.filter(
-                sender=other_user, receiver=user, is_read=False
-            ).count()
-            
+        for partner in results['partners']:
+            last = messages.get(partner.last_message_id)
             conversations.append({
-                'user': other_user,
-                'last_message': last_msg.message if last_msg else None,
-                'last_message_timestamp': last_msg.timestamp if last_msg else None,
-                'unread_count': unread_count,
-                'is_sender': last_msg.sender == user if last_msg else False
+                'user': partner,
+                'last_message': last.message if last else None,
+                'last_message_timestamp': last.timestamp if last else None,
+                'last_message_type': last.message_type if last else None,
+                'unread_count': results['unread'].get(partner.pk, 0),
+                'is_sender': last.sender_id == user_id if last else False,
+                'is_online': False,  # TODO: Implement online status
             })
-        
-        # Sort by last message timestamp
-        conversations.sort(key=lambda x: x['last_message_timestamp'] or '', reverse=True)
-        
-        # Add message type and online status
-        for conv in conversations:
-            if conv['last_message_timestamp']:
-                last_msg = ChatMessage.objects.filter(
-                    Q(sender=user, receiver=conv['user']) | Q(sender=conv['user'], receiver=user)
-                ).order_by('-timestamp').first()
-                conv['last_message_type'] = last_msg.message_type if last_msg else None
-            conv['is_online'] = False  # TODO: Implement online status
-        
-        serializer = ConversationSerializer(conversations, many=True)
-        return Response(serializer.data)
+        # Most recent conversation first
+        conversations.sort(key=lambda conversation: conversation['last_message_timestamp'] or _OLDEST, reverse=True)
+        return ConversationSerializer(conversations, many=True).data
     
     @action(detail=False, methods=['get'])
     def history(self, request):
-        """Get chat history with a specific user"""
+        """
+        Get chat history with a specific user, oldest first
+
+        ``?before=<message id>`` pages back from that message and
+        ``?limit=`` caps the page (at most HISTORY_MAX_LIMIT; without it the
+        whole live conversation is returned). Archived messages (see
+        retention.py) are only read once a page reaches past the oldest
+        live message, or when a reply chain kept live messages older than
+        the archive cutoff.
+        """
         other_user_id = request.query_params.get('user_id')
         if not other_user_id:
             return Response({'error': 'user_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            before = _optional_int(request.query_params.get('before'))
+            limit = _optional_int(request.query_params.get('limit'))
+        except ValueError:
+            return Response({'error': 'before and limit must be positive integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit is not None:
+            limit = min(limit, HISTORY_MAX_LIMIT)
         
         try:
             other_user = User.objects.get(id=other_user_id)
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
         
-        # Get messages between current user and other user
-        messages = ChatMessage.objects.filter(
+        # Get messages between current user and other user, newest first
+        between = (
             Q(sender=request.user, receiver=other_user) | 
             Q(sender=other_user, receiver=request.user)
-        ).select_related('sender', 'receiver').order_by('timestamp')
+        )
+        if before is not None:
+            between &= Q(id__lt=before)
+        messages = ChatMessage.objects.filter(between).select_related('sender', 'receiver').order_by('-id')
+        messages = list(messages[:limit] if limit else messages)
+        
+        archived = ArchivedChatMessage.objects.filter(between).select_related('sender', 'receiver').order_by('-id')
+        if before is not None and (limit is None or len(messages) < limit):
+            archived = list(archived[:limit or HISTORY_ARCHIVE_PAGE])
+        elif messages and messages[-1].timestamp < archive_cutoff():
+            archived = list(archived.filter(id__gt=messages[-1].id)[:limit or HISTORY_ARCHIVE_PAGE])
+        else:
+            archived = []
         
         # Mark messages as read
-        ChatMessage.objects.filter(
-            sender=other_user, receiver=request.user, is_read=False
-        ).update(is_read=True)
+        mark_conversation_read(request.user.id, other_user.id)
         
-        serializer = self.get_serializer(messages, many=True)
-        return Response(serializer.data)
+        context = self.get_conversation_context(request.user.id, other_user.id)
+        if not archived:
+            return Response(self.get_serializer(messages[::-1], many=True, context=context).data)
+        page = list(heapq.merge(messages, archived, key=lambda message: -message.id))[:limit][::-1]
+        live = [message for message in page if isinstance(message, ChatMessage)]
+        old = [message for message in page if isinstance(message, ArchivedChatMessage)]
+        data = {
+            **dict(zip(map(id, live), self.get_serializer(live, many=True, context=context).data)),
+            **dict(zip(map(id, old), ArchivedChatMessageSerializer(old, many=True, context=context).data)),
+        }
+        return Response([data[id(message)] for message in page])
     
     @action(detail=False, methods=['get'])
     def users(self, request):
@@ -125,9 +206,12 @@ class ChatViewSet(viewsets.ModelViewSet):
         if not other_user_id:
             return Response({'error': 'user_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        ChatMessage.objects.filter(
-            sender_id=other_user_id, receiver=request.user, is_read=False
-        ).update(is_read=True)
+        try:
+            other_user_id = int(other_user_id)
+        except (TypeError, ValueError):
+            return Response({'error': 'user_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        mark_conversation_read(request.user.id, other_user_id)
         
         return Response({'success': True})
     
@@ -173,10 +257,7 @@ class ChatViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """Get total unread message count"""
-        count = ChatMessage.objects.filter(
-            receiver=request.user, is_read=False, is_deleted=False
-        ).count()
-        return Response({'unread_count': count})
+        return Response({'unread_count': get_unread_counts(request.user.id)['messages']})
 
 
 class ChatNotificationViewSet(viewsets.ModelViewSet):
@@ -185,23 +266,20 @@ class ChatNotificationViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return ChatNotification.objects.filter(user=self.request.user).order_by('-created_at')
+        return ChatNotification.objects.filter(user=self.request.user).select_related(
+            'sender', 'related_message__sender', 'related_message__receiver'
+        ).order_by('-created_at')
     
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
-        ChatNotification.objects.filter(
-            user=request.user, is_read=False
-        ).update(is_read=True, read_at=timezone.now())
+        mark_notifications_read(ChatNotification.objects.filter(user=request.user))
         return Response({'status': 'success'})
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """Get unread notification count"""
-        count = ChatNotification.objects.filter(
-            user=request.user, is_read=False
-        ).count()
-        return Response({'unread_count': count})
+        return Response({'unread_count': get_unread_counts(request.user.id)['notifications']})
 
 
 class FileDownloadView(APIView):
@@ -210,7 +288,7 @@ class FileDownloadView(APIView):
     
     def get(self, request, message_id):
         try:
-            message = ChatMessage.objects.get(id=message_id)
+            message = ChatMessage.objects.filter(id=message_id).first() or ArchivedChatMessage.objects.get(id=message_id)
             
             # Check if user has access to this message
             if message.sender != request.user and message.receiver != request.user:
@@ -229,21 +307,24 @@ class FileDownloadView(APIView):
             else:
                 return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
                 
-        except ChatMessage.DoesNotExist:
+        except ArchivedChatMessage.DoesNotExist:
             return Response({'error': 'Message not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
 class ChatRoomViewSet(viewsets.ModelViewSet):
-    """ViewSet for group chat rooms (future implementation)"""
+    """ViewSet for group chat rooms (see rooms.py)"""
     serializer_class = ChatRoomSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return ChatRoom.objects.filter(members=self.request.user, is_active=True)
+        queryset = ChatRoom.objects.filter(members=self.request.user, is_active=True).select_related(
+            'created_by'
+        ).prefetch_related('members')
+        return rooms.with_unread(queryset, self.request.user)
     
     def perform_create(self, serializer):
         room = serializer.save(created_by=self.request.user)
-        room.members.add(self.request.user)
+        rooms.add_member(room, self.request.user)
     
     @action(detail=True, methods=['post'])
     def add_member(self, request, pk=None):
@@ -260,7 +341,7 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         
         try:
             user = User.objects.get(id=user_id)
-            room.members.add(user)
+            rooms.add_member(room, user)
             return Response({'status': 'success'})
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -280,7 +361,42 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         
         try:
             user = User.objects.get(id=user_id)
-            room.members.remove(user)
+            rooms.remove_member(room, user)
             return Response({'status': 'success'})
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    @action(detail=True, methods=['get', 'post'])
+    def messages(self, request, pk=None):
+        """
+        GET: room messages newest first, cursor-paginated (?cursor=, ?page_size=)
+        POST: post a message (or file) to every member
+        """
+        room = self.get_object()
+        
+        if request.method == 'POST':
+            serializer = RoomMessageSerializer(data=request.data, context=self.get_serializer_context())
+            serializer.is_valid(raise_exception=True)
+            message = rooms.post_room_message(room, request.user, **serializer.validated_data)
+            return Response(RoomMessageSerializer(message, context=self.get_serializer_context()).data, status=status.HTTP_201_CREATED)
+        
+        paginator = MessageCursorPagination()
+        page = paginator.paginate_queryset(room.messages.select_related('sender'), request)
+        serializer = RoomMessageSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        """Mark the room read up to message_id (default: the latest message)"""
+        room = self.get_object()
+        message_id = request.data.get('message_id')
+        try:
+            message_id = int(message_id) if message_id is not None else None
+        except (TypeError, ValueError):
+            return Response({'error': 'message_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        rooms.mark_room_read(room.id, request.user.id, message_id)
+        last_read = ChatRoomMember.objects.filter(room=room, user=request.user).values_list(
+            'last_read_message_id', flat=True
+        ).first()
+        return Response({'last_read_message_id': last_read or 0})
@@ -1,18 +1,24 @@
 from rest_framework import serializers
+from spa_central.serializers import SparseFieldsetMixin
 from .models import DocumentType, Document, OwnerDocument, SpaManagerDocument
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
-class DocumentTypeSerializer(serializers.ModelSerializer):
+class DocumentTypeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     document_count = serializers.SerializerMethodField()
     
     class Meta:
         model = DocumentType
         fields = ['id', 'name', 'description', 'is_active', 'document_count', 'created_at', 'updated_at']
+        sparse_sources = {
+            'document_count': [],
+        }
     
     def get_document_count(self, obj):
+        if hasattr(obj, 'document_count'):
+            return obj.document_count
         return obj.documents.count()
 
 
@@ -27,7 +33,7 @@ class UserBasicSerializer(serializers.ModelSerializer):
         return f"{obj.first_name} {obj.last_name}".strip() or obj.email
 
 
-class DocumentListSerializer(serializers.ModelSerializer):
+class DocumentListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     doc_type_name = serializers.CharField(source='doc_type.name', read_only=True)
     uploaded_by_name = serializers.SerializerMethodField()
     file_size = serializers.SerializerMethodField()
@@ -42,6 +48,11 @@ class DocumentListSerializer(serializers.ModelSerializer):
             'file', 'file_size', 'file_extension',
             'created_at', 'updated_at'
         ]
+        sparse_sources = {
+            'uploaded_by_name': ['uploaded_by__first_name', 'uploaded_by__last_name', 'uploaded_by__email'],
+            'file_size': ['file'],
+            'file_extension': ['file'],
+        }
     
     def get_uploaded_by_name(self, obj):
         if obj.uploaded_by:
@@ -69,7 +80,7 @@ class DocumentListSerializer(serializers.ModelSerializer):
         return "N/A"
 
 
-class DocumentDetailSerializer(serializers.ModelSerializer):
+class DocumentDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     uploaded_by = UserBasicSerializer(read_only=True)
     doc_type = DocumentTypeSerializer(read_only=True)
     file_size = serializers.SerializerMethodField()
@@ -82,6 +93,10 @@ class DocumentDetailSerializer(serializers.ModelSerializer):
             'file', 'file_size', 'file_extension',
             'notes', 'created_at', 'updated_at'
         ]
+        sparse_sources = {
+            'file_size': ['file'],
+            'file_extension': ['file'],
+        }
     
     def get_file_size(self, obj):
         if obj.file:
@@ -132,7 +147,7 @@ class DocumentCreateUpdateSerializer(serializers.ModelSerializer):
 
 # OwnerDocument Serializers
 
-class OwnerDocumentListSerializer(serializers.ModelSerializer):
+class OwnerDocumentListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     uploaded_by_name = serializers.SerializerMethodField()
     file_size = serializers.SerializerMethodField()
     file_extension = serializers.SerializerMethodField()
@@ -147,6 +162,11 @@ class OwnerDocumentListSerializer(serializers.ModelSerializer):
             'file_size', 'file_extension',
             'created_at', 'updated_at'
         ]
+        sparse_sources = {
+            'uploaded_by_name': ['uploaded_by__first_name', 'uploaded_by__last_name', 'uploaded_by__email'],
+            'file_size': ['file'],
+            'file_extension': ['file'],
+        }
     
     def get_uploaded_by_name(self, obj):
         if obj.uploaded_by:
@@ -173,7 +193,7 @@ class OwnerDocumentListSerializer(serializers.ModelSerializer):
         return "N/A"
 
 
-class OwnerDocumentDetailSerializer(serializers.ModelSerializer):
+class OwnerDocumentDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     uploaded_by = UserBasicSerializer(read_only=True)
     file_size = serializers.SerializerMethodField()
     file_extension = serializers.SerializerMethodField()
@@ -187,6 +207,10 @@ class OwnerDocumentDetailSerializer(serializers.ModelSerializer):
             'uploaded_by', 'file_size', 'file_extension',
             'created_at', 'updated_at'
         ]
+        sparse_sources = {
+            'file_size': ['file'],
+            'file_extension': ['file'],
+        }
     
     def get_file_size(self, obj):
         if obj.file:
@@ -243,7 +267,7 @@ class OwnerDocumentCreateUpdateSerializer(serializers.ModelSerializer):
 
 # SpaManagerDocument Serializers
 
-class SpaManagerDocumentListSerializer(serializers.ModelSerializer):
+class SpaManagerDocumentListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     uploaded_by_name = serializers.SerializerMethodField()
     file_size = serializers.SerializerMethodField()
     file_extension = serializers.SerializerMethodField()
@@ -260,6 +284,11 @@ class SpaManagerDocumentListSerializer(serializers.ModelSerializer):
             'file_size', 'file_extension',
             'created_at', 'updated_at'
         ]
+        sparse_sources = {
+            'uploaded_by_name': ['uploaded_by__first_name', 'uploaded_by__last_name', 'uploaded_by__email'],
+            'file_size': ['file'],
+            'file_extension': ['file'],
+        }
     
     def get_uploaded_by_name(self, obj):
         if obj.uploaded_by:
@@ -286,7 +315,7 @@ class SpaManagerDocumentListSerializer(serializers.ModelSerializer):
         return "N/A"
 
 
-class SpaManagerDocumentDetailSerializer(serializers.ModelSerializer):
+class SpaManagerDocumentDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     uploaded_by = UserBasicSerializer(read_only=True)
     file_size = serializers.SerializerMethodField()
     file_extension = serializers.SerializerMethodField()
@@ -302,6 +331,10 @@ class SpaManagerDocumentDetailSerializer(serializers.ModelSerializer):
             'uploaded_by', 'file_size', 'file_extension',
             'created_at', 'updated_at'
         ]
+        sparse_sources = {
+            'file_size': ['file'],
+            'file_extension': ['file'],
+        }
     
     def get_file_size(self, obj):
         if obj.file:
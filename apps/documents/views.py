@@ -2,9 +2,10 @@ from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Q
+from django.db.models import Count, Prefetch, Q
 from django.http import FileResponse
 from apps.users.permissions import IsAdminUser
+from spa_central.mixins import ConditionalGetMixin, SparseQuerysetMixin
 from .models import DocumentType, Document, OwnerDocument, SpaManagerDocument
 from .serializers import (
     DocumentTypeSerializer, 
@@ -21,11 +22,12 @@ from .serializers import (
 from .filters import DocumentFilter, OwnerDocumentFilter, SpaManagerDocumentFilter
 
 
-class DocumentTypeViewSet(viewsets.ReadOnlyModelViewSet):
+class DocumentTypeViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only viewset for document types - only admin can create/edit/delete via Django admin
     """
-    queryset = DocumentType.objects.filter(is_active=True)  # Only show active types
+    etag_related = ('documents',)
+    queryset = DocumentType.objects.filter(is_active=True).annotate(document_count=Count('documents'))  # Only show active types
     serializer_class = DocumentTypeSerializer
     permission_classes = [IsAdminUser]  # Only admin can access
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -33,7 +35,10 @@ class DocumentTypeViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['name']
 
 
-class DocumentViewSet(viewsets.ModelViewSet):
+class DocumentViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
+    etag_related = ('doc_type', 'uploaded_by')
+    # DocumentDetailSerializer nests the type with its document_count
+    etag_detail_related = ('doc_type__documents',)
     queryset = Document.objects.select_related('doc_type', 'uploaded_by', 'spa').all()
     # Only admin can access documents
     permission_classes = [IsAdminUser]
@@ -50,6 +55,16 @@ class DocumentViewSet(viewsets.ModelViewSet):
             return DocumentCreateUpdateSerializer
         return DocumentDetailSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('retrieve', 'by_type', 'by_user'):
+            return queryset
+        # DocumentDetailSerializer's nested type renders its document_count:
+        # count once per type, not once per document
+        return queryset.select_related(None).select_related('uploaded_by', 'spa').prefetch_related(
+            Prefetch('doc_type', queryset=DocumentType.objects.annotate(document_count=Count('documents')))
+        )
+
     def perform_create(self, serializer):
         uploader = self.request.user if getattr(self.request, 'user', None) and self.request.user.is_authenticated else None
         serializer.save(uploaded_by=uploader)
@@ -101,7 +116,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
         if not doc_type_id:
             return Response({'error': 'doc_type parameter required'}, status=400)
         
-        docs = self.queryset.filter(doc_type_id=doc_type_id)
+        docs = self.get_queryset().filter(doc_type_id=doc_type_id)
         serializer = self.get_serializer(docs, many=True)
         return Response(serializer.data)
     
@@ -112,16 +127,17 @@ class DocumentViewSet(viewsets.ModelViewSet):
         if not user_id:
             return Response({'error': 'user parameter required'}, status=400)
         
-        docs = self.queryset.filter(user_id=user_id)
+        docs = self.get_queryset().filter(user_id=user_id)
         serializer = self.get_serializer(docs, many=True)
         return Response(serializer.data)
 
 
-class OwnerDocumentViewSet(viewsets.ModelViewSet):
+class OwnerDocumentViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     """
     API endpoint for Owner Documents
     Allows uploading and managing documents for spa owners
     """
+    etag_related = ('uploaded_by',)
     queryset = OwnerDocument.objects.select_related(
         'primary_owner', 'secondary_owner', 'third_owner', 'fourth_owner', 'uploaded_by'
     ).all()
@@ -239,11 +255,12 @@ class OwnerDocumentViewSet(viewsets.ModelViewSet):
         })
 
 
-class SpaManagerDocumentViewSet(viewsets.ModelViewSet):
+class SpaManagerDocumentViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     """
     API endpoint for Spa Manager Documents
     Allows uploading and managing documents for spa managers
     """
+    etag_related = ('spa_manager', 'spa_manager__spa', 'uploaded_by')
     queryset = SpaManagerDocument.objects.select_related(
         'spa_manager', 'spa_manager__spa', 'uploaded_by'
     ).all()
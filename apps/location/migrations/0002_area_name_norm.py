@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:08
+
+from django.db import migrations, models
+from spa_central.models import normalize
+
+
+NORMALIZED = {
+    'Area': {'name_norm': 'name'},
+}
+
+
+def fill_normalized(apps, schema_editor):
+    for model_name, fields in NORMALIZED.items():
+        model = apps.get_model('location', model_name)
+        rows = list(model.objects.only(*fields.values()))
+        for row in rows:
+            for target, source in fields.items():
+                setattr(row, target, normalize(getattr(row, source)))
+        model.objects.bulk_update(rows, list(fields), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='area',
+            name='name_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='area',
+            index=models.Index(fields=['name_norm'], name='idx_area_name_norm', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(fill_normalized, migrations.RunPython.noop),
+    ]
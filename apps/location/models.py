@@ -1,4 +1,5 @@
 from django.db import models
+from spa_central.models import NormalizedFieldsModel
 
 
 class State(models.Model):
@@ -36,17 +37,21 @@ class City(models.Model):
         return f"{self.name}, {self.state.name}"
 
 
-class Area(models.Model):
+class Area(NormalizedFieldsModel):
     name = models.CharField(max_length=100)
+    name_norm = models.CharField(max_length=100, blank=True, default='', editable=False)
     city = models.ForeignKey(City, related_name='areas', on_delete=models.PROTECT)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    normalized_fields = {'name_norm': 'name'}
+
     class Meta:
         db_table = 'areas'
         unique_together = ('name', 'city')
         indexes = [
             models.Index(fields=['name', 'city'], name='idx_area_name_city'),
+            models.Index(fields=['name_norm'], name='idx_area_name_norm', opclasses=['varchar_pattern_ops']),
         ]
         ordering = ['name']
         verbose_name = 'Area'
@@ -1,40 +1,51 @@
 from rest_framework import serializers
+from spa_central.serializers import SparseFieldsetMixin
 from django.db import models
 from .models import State, City, Area
 
 
-class StateSerializer(serializers.ModelSerializer):
+class StateSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     spa_count = serializers.SerializerMethodField()
     
     class Meta:
         model = State
         fields = ['id', 'name', 'spa_count', 'created_at', 'updated_at']
+        sparse_sources = {
+            'spa_count': [],
+        }
         read_only_fields = ['id', 'spa_count', 'created_at', 'updated_at']
     
     def get_spa_count(self, obj):
         """Count spas in this state through cities and areas"""
+        if hasattr(obj, 'spa_count'):
+            return obj.spa_count
         return obj.cities.aggregate(
             total_spas=models.Count('areas__spas', distinct=True)
         )['total_spas'] or 0
 
 
-class CitySerializer(serializers.ModelSerializer):
+class CitySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     state_name = serializers.CharField(source='state.name', read_only=True)
     spa_count = serializers.SerializerMethodField()
     
     class Meta:
         model = City
         fields = ['id', 'name', 'state', 'state_name', 'spa_count', 'created_at', 'updated_at']
+        sparse_sources = {
+            'spa_count': [],
+        }
         read_only_fields = ['id', 'spa_count', 'created_at', 'updated_at']
     
     def get_spa_count(self, obj):
         """Count spas in this city through areas"""
+        if hasattr(obj, 'spa_count'):
+            return obj.spa_count
         return obj.areas.aggregate(
             total_spas=models.Count('spas', distinct=True)
         )['total_spas'] or 0
 
 
-class AreaSerializer(serializers.ModelSerializer):
+class AreaSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     city_name = serializers.CharField(source='city.name', read_only=True)
     state_name = serializers.CharField(source='city.state.name', read_only=True)
     spa_count = serializers.SerializerMethodField()
@@ -42,9 +53,14 @@ class AreaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Area
         fields = ['id', 'name', 'city', 'city_name', 'state_name', 'spa_count', 'created_at', 'updated_at']
+        sparse_sources = {
+            'spa_count': [],
+        }
         read_only_fields = ['id', 'spa_count', 'created_at', 'updated_at']
     
     def get_spa_count(self, obj):
         """Count spas in this area"""
+        if hasattr(obj, 'spa_count'):
+            return obj.spa_count
         return obj.spas.count()
 
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from spa_central.autocomplete import invalidate_autocomplete
+from .models import State, City, Area
+from .utils import invalidate_location_tree
+
+
+@receiver([post_save, post_delete], sender=State)
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=Area)
+@receiver([post_save, post_delete], sender='spas.Spa')
+def location_tree_changed(sender, **kwargs):
+    """Invalidate the cached tree whenever a location or spa changes"""
+    invalidate_location_tree()
+
+
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=Area)
+def area_picker_changed(sender, **kwargs):
+    """Area suggestions are labelled with the city name"""
+    invalidate_autocomplete('areas')
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import StateViewSet, CityViewSet, AreaViewSet
+from .views import StateViewSet, CityViewSet, AreaViewSet, LocationTreeView, AreaAutocompleteView
 
 router = DefaultRouter()
 router.register(r'states', StateViewSet, basename='state')
@@ -8,6 +8,8 @@ router.register(r'cities', CityViewSet, basename='city')
 router.register(r'areas', AreaViewSet, basename='area')
 
 urlpatterns = [
+    path('locations/tree/', LocationTreeView.as_view(), name='location-tree'),
+    path('autocomplete/areas/', AreaAutocompleteView.as_view(), name='area-autocomplete'),
     path('', include(router.urls)),
 ]
 
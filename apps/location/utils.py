@@ -0,0 +1,55 @@
+"""
+Utility functions for the location hierarchy
+"""
+
+from django.core.cache import cache
+from django.db.models import Count
+from .models import State, City, Area
+
+LOCATION_TREE_CACHE_KEY = 'location:tree'
+LOCATION_TREE_CACHE_TIMEOUT = 60 * 60 * 24  # Invalidated by signals, TTL is only a safety net
+
+
+def build_location_tree():
+    """
+    Build the nested State -> City -> Area hierarchy with spa counts
+
+    Runs three queries (states, cities, areas grouped by spa count) and
+    rolls the area counts up in memory. Every spa has a single area, so
+    the summed city/state counts are exact.
+
+    Returns:
+        List of state dicts, each with nested ``cities`` and ``areas``
+    """
+    states = {}
+    for state_id, name in State.objects.values_list('id', 'name'):
+        states[state_id] = {'id': state_id, 'name': name, 'spa_count': 0, 'cities': []}
+
+    cities = {}
+    for city_id, name, state_id in City.objects.values_list('id', 'name', 'state_id'):
+        city = {'id': city_id, 'name': name, 'spa_count': 0, 'areas': []}
+        cities[city_id] = (city, states[state_id])
+        states[state_id]['cities'].append(city)
+
+    areas = Area.objects.annotate(spa_count=Count('spas')).values_list('id', 'name', 'city_id', 'spa_count')
+    for area_id, name, city_id, spa_count in areas:
+        city, state = cities[city_id]
+        city['areas'].append({'id': area_id, 'name': name, 'spa_count': spa_count})
+        city['spa_count'] += spa_count
+        state['spa_count'] += spa_count
+
+    return list(states.values())
+
+
+def get_location_tree():
+    """Return the cached location tree, building it on a cache miss"""
+    tree = cache.get(LOCATION_TREE_CACHE_KEY)
+    if tree is None:
+        tree = build_location_tree()
+        cache.set(LOCATION_TREE_CACHE_KEY, tree, LOCATION_TREE_CACHE_TIMEOUT)
+    return tree
+
+
+def invalidate_location_tree():
+    """Drop the cached location tree so the next request rebuilds it"""
+    cache.delete(LOCATION_TREE_CACHE_KEY)
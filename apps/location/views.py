@@ -1,18 +1,23 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Count
 from apps.users.permissions import IsAdminUser
+from spa_central.autocomplete import AutocompleteView
+from spa_central.mixins import ConditionalGetMixin, SparseQuerysetMixin
 from .models import State, City, Area
 from .serializers import StateSerializer, CitySerializer, AreaSerializer
+from .utils import get_location_tree
 
 
-class StateViewSet(viewsets.ModelViewSet):
+class StateViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing States
     """
-    queryset = State.objects.all()
+    etag_related = ('cities__areas__spas',)
+    queryset = State.objects.annotate(spa_count=Count('cities__areas__spas', distinct=True))
     serializer_class = StateSerializer
     permission_classes = [IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -49,9 +54,13 @@ class StateViewSet(viewsets.ModelViewSet):
         ).select_related('city', 'city__state').order_by('-spa_count')[:5]
         
         # Recent additions
-        recent_states = State.objects.order_by('-created_at')[:5]
-        recent_cities = City.objects.select_related('state').order_by('-created_at')[:5]
-        recent_areas = Area.objects.select_related('city', 'city__state').order_by('-created_at')[:5]
+        recent_states = self.get_queryset().order_by('-created_at')[:5]
+        recent_cities = City.objects.select_related('state').annotate(
+            spa_count=Count('areas__spas', distinct=True)
+        ).order_by('-created_at')[:5]
+        recent_areas = Area.objects.select_related('city', 'city__state').annotate(
+            spa_count=Count('spas')
+        ).order_by('-created_at')[:5]
         
         return Response({
             'totals': {
@@ -97,11 +106,12 @@ class StateViewSet(viewsets.ModelViewSet):
         })
 
 
-class CityViewSet(viewsets.ModelViewSet):
+class CityViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Cities
     """
-    queryset = City.objects.select_related('state').all()
+    etag_related = ('state', 'areas__spas')
+    queryset = City.objects.select_related('state').annotate(spa_count=Count('areas__spas', distinct=True))
     serializer_class = CitySerializer
     permission_classes = [IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -111,11 +121,12 @@ class CityViewSet(viewsets.ModelViewSet):
     ordering = ['state', 'name']
 
 
-class AreaViewSet(viewsets.ModelViewSet):
+class AreaViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Areas
     """
-    queryset = Area.objects.select_related('city', 'city__state').all()
+    etag_related = ('city', 'city__state', 'spas')
+    queryset = Area.objects.select_related('city', 'city__state').annotate(spa_count=Count('spas'))
     serializer_class = AreaSerializer
     permission_classes = [IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -123,3 +134,22 @@ class AreaViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'city__name', 'city__state__name']
     ordering_fields = ['name', 'created_at']
     ordering = ['city', 'name']
+
+
+class LocationTreeView(APIView):
+    """
+    Nested State -> City -> Area hierarchy with spa counts for location pickers
+    Built in three queries and cached until a location or spa changes
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_location_tree())
+
+
+class AreaAutocompleteView(AutocompleteView):
+    """Area picker: ``q`` matches the start of the area name, labelled with its city"""
+    name = 'areas'
+    model = Area
+    search_fields = ('name_norm',)
+    label_fields = ('name', 'city__name')
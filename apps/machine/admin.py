@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Machine, AccountHolder
+from .health import refresh_machine_health
+from .models import Machine, AccountHolder, MachineHealth
+from .utils import invalidate_machine_statistics
 
 
 @admin.register(AccountHolder)
@@ -81,15 +83,34 @@ class MachineAdmin(admin.ModelAdmin):
     
     def mark_in_use(self, request, queryset):
         updated = queryset.update(status='in_use')
+        # update() bypasses post_save
+        refresh_machine_health(queryset)
+        invalidate_machine_statistics()
         self.message_user(request, f'{updated} machine(s) marked as In Use.')
     mark_in_use.short_description = 'Mark selected machines as In Use'
     
     def mark_not_in_use(self, request, queryset):
         updated = queryset.update(status='not_in_use')
+        # update() bypasses post_save
+        refresh_machine_health(queryset)
+        invalidate_machine_statistics()
         self.message_user(request, f'{updated} machine(s) marked as Not In Use.')
     mark_not_in_use.short_description = 'Mark selected machines as Not In Use'
     
     def mark_broken(self, request, queryset):
         updated = queryset.update(status='broken')
+        # update() bypasses post_save
+        refresh_machine_health(queryset)
+        invalidate_machine_statistics()
         self.message_user(request, f'{updated} machine(s) marked as Broken.')
-    mark_broken.short_description = 'Mark selected machines as Broken'
\ No newline at end of file
+    mark_broken.short_description = 'Mark selected machines as Broken'
+
+
+@admin.register(MachineHealth)
+class MachineHealthAdmin(admin.ModelAdmin):
+    list_display = ['machine', 'needs_service', 'issue_count', 'issues', 'evaluated_at']
+    list_filter = ['needs_service', 'evaluated_at']
+    search_fields = ['machine__serial_number', 'machine__machine_code', 'machine__spa__spa_name']
+    raw_id_fields = ['machine']
+    readonly_fields = ['machine', 'needs_service', 'issues', 'issue_count', 'evaluated_at']
+    ordering = ['-issue_count']
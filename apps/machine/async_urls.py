@@ -0,0 +1,7 @@
+from django.urls import path
+from .async_views import MachineListView
+
+# Same path and name as the router's route in urls.py
+urlpatterns = [
+    path('machines/', MachineListView.as_view(), name='machine-list'),
+]
@@ -0,0 +1,7 @@
+"""ASGI-native reads for the machine dashboard (see spa_central/async_views.py)"""
+from spa_central.async_views import ViewSetListView
+from .views import MachineViewSet
+
+
+class MachineListView(ViewSetListView):
+    viewset_class = MachineViewSet
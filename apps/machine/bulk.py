@@ -0,0 +1,267 @@
+"""
+Set-based bulk operations for machines
+
+Rows are validated field-by-field in Python, then serial uniqueness and
+spa/account-holder presence are checked with one ``IN`` query per kind
+instead of one query per row. Changes are applied with
+bulk_create/bulk_update/update() inside a single transaction, and health,
+the search index and statistics caches are refreshed once for the whole
+batch since these paths skip post_save.
+"""
+
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from apps.audit.models import ChangeLogEntry
+from apps.audit.recorder import log_many, log_queryset_update
+from apps.spas.models import Spa
+from spa_central.bulk import BulkConflict, BulkResult
+from .health import refresh_machine_health, RULE_FIELDS
+from .models import Machine, AccountHolder
+from .search import index_machines
+from .serializers import MachineBulkRowSerializer
+from .utils import invalidate_machine_statistics
+
+BULK_MAX_ROWS = 5000
+BULK_BATCH_SIZE = 500
+
+
+def _validate_rows(rows, result, partial):
+    serializer = MachineBulkRowSerializer(partial=partial)
+    validated = [None] * len(rows)
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            result.add_error(index, 'non_field_errors', 'Each row must be an object.')
+            continue
+        try:
+            validated[index] = serializer.run_validation(row)
+        except serializers.ValidationError as exc:
+            result.merge_errors(index, exc.detail)
+    return validated
+
+
+def _check_relations(validated, result):
+    """Check spa/account holder references with one query each"""
+    spa_ids = {data['spa'] for data in validated if data and data.get('spa')}
+    holder_ids = {data['acc_holder'] for data in validated if data and data.get('acc_holder')}
+
+    spas = {
+        spa_id: (area_id, spa_name)
+        for spa_id, area_id, spa_name in Spa.objects.filter(id__in=spa_ids).values_list('id', 'area_id', 'spa_name')
+    }
+    holders = set(AccountHolder.objects.filter(id__in=holder_ids).values_list('id', flat=True))
+
+    for index, data in enumerate(validated):
+        if not data:
+            continue
+        spa_id = data.get('spa')
+        if spa_id:
+            if spa_id not in spas:
+                result.add_error(index, 'spa', f'Spa {spa_id} does not exist.')
+            elif spas[spa_id][0] is None:
+                result.add_error(
+                    index, 'spa',
+                    f"The selected spa '{spas[spa_id][1]}' does not have a location (area) assigned. "
+                    "Please assign a location to the spa first."
+                )
+        holder_id = data.get('acc_holder')
+        if holder_id and holder_id not in holders:
+            result.add_error(index, 'acc_holder', f'Account holder {holder_id} does not exist.')
+
+
+def _check_serials(validated, result, row_ids=None):
+    """Check serial numbers against the payload and the table with one query"""
+    row_ids = row_ids or [None] * len(validated)
+    new_serials = {}
+    for index, data in enumerate(validated):
+        if data and data.get('serial_number'):
+            new_serials[index] = data['serial_number']
+    if not new_serials:
+        return
+
+    # Machines in this batch that give up their current serial
+    releasing = {row_ids[index] for index in new_serials if row_ids[index]}
+    existing = dict(
+        Machine.objects.filter(serial_number__in=set(new_serials.values())).values_list('serial_number', 'id')
+    )
+
+    seen = {}
+    for index, serial in new_serials.items():
+        if serial in seen:
+            result.add_error(index, 'serial_number', f'Duplicate serial number in request (row {seen[serial]}).')
+            continue
+        seen[serial] = index
+        owner_id = existing.get(serial)
+        if owner_id and owner_id != row_ids[index] and owner_id not in releasing:
+            result.add_error(index, 'serial_number', 'Machine with this serial number already exists.')
+
+
+def _last_insert_id():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT LAST_INSERT_ID()')
+        return cursor.fetchone()[0]
+
+
+def _insert_batch_without_returning(batch):
+    """
+    One multi-row INSERT on backends that do not return ids (MySQL)
+
+    InnoDB usually hands a multi-row INSERT a consecutive auto-increment
+    range starting at LAST_INSERT_ID(); the range is read back and matched
+    on created_at to confirm it. With innodb_autoinc_lock_mode=2 a
+    concurrent insert can interleave, in which case the rows are found
+    again by their serial numbers, or the whole request is rolled back as
+    a conflict when some rows have none.
+    """
+    Machine.objects.bulk_create(batch, batch_size=len(batch))
+    first_id = _last_insert_id()
+    ids = range(first_id, first_id + len(batch))
+    stored = dict(Machine.objects.filter(id__in=ids).values_list('id', 'created_at'))
+    if [stored.get(machine_id) for machine_id in ids] == [machine.created_at for machine in batch]:
+        for machine_id, machine in zip(ids, batch):
+            machine.pk = machine_id
+        return
+
+    serials = [machine.serial_number for machine in batch]
+    if all(serials):
+        found = Machine.objects.filter(serial_number__in=serials, id__gte=first_id).values_list('serial_number', 'id')
+        by_serial = dict(found)
+        if len(by_serial) == len(found) == len(batch):
+            for machine in batch:
+                machine.pk = by_serial[machine.serial_number]
+            return
+    raise BulkConflict('Another import was writing machines at the same time; nothing was saved, please retry.')
+
+
+def _insert(machines):
+    if connection.features.can_return_rows_from_bulk_insert:
+        Machine.objects.bulk_create(machines, batch_size=BULK_BATCH_SIZE)
+    else:
+        for start in range(0, len(machines), BULK_BATCH_SIZE):
+            _insert_batch_without_returning(machines[start:start + BULK_BATCH_SIZE])
+    log_many(machines, ChangeLogEntry.ACTION_CREATE)
+
+
+def _after_write(machines):
+    refresh_machine_health(machines)
+    index_machines(Machine.objects.filter(id__in=[machine.id for machine in machines]))
+    invalidate_machine_statistics()
+
+
+def bulk_create_machines(rows, user=None, allow_partial=False):
+    """
+    Validate and create machines
+
+    Returns:
+        (response body, has_errors)
+    """
+    result = BulkResult(len(rows))
+    validated = _validate_rows(rows, result, partial=False)
+    _check_relations(validated, result)
+    _check_serials(validated, result)
+
+    if result.error_count and not allow_partial:
+        return result.finish('not_applied'), True
+
+    machines = []
+    indexes = []
+    for index, data in enumerate(validated):
+        if not result.is_valid(index):
+            continue
+        data.pop('id', None)
+        data['spa_id'] = data.pop('spa', None)
+        data['acc_holder_id'] = data.pop('acc_holder', None)
+        machines.append(Machine(created_by=user, **data))
+        indexes.append(index)
+
+    with transaction.atomic():
+        _insert(machines)
+        _after_write(machines)
+
+    for index, machine in zip(indexes, machines):
+        result.rows[index]['id'] = machine.id
+    return result.finish('created'), bool(result.error_count)
+
+
+def bulk_update_machines(rows, allow_partial=False):
+    """
+    Validate and apply partial updates; every row must carry an ``id``
+
+    Returns:
+        (response body, has_errors)
+    """
+    result = BulkResult(len(rows))
+    validated = _validate_rows(rows, result, partial=True)
+
+    row_ids = [None] * len(rows)
+    for index, data in enumerate(validated):
+        if data is None:
+            continue
+        if not data.get('id'):
+            result.add_error(index, 'id', 'This field is required.')
+        else:
+            row_ids[index] = data['id']
+            result.rows[index]['id'] = data['id']
+
+    existing = Machine.objects.in_bulk({row_id for row_id in row_ids if row_id})
+    seen = set()
+    for index, row_id in enumerate(row_ids):
+        if not row_id:
+            continue
+        if row_id not in existing:
+            result.add_error(index, 'id', f'Machine {row_id} does not exist.')
+        elif row_id in seen:
+            result.add_error(index, 'id', 'Machine appears more than once in request.')
+        seen.add(row_id)
+
+    _check_relations(validated, result)
+    _check_serials(validated, result, row_ids)
+
+    if result.error_count and not allow_partial:
+        return result.finish('not_applied'), True
+
+    now = timezone.now()
+    fields = {'updated_at'}
+    machines = []
+    for index, data in enumerate(validated):
+        if not result.is_valid(index):
+            continue
+        machine = existing[data.pop('id')]
+        for field, value in data.items():
+            attname = f'{field}_id' if field in ('spa', 'acc_holder') else field
+            setattr(machine, attname, value)
+            fields.add(attname)
+        machine.updated_at = now
+        machines.append(machine)
+
+    with transaction.atomic():
+        Machine.objects.bulk_update(machines, sorted(fields), batch_size=BULK_BATCH_SIZE)
+        log_many(machines, ChangeLogEntry.ACTION_UPDATE)
+        _after_write(machines)
+
+    return result.finish('updated'), bool(result.error_count)
+
+
+def bulk_set_machines(ids, **values):
+    """
+    Apply the same field values to many machines with one UPDATE
+
+    Returns:
+        Response body with per-id results
+    """
+    ids = list(dict.fromkeys(ids))
+    found = set(Machine.objects.filter(id__in=ids).values_list('id', flat=True))
+
+    with transaction.atomic():
+        log_queryset_update(Machine, Machine.objects.filter(id__in=found).values('id', *values), values)
+        Machine.objects.filter(id__in=found).update(updated_at=timezone.now(), **values)
+        _after_write(Machine.objects.filter(id__in=found).only(*RULE_FIELDS))
+
+    results = [
+        {'id': machine_id, 'status': 'updated' if machine_id in found else 'not_found'}
+        for machine_id in ids
+    ]
+    return {
+        'summary': {'updated': len(found), 'not_found': len(ids) - len(found)},
+        'results': results,
+    }
@@ -1,5 +1,17 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
 from .models import Machine, AccountHolder
+from .search import exact_lookup, search_machines
+
+
+class MachineSearchFilter(SearchFilter):
+    """``?search=`` backed by the machine search index instead of OR-ed icontains"""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return search_machines(queryset, terms)
 
 
 class MachineFilter(filters.FilterSet):
@@ -24,6 +36,11 @@ class MachineFilter(filters.FilterSet):
     tid = filters.CharFilter(field_name='tid', lookup_expr='icontains')
     bank_name = filters.CharFilter(field_name='bank_name', lookup_expr='icontains')
     account_name = filters.CharFilter(field_name='account_name', lookup_expr='icontains')
+
+    # Exact identifier filters (normalized, indexed)
+    mid_exact = filters.CharFilter(method='filter_exact')
+    tid_exact = filters.CharFilter(method='filter_exact')
+    serial_exact = filters.CharFilter(method='filter_exact')
     
     # Account holder filters
     acc_holder = filters.NumberFilter(field_name='acc_holder__id')
@@ -36,6 +53,11 @@ class MachineFilter(filters.FilterSet):
             'serial', 'machine_code', 'machine_name', 'model',
             'state', 'city', 'area', 'spa', 'spa_landmark', 'status',
             'mid', 'tid', 'bank_name', 'account_name',
-            'acc_holder', 'acc_holder_name', 'acc_holder_designation'
+            'acc_holder', 'acc_holder_name', 'acc_holder_designation',
+            'mid_exact', 'tid_exact', 'serial_exact'
         ]
 
+    def filter_exact(self, queryset, name, value):
+        """Exact MID/TID/serial match ignoring case, spaces and dashes"""
+        return exact_lookup(queryset, **{name.replace('_exact', ''): value})
+
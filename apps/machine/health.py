@@ -0,0 +1,155 @@
+"""
+Rule-based service-health engine for machines
+
+Each rule is a predicate over a Machine; a machine that fails any enabled
+rule needs service. Results are materialized into MachineHealth so the
+needs_service endpoint and count are indexed reads. Rows are refreshed on
+Machine save (signals) and by the ``refresh_machine_health`` batch job,
+which also catches time-based rules such as stale records.
+"""
+
+import re
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .models import Machine, MachineHealth
+
+RULES = {}
+
+# Fields the rules read; the batch job loads only these
+RULE_FIELDS = [
+    'id', 'status', 'mid', 'tid', 'account_name', 'bank_name',
+    'acc_holder', 'updated_at', 'firmware_version',
+]
+
+
+def rule(code, label):
+    """Register a health rule under ``code``"""
+    def decorator(func):
+        RULES[code] = {'label': label, 'check': func}
+        return func
+    return decorator
+
+
+def _blank(value):
+    return value is None or not str(value).strip()
+
+
+def _version_tuple(version):
+    return tuple(int(part) for part in re.findall(r'\d+', version or ''))
+
+
+@rule('broken', 'Machine is marked as broken')
+def _is_broken(machine, options):
+    return machine.status == 'broken'
+
+
+@rule('missing_mid_tid', 'Merchant ID or Terminal ID is missing')
+def _is_missing_mid_tid(machine, options):
+    return _blank(machine.mid) or _blank(machine.tid)
+
+
+@rule('missing_bank_info', 'Bank name or account name is missing')
+def _is_missing_bank_info(machine, options):
+    return _blank(machine.bank_name) or _blank(machine.account_name)
+
+
+@rule('no_account_holder', 'No account holder assigned')
+def _has_no_account_holder(machine, options):
+    return machine.acc_holder_id is None
+
+
+@rule('stale_record', 'Record not updated recently')
+def _is_stale(machine, options):
+    stale_after = options['STALE_AFTER_DAYS']
+    if not stale_after or machine.updated_at is None:
+        return False
+    return machine.updated_at < options['now'] - timedelta(days=stale_after)
+
+
+@rule('outdated_firmware', 'Firmware is below the minimum supported version')
+def _has_outdated_firmware(machine, options):
+    minimum = _version_tuple(options['MIN_FIRMWARE_VERSION'])
+    current = _version_tuple(machine.firmware_version)
+    # Unknown firmware is not treated as outdated
+    return bool(minimum and current) and current < minimum
+
+
+def get_options():
+    """Return the configured rule options with the evaluation timestamp"""
+    options = {
+        'RULES': [code for code in RULES],
+        'STALE_AFTER_DAYS': 180,
+        'MIN_FIRMWARE_VERSION': '',
+    }
+    options.update(getattr(settings, 'MACHINE_HEALTH', {}))
+    options['now'] = timezone.now()
+    return options
+
+
+def evaluate_machine(machine, options=None):
+    """
+    Evaluate a machine against the enabled rules
+
+    Returns:
+        List of failing rule codes (empty when healthy)
+    """
+    options = options or get_options()
+    return [
+        code for code in options['RULES']
+        if code in RULES and RULES[code]['check'](machine, options)
+    ]
+
+
+def _health_row(machine, options):
+    issues = evaluate_machine(machine, options)
+    return MachineHealth(
+        machine_id=machine.id,
+        needs_service=bool(issues),
+        issues=issues,
+        issue_count=len(issues),
+        evaluated_at=options['now'],
+    )
+
+
+def _upsert(rows):
+    # MySQL upserts on any unique key and rejects an explicit target
+    unique_fields = ['machine'] if connection.features.supports_update_conflicts_with_target else None
+    MachineHealth.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=['needs_service', 'issues', 'issue_count', 'evaluated_at'],
+    )
+
+
+def refresh_machine_health(machines, options=None):
+    """Re-evaluate and store health for the given machines (instances or queryset)"""
+    options = options or get_options()
+    rows = [_health_row(machine, options) for machine in machines]
+    if rows:
+        _upsert(rows)
+    return len(rows)
+
+
+def refresh_all_machine_health(batch_size=2000):
+    """
+    Re-evaluate every machine in batches
+
+    Returns:
+        Number of machines evaluated
+    """
+    options = get_options()
+    total = 0
+    batch = []
+    for machine in Machine.objects.only(*RULE_FIELDS).order_by().iterator(chunk_size=batch_size):
+        batch.append(_health_row(machine, options))
+        if len(batch) >= batch_size:
+            _upsert(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        _upsert(batch)
+        total += len(batch)
+    return total
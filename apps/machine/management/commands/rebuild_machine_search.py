@@ -0,0 +1,19 @@
+"""
+Management command to rebuild the machine search index
+Run once after deploying the index, and whenever rows were changed
+outside the ORM (raw SQL, data imports with signals disabled)
+"""
+from django.core.management.base import BaseCommand
+from apps.machine.models import Machine
+from apps.machine.search import index_machines
+
+
+class Command(BaseCommand):
+    help = 'Rebuild normalized identifiers and search tokens for every machine'
+
+    def handle(self, *args, **options):
+        total = index_machines(Machine.objects.all())
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully indexed {total} machines')
+        )
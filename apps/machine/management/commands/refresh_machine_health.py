@@ -0,0 +1,28 @@
+"""
+Management command to re-evaluate service health for every machine
+Run this as a cron job (e.g. nightly) so time-based rules such as stale
+records are picked up even when machines are not edited
+"""
+from django.core.management.base import BaseCommand
+from apps.machine.health import refresh_all_machine_health
+from apps.machine.utils import invalidate_machine_statistics
+
+
+class Command(BaseCommand):
+    help = 'Re-evaluate machine service-health rules and store the results'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Machines evaluated and written per batch (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        total = refresh_all_machine_health(batch_size=options['batch_size'])
+        invalidate_machine_statistics()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully evaluated health for {total} machines')
+        )
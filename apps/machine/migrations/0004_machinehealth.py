@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machine', '0003_alter_machine_serial_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MachineHealth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('needs_service', models.BooleanField(default=False)),
+                ('issues', models.JSONField(blank=True, default=list, help_text='Codes of the health rules this machine fails')),
+                ('issue_count', models.PositiveSmallIntegerField(default=0)),
+                ('evaluated_at', models.DateTimeField()),
+                ('machine', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='health', to='machine.machine')),
+            ],
+            options={
+                'verbose_name': 'Machine Health',
+                'verbose_name_plural': 'Machine Health',
+                'db_table': 'machine_health',
+                'indexes': [models.Index(fields=['needs_service', '-issue_count'], name='idx_mhealth_needs_service')],
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+from apps.machine.search import INDEX_BATCH_SIZE, TOKEN_MAX_LENGTH, TOKEN_SOURCES, normalize_identifier, tokenize
+
+
+def index_existing_machines(apps, schema_editor):
+    """Same rows as search.index_machines, built from the historical models"""
+    Machine = apps.get_model('machine', 'Machine')
+    MachineSearchDocument = apps.get_model('machine', 'MachineSearchDocument')
+    MachineSearchToken = apps.get_model('machine', 'MachineSearchToken')
+
+    rows = Machine.objects.order_by().values_list('id', *TOKEN_SOURCES)
+    documents, tokens = [], []
+    for machine_id, *values in rows.iterator(chunk_size=INDEX_BATCH_SIZE):
+        fields = dict(zip(TOKEN_SOURCES, values))
+        document = MachineSearchDocument(
+            machine_id=machine_id,
+            serial_norm=normalize_identifier(fields['serial_number']),
+            mid_norm=normalize_identifier(fields['mid']),
+            tid_norm=normalize_identifier(fields['tid']),
+        )
+        machine_tokens = set()
+        for value in values:
+            machine_tokens.update(tokenize(value))
+        for identifier in (document.serial_norm, document.mid_norm, document.tid_norm):
+            if identifier:
+                machine_tokens.add(identifier.lower()[:TOKEN_MAX_LENGTH])
+        documents.append(document)
+        tokens.extend(MachineSearchToken(machine_id=machine_id, token=token) for token in machine_tokens)
+        if len(documents) >= INDEX_BATCH_SIZE:
+            MachineSearchDocument.objects.bulk_create(documents)
+            MachineSearchToken.objects.bulk_create(tokens, batch_size=2000)
+            documents, tokens = [], []
+    MachineSearchDocument.objects.bulk_create(documents)
+    MachineSearchToken.objects.bulk_create(tokens, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machine', '0004_machinehealth'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MachineSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('serial_norm', models.CharField(blank=True, db_index=True, default='', max_length=100)),
+                ('mid_norm', models.CharField(blank=True, db_index=True, default='', max_length=100)),
+                ('tid_norm', models.CharField(blank=True, db_index=True, default='', max_length=100)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('machine', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='machine.machine')),
+            ],
+            options={
+                'verbose_name': 'Machine Search Document',
+                'verbose_name_plural': 'Machine Search Documents',
+                'db_table': 'machine_search_documents',
+            },
+        ),
+        migrations.CreateModel(
+            name='MachineSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=64)),
+                ('machine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='machine.machine')),
+            ],
+            options={
+                'db_table': 'machine_search_tokens',
+            },
+        ),
+        # Machine ?search= reads only the index, so fill it for existing machines
+        migrations.RunPython(index_existing_machines, migrations.RunPython.noop),
+    ]
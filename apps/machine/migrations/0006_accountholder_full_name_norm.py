@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:08
+
+from django.db import migrations, models
+from spa_central.models import normalize
+
+
+NORMALIZED = {
+    'AccountHolder': {'full_name_norm': 'full_name'},
+}
+
+
+def fill_normalized(apps, schema_editor):
+    for model_name, fields in NORMALIZED.items():
+        model = apps.get_model('machine', model_name)
+        rows = list(model.objects.only(*fields.values()))
+        for row in rows:
+            for target, source in fields.items():
+                setattr(row, target, normalize(getattr(row, source)))
+        model.objects.bulk_update(rows, list(fields), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machine', '0005_machine_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountholder',
+            name='full_name_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='accountholder',
+            index=models.Index(fields=['full_name_norm'], name='idx_acc_holder_name_norm', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(fill_normalized, migrations.RunPython.noop),
+    ]
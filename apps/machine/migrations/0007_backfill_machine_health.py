@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:12
+
+import re
+from datetime import timedelta
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+BATCH_SIZE = 2000
+
+# The rules of apps.machine.health as of this migration, frozen here so
+# later changes to the live engine cannot change what this backfill does.
+# Later rule changes are applied by the refresh_machine_health command.
+FIELDS = ['id', 'status', 'mid', 'tid', 'account_name', 'bank_name', 'acc_holder', 'updated_at', 'firmware_version']
+
+
+def _blank(value):
+    return value is None or not str(value).strip()
+
+
+def _version_tuple(version):
+    return tuple(int(part) for part in re.findall(r'\d+', version or ''))
+
+
+def _outdated_firmware(machine, options):
+    minimum = _version_tuple(options['MIN_FIRMWARE_VERSION'])
+    current = _version_tuple(machine.firmware_version)
+    return bool(minimum and current) and current < minimum
+
+
+def _stale(machine, options):
+    stale_after = options['STALE_AFTER_DAYS']
+    if not stale_after or machine.updated_at is None:
+        return False
+    return machine.updated_at < options['now'] - timedelta(days=stale_after)
+
+
+RULES = {
+    'broken': lambda machine, options: machine.status == 'broken',
+    'missing_mid_tid': lambda machine, options: _blank(machine.mid) or _blank(machine.tid),
+    'missing_bank_info': lambda machine, options: _blank(machine.bank_name) or _blank(machine.account_name),
+    'no_account_holder': lambda machine, options: machine.acc_holder_id is None,
+    'stale_record': _stale,
+    'outdated_firmware': _outdated_firmware,
+}
+
+
+def evaluate_existing_machines(apps, schema_editor):
+    """Same rows as health.refresh_all_machine_health, for machines without one"""
+    Machine = apps.get_model('machine', 'Machine')
+    MachineHealth = apps.get_model('machine', 'MachineHealth')
+
+    options = {'RULES': list(RULES), 'STALE_AFTER_DAYS': 180, 'MIN_FIRMWARE_VERSION': ''}
+    options.update(getattr(settings, 'MACHINE_HEALTH', {}))
+    options['now'] = timezone.now()
+    enabled = [code for code in options['RULES'] if code in RULES]
+
+    machines = Machine.objects.filter(health__isnull=True).only(*FIELDS).order_by()
+    rows = []
+    for machine in machines.iterator(chunk_size=BATCH_SIZE):
+        issues = [code for code in enabled if RULES[code](machine, options)]
+        rows.append(MachineHealth(
+            machine_id=machine.id,
+            needs_service=bool(issues),
+            issues=issues,
+            issue_count=len(issues),
+            evaluated_at=options['now'],
+        ))
+        if len(rows) >= BATCH_SIZE:
+            MachineHealth.objects.bulk_create(rows)
+            rows = []
+    MachineHealth.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('machine', '0006_accountholder_full_name_norm'),
+    ]
+
+    operations = [
+        migrations.RunPython(evaluate_existing_machines, migrations.RunPython.noop),
+    ]
@@ -1,19 +1,27 @@
 from django.db import models
 from django.conf import settings
+from apps.audit.models import AuditedModel
+from spa_central.models import NormalizedFieldsModel
 
 
-class AccountHolder(models.Model):
+class AccountHolder(AuditedModel, NormalizedFieldsModel):
     """Account holder information for machines"""
     full_name = models.CharField(max_length=150, help_text="Full name of account holder")
+    full_name_norm = models.CharField(max_length=150, blank=True, default='', editable=False)
     designation = models.CharField(max_length=100, blank=True, null=True, help_text="Designation/Title")
     
     # Audit
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    normalized_fields = {'full_name_norm': 'full_name'}
     
     class Meta:
         db_table = 'account_holders'
         ordering = ['full_name']
+        indexes = [
+            models.Index(fields=['full_name_norm'], name='idx_acc_holder_name_norm', opclasses=['varchar_pattern_ops']),
+        ]
         verbose_name = 'Account Holder'
         verbose_name_plural = 'Account Holders'
     
@@ -23,7 +31,7 @@ class AccountHolder(models.Model):
         return self.full_name
 
 
-class Machine(models.Model):
+class Machine(AuditedModel, models.Model):
     """Machine installation record for spas (Excel-like centralized record)"""
 
     STATUS_CHOICES = [
@@ -97,3 +105,52 @@ class Machine(models.Model):
         if self.spa and self.spa.area and self.spa.area.city:
             return self.spa.area.city.state
         return None
+
+
+class MachineHealth(models.Model):
+    """Materialized service-health evaluation for a machine (see apps.machine.health)"""
+    machine = models.OneToOneField(Machine, on_delete=models.CASCADE, related_name='health')
+    needs_service = models.BooleanField(default=False)
+    issues = models.JSONField(default=list, blank=True, help_text="Codes of the health rules this machine fails")
+    issue_count = models.PositiveSmallIntegerField(default=0)
+    evaluated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'machine_health'
+        indexes = [
+            models.Index(fields=['needs_service', '-issue_count'], name='idx_mhealth_needs_service'),
+        ]
+        verbose_name = 'Machine Health'
+        verbose_name_plural = 'Machine Health'
+
+    def __str__(self):
+        return f"{self.machine_id}: {', '.join(self.issues) or 'healthy'}"
+
+
+class MachineSearchDocument(models.Model):
+    """Denormalized, normalized identifiers for exact MID/TID/serial lookups (see apps.machine.search)"""
+    machine = models.OneToOneField(Machine, on_delete=models.CASCADE, related_name='search_document')
+    serial_norm = models.CharField(max_length=100, blank=True, default='', db_index=True)
+    mid_norm = models.CharField(max_length=100, blank=True, default='', db_index=True)
+    tid_norm = models.CharField(max_length=100, blank=True, default='', db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'machine_search_documents'
+        verbose_name = 'Machine Search Document'
+        verbose_name_plural = 'Machine Search Documents'
+
+    def __str__(self):
+        return f"{self.machine_id}: {self.serial_norm or '-'} / {self.mid_norm or '-'} / {self.tid_norm or '-'}"
+
+
+class MachineSearchToken(models.Model):
+    """One lowercased word of a machine's searchable text, for indexed prefix search"""
+    machine = models.ForeignKey(Machine, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=64, db_index=True)
+
+    class Meta:
+        db_table = 'machine_search_tokens'
+
+    def __str__(self):
+        return f"{self.machine_id}: {self.token}"
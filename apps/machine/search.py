@@ -0,0 +1,160 @@
+"""
+Denormalized search index for the machine register
+
+MachineSearchDocument holds MID/TID/serial normalized (upper-case,
+alphanumerics only) in indexed columns for exact lookups, and
+MachineSearchToken holds one row per word of the searchable text (machine,
+spa, bank, account holder and location fields) for indexed prefix search.
+This replaces OR-ing ``icontains`` across 16 columns and five joins.
+
+The index is kept current by signals on Machine, Spa, Area, City, State
+and AccountHolder, by the bulk machine operations, and can be rebuilt
+with the ``rebuild_machine_search`` command.
+"""
+
+import re
+from django.db import connection, transaction
+from django.db.models import Q
+from .models import MachineSearchDocument, MachineSearchToken
+
+INDEX_BATCH_SIZE = 500
+TOKEN_MAX_LENGTH = 64
+# Shorter digit runs would substring-match most of the register
+CODE_SUBSTRING_MIN_LENGTH = 3
+
+# Text fields (same set as MachineViewSet.search_fields) that feed the tokens
+TOKEN_SOURCES = [
+    'serial_number', 'machine_code', 'machine_name', 'model_name',
+    'spa__spa_name', 'spa__spa_code', 'spa__landmark',
+    'mid', 'tid', 'bank_name', 'account_name',
+    'acc_holder__full_name', 'acc_holder__designation',
+    'spa__area__name', 'spa__area__city__name', 'spa__area__city__state__name',
+]
+
+_NON_ALNUM = re.compile(r'[^0-9A-Za-z]+')
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize_identifier(value):
+    """Normalize a MID/TID/serial for exact matching ('ab-12 3' -> 'AB123')"""
+    return _NON_ALNUM.sub('', value or '').upper()
+
+
+def tokenize(value):
+    """Split text into lowercased word tokens"""
+    return [token[:TOKEN_MAX_LENGTH] for token in _WORD.findall((value or '').lower())]
+
+
+def _resolve(machine, path):
+    value = machine
+    for attr in path.split('__'):
+        value = getattr(value, attr, None)
+        if value is None:
+            return None
+    return value
+
+
+def _build(machine):
+    document = MachineSearchDocument(
+        machine_id=machine.id,
+        serial_norm=normalize_identifier(machine.serial_number),
+        mid_norm=normalize_identifier(machine.mid),
+        tid_norm=normalize_identifier(machine.tid),
+    )
+    tokens = set()
+    for path in TOKEN_SOURCES:
+        tokens.update(tokenize(_resolve(machine, path)))
+    # Identifiers are also indexed normalized so '12-34' finds '1234' by prefix
+    for identifier in (document.serial_norm, document.mid_norm, document.tid_norm):
+        if identifier:
+            tokens.add(identifier.lower()[:TOKEN_MAX_LENGTH])
+    return document, [MachineSearchToken(machine_id=machine.id, token=token) for token in tokens]
+
+
+def _write(documents, tokens):
+    unique_fields = ['machine'] if connection.features.supports_update_conflicts_with_target else None
+    with transaction.atomic():
+        MachineSearchDocument.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=['serial_norm', 'mid_norm', 'tid_norm', 'updated_at'],
+        )
+        MachineSearchToken.objects.filter(machine_id__in=[doc.machine_id for doc in documents]).delete()
+        MachineSearchToken.objects.bulk_create(tokens, batch_size=2000)
+
+
+def index_machines(queryset):
+    """
+    (Re)build search rows for every machine in ``queryset``
+
+    Returns:
+        Number of machines indexed
+    """
+    machines = queryset.select_related(
+        'spa', 'spa__area', 'spa__area__city', 'spa__area__city__state', 'acc_holder'
+    ).order_by()
+
+    total = 0
+    documents, tokens = [], []
+    for machine in machines.iterator(chunk_size=INDEX_BATCH_SIZE):
+        document, machine_tokens = _build(machine)
+        documents.append(document)
+        tokens.extend(machine_tokens)
+        if len(documents) >= INDEX_BATCH_SIZE:
+            _write(documents, tokens)
+            total += len(documents)
+            documents, tokens = [], []
+    if documents:
+        _write(documents, tokens)
+        total += len(documents)
+    return total
+
+
+def exact_lookup(queryset, mid=None, tid=None, serial=None):
+    """Filter machines by exact (normalized) MID, TID and/or serial number"""
+    for field, value in (('mid_norm', mid), ('tid_norm', tid), ('serial_norm', serial)):
+        if value:
+            queryset = queryset.filter(**{f'search_document__{field}': normalize_identifier(value)})
+    return queryset
+
+
+def _code_substring(term):
+    """
+    Substring match on the identifier columns for a code-like term
+
+    Word tokens only match from the start, so '4567' would not find serial
+    'SN-004567' by prefix alone. A single word containing a digit is also
+    looked for anywhere in the normalized MID/TID/serial and the machine
+    code, as the old ``icontains`` search did.
+    """
+    key = normalize_identifier(term)
+    if len(key) < CODE_SUBSTRING_MIN_LENGTH or not any(char.isdigit() for char in key) or len(term.split()) > 1:
+        return None
+    return (
+        Q(search_document__serial_norm__contains=key) |
+        Q(search_document__mid_norm__contains=key) |
+        Q(search_document__tid_norm__contains=key) |
+        Q(machine_code__icontains=term)
+    )
+
+
+def search_machines(queryset, terms):
+    """
+    Search machines by free-text terms
+
+    Every word of every term must prefix-match a token of the machine. A
+    code-like term (one word with a digit) also matches anywhere inside a
+    MID, TID, serial number or machine code, so exact identifiers and their
+    trailing digits are found too.
+    """
+    for term in terms:
+        condition = Q()
+        for token in tokenize(term):
+            condition &= Q(id__in=MachineSearchToken.objects.filter(token__startswith=token).values('machine_id'))
+        substring = _code_substring(term)
+        if substring is not None:
+            condition |= substring
+        if condition:
+            queryset = queryset.filter(condition)
+    return queryset
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from spa_central.serializers import SparseFieldsetMixin
 from .models import Machine, AccountHolder
 
 
-class AccountHolderSerializer(serializers.ModelSerializer):
+class AccountHolderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for Account Holders"""
     class Meta:
         model = AccountHolder
@@ -10,7 +11,7 @@ class AccountHolderSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class MachineListSerializer(serializers.ModelSerializer):
+class MachineListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for listing machines (location inherited from spa)"""
     spa_name = serializers.CharField(source='spa.spa_name', read_only=True)
     spa_code = serializers.CharField(source='spa.spa_code', read_only=True)
@@ -33,6 +34,10 @@ class MachineListSerializer(serializers.ModelSerializer):
             'acc_holder', 'acc_holder_name', 'acc_holder_designation',
             'created_at', 'updated_at', 'created_by', 'created_by_name'
         ]
+        sparse_sources = {
+            'area': ['spa__area__id'],
+            'created_by_name': ['created_by__first_name', 'created_by__last_name', 'created_by__email'],
+        }
         read_only_fields = ['created_at', 'updated_at', 'created_by', 'area', 'area_name', 'city_name', 'state_name']
     
     def get_created_by_name(self, obj):
@@ -41,7 +46,16 @@ class MachineListSerializer(serializers.ModelSerializer):
         return None
 
 
-class MachineDetailSerializer(serializers.ModelSerializer):
+class MachineServiceSerializer(MachineListSerializer):
+    """Machine list row with the service-health rules it fails"""
+    service_issues = serializers.ListField(source='health.issues', read_only=True)
+    health_evaluated_at = serializers.DateTimeField(source='health.evaluated_at', read_only=True)
+
+    class Meta(MachineListSerializer.Meta):
+        fields = MachineListSerializer.Meta.fields + ['service_issues', 'health_evaluated_at']
+
+
+class MachineDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for detailed machine view (location inherited from spa)"""
     spa_name = serializers.CharField(source='spa.spa_name', read_only=True)
     spa_code = serializers.CharField(source='spa.spa_code', read_only=True)
@@ -56,6 +70,10 @@ class MachineDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Machine
         fields = '__all__'
+        sparse_sources = {
+            'area': ['spa__area__id'],
+            'created_by_name': ['created_by__first_name', 'created_by__last_name', 'created_by__email'],
+        }
         read_only_fields = ['created_at', 'updated_at', 'created_by', 'area', 'area_name', 'city_name', 'state_name']
     
     def get_created_by_name(self, obj):
@@ -94,4 +112,18 @@ class MachineCreateUpdateSerializer(serializers.ModelSerializer):
                 f"The selected spa '{value.spa_name}' does not have a location (area) assigned. "
                 "Please assign a location to the spa first."
             )
-        return value
\ No newline at end of file
+        return value
+
+
+class MachineBulkRowSerializer(serializers.ModelSerializer):
+    """
+    Field-level validation for one row of a bulk request
+    Relations and serial uniqueness are checked set-based in apps.machine.bulk
+    """
+    id = serializers.IntegerField(required=False)
+    spa = serializers.IntegerField(required=False, allow_null=True)
+    acc_holder = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Machine
+        fields = ['id'] + MachineCreateUpdateSerializer.Meta.fields
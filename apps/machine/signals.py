@@ -0,0 +1,87 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from spa_central.autocomplete import invalidate_autocomplete
+from .health import refresh_machine_health
+from .models import Machine, AccountHolder
+from .search import index_machines
+from .utils import invalidate_machine_statistics
+
+# Relation path from Machine to each model whose fields feed the search index
+SEARCH_RELATED = {
+    'spas.Spa': 'spa',
+    'location.Area': 'spa__area',
+    'location.City': 'spa__area__city',
+    'location.State': 'spa__area__city__state',
+}
+
+
+@receiver(post_save, sender=Machine)
+def machine_saved(sender, instance, raw=False, **kwargs):
+    """Re-evaluate service health for the saved machine (before stats are invalidated)"""
+    if not raw:
+        refresh_machine_health([instance])
+        index_machines(Machine.objects.filter(pk=instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Machine)
+@receiver([post_save, post_delete], sender=AccountHolder)
+@receiver([post_save, post_delete], sender='spas.Spa')
+@receiver([post_save, post_delete], sender='location.State')
+@receiver([post_save, post_delete], sender='location.City')
+@receiver([post_save, post_delete], sender='location.Area')
+def machine_statistics_changed(sender, **kwargs):
+    """Invalidate cached machine statistics (spa and location names feed the breakdowns too)"""
+    invalidate_machine_statistics()
+
+
+@receiver([post_save, post_delete], sender=AccountHolder)
+def account_holder_picker_changed(sender, **kwargs):
+    invalidate_autocomplete('account-holders')
+
+
+@receiver(pre_delete, sender=AccountHolder)
+def account_holder_deleting(sender, instance, **kwargs):
+    """Remember affected machines; SET_NULL runs as an UPDATE without post_save"""
+    instance._machine_ids = list(instance.machines.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=AccountHolder)
+def account_holder_deleted(sender, instance, **kwargs):
+    machine_ids = getattr(instance, '_machine_ids', None)
+    if machine_ids:
+        refresh_machine_health(Machine.objects.filter(id__in=machine_ids))
+        index_machines(Machine.objects.filter(id__in=machine_ids))
+
+
+@receiver(post_save, sender=AccountHolder)
+def account_holder_saved(sender, instance, raw=False, **kwargs):
+    """Reindex machines showing this holder's name/designation"""
+    if not raw:
+        index_machines(Machine.objects.filter(acc_holder=instance))
+
+
+def _reindex_related(sender, instance, raw=False, **kwargs):
+    """Reindex machines under a renamed spa/area/city/state"""
+    if not raw:
+        path = SEARCH_RELATED[sender._meta.label]
+        index_machines(Machine.objects.filter(**{path: instance}))
+
+
+def _remember_related(sender, instance, **kwargs):
+    """Remember machines under a spa/area about to be deleted (SET_NULL skips post_save)"""
+    path = SEARCH_RELATED[sender._meta.label]
+    instance._search_machine_ids = list(Machine.objects.filter(**{path: instance}).values_list('id', flat=True))
+
+
+def _reindex_remembered(sender, instance, **kwargs):
+    machine_ids = getattr(instance, '_search_machine_ids', None)
+    if machine_ids:
+        index_machines(Machine.objects.filter(id__in=machine_ids))
+
+
+for _label in SEARCH_RELATED:
+    post_save.connect(_reindex_related, sender=_label, dispatch_uid=f'machine_search_save_{_label}')
+# Cities and states are PROTECTed, so only spa and area deletes orphan index text
+for _label in ('spas.Spa', 'location.Area'):
+    pre_delete.connect(_remember_related, sender=_label, dispatch_uid=f'machine_search_pre_delete_{_label}')
+    post_delete.connect(_reindex_remembered, sender=_label, dispatch_uid=f'machine_search_delete_{_label}')
@@ -0,0 +1,10 @@
+from celery import shared_task
+from .health import refresh_all_machine_health
+from .utils import invalidate_machine_statistics
+
+
+@shared_task(ignore_result=True)
+def refresh_machine_health_task(batch_size=2000):
+    """Periodic (celery beat) variant of the refresh_machine_health command"""
+    refresh_all_machine_health(batch_size=batch_size)
+    invalidate_machine_statistics()
@@ -1,3 +1,380 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from spa_central.testing import AsyncParityTestCase
+from apps.location.models import State, City, Area
+from apps.spas.models import PrimaryOwner, Spa
+from apps.users.models import User
+from . import health
+from .models import AccountHolder, Machine, MachineHealth
 
-# Create your tests here.
+
+class MachineAsyncViewTests(AsyncParityTestCase):
+    """machine-list under ASGI matches the sync viewset"""
+
+    def setUp(self):
+        super().setUp()
+        area = Area.objects.create(name='Baner', city=City.objects.create(
+            name='Pune', state=State.objects.create(name='Maharashtra'),
+        ))
+        spa = Spa.objects.create(
+            spa_code='1001', spa_name='Lotus Spa', area=area,
+            primary_owner=PrimaryOwner.objects.create(fullname='Priya Owner'),
+        )
+        holder = AccountHolder.objects.create(full_name='Hari Holder', designation='Owner')
+        for index in range(3):
+            Machine.objects.create(
+                spa=spa, serial_number=f'SN{index}', machine_code=f'MC{index}', mid=f'MID{index}',
+                tid=f'TID{index}', acc_holder=holder, status='in_use' if index else 'broken',
+                created_by=self.user,
+            )
+
+    def test_list(self):
+        self.assertSameResponse('/api/machines/')
+        self.assertSameResponse('/api/machines/?status=in_use')
+        self.assertSameResponse('/api/machines/?page=9', status=404)
+
+
+class MachineBulkTests(TestCase):
+    """bulk_create/bulk_update/bulk_status/bulk_reassign validation and all-or-nothing writes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@example.com', password='x', first_name='Ada', last_name='Admin', user_type='admin',
+        ))
+        area = Area.objects.create(name='Baner', city=City.objects.create(
+            name='Pune', state=State.objects.create(name='Maharashtra'),
+        ))
+        owner = PrimaryOwner.objects.create(fullname='Priya Owner')
+        self.spa = Spa.objects.create(spa_code='1001', spa_name='Lotus Spa', area=area, primary_owner=owner)
+        self.other_spa = Spa.objects.create(spa_code='1002', spa_name='Orchid Spa', area=area, primary_owner=owner)
+        self.unplaced_spa = Spa.objects.create(spa_code='1003', spa_name='Nowhere Spa', primary_owner=owner)
+        self.old = Machine.objects.create(serial_number='SN-OLD', spa=self.spa, status='in_use')
+
+    def post(self, name, body, **kwargs):
+        return self.client.post(f'/api/machines/{name}/', body, **kwargs)
+
+    def statuses(self, response):
+        return [row['status'] for row in response.data['results']]
+
+    def test_create(self):
+        response = self.post('bulk_create', {'machines': [
+            {'serial_number': 'SN-1', 'spa': self.spa.id, 'status': 'in_use'},
+            {'machine_name': 'No serial'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        ids = [row['id'] for row in response.data['results']]
+        self.assertEqual(list(Machine.objects.filter(id__in=ids).order_by('id').values_list('serial_number', flat=True)),
+                         ['SN-1', None])
+        self.assertEqual(Machine.objects.get(serial_number='SN-1').health.machine_id, ids[0])
+
+    def test_invalid_rows_write_nothing(self):
+        response = self.post('bulk_create', {'machines': [
+            {'serial_number': 'SN-1', 'spa': self.spa.id},
+            {'serial_number': 'SN-OLD'},
+            {'serial_number': 'SN-1'},
+            {'spa': self.unplaced_spa.id},
+            {'spa': 999999, 'status': 'melted'},
+            'not an object',
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.statuses(response), ['not_applied'] + ['error'] * 5)
+        self.assertIn('status', response.data['results'][4]['errors'])
+        self.assertEqual(Machine.objects.count(), 1)
+
+    def test_allow_partial(self):
+        rows = [{'serial_number': 'SN-1'}, {'serial_number': 'SN-OLD'}]
+        response = self.post('bulk_create', {'machines': rows, 'allow_partial': True}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.statuses(response), ['created', 'error'])
+        self.assertTrue(Machine.objects.filter(serial_number='SN-1').exists())
+
+    def test_allow_partial_false_values(self):
+        for value in ('false', '0', 'no', ''):
+            response = self.post('bulk_create', {
+                'machines': [{'serial_number': f'SN-{value}-ok'}, {'serial_number': 'SN-OLD'}],
+                'allow_partial': value,
+            }, format='json')
+            self.assertEqual(response.status_code, 400, value)
+        self.assertEqual(Machine.objects.count(), 1)
+
+    def test_size_limit(self):
+        self.assertEqual(self.post('bulk_create', {'machines': []}, format='json').status_code, 400)
+        self.assertEqual(self.post('bulk_status', {'ids': ['1'], 'status': 'broken'}, format='json').status_code, 400)
+        with mock.patch('apps.machine.views.BULK_MAX_ROWS', 2):
+            response = self.post('bulk_create', {'machines': [{}, {}, {}]}, format='json')
+            self.assertEqual(response.status_code, 400)
+            response = self.post('bulk_status', {'ids': [1, 2, 3], 'status': 'broken'}, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Machine.objects.count(), 1)
+
+    def test_update(self):
+        new = Machine.objects.create(serial_number='SN-NEW')
+        # Swapping serials within one request is allowed
+        response = self.post('bulk_update', {'machines': [
+            {'id': self.old.id, 'serial_number': 'SN-NEW', 'status': 'broken'},
+            {'id': new.id, 'serial_number': 'SN-OLD'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.old.refresh_from_db()
+        self.assertEqual((self.old.serial_number, self.old.status), ('SN-NEW', 'broken'))
+
+        response = self.post('bulk_update', {'machines': [
+            {'id': self.old.id, 'status': 'in_use'},
+            {'id': self.old.id, 'status': 'in_use'},
+            {'id': 999999, 'status': 'in_use'},
+            {'status': 'in_use'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.statuses(response), ['not_applied', 'error', 'error', 'error'])
+        self.old.refresh_from_db()
+        self.assertEqual(self.old.status, 'broken')
+
+    def test_status(self):
+        response = self.post('bulk_status', {'ids': [self.old.id, 999999], 'status': 'broken'}, format='json')
+        self.assertEqual(response.data['summary'], {'updated': 1, 'not_found': 1})
+        self.assertEqual(Machine.objects.get(id=self.old.id).status, 'broken')
+        response = self.post('bulk_status', {'ids': [self.old.id], 'status': 'melted'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_reassign(self):
+        response = self.post('bulk_reassign', {'ids': [self.old.id], 'spa': self.other_spa.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Machine.objects.get(id=self.old.id).spa_id, self.other_spa.id)
+        response = self.post('bulk_reassign', {'ids': [self.old.id], 'spa': None}, format='json')
+        self.assertIsNone(Machine.objects.get(id=self.old.id).spa_id)
+        for spa in ('abc', [1], 999999, self.unplaced_spa.id):
+            response = self.post('bulk_reassign', {'ids': [self.old.id], 'spa': spa}, format='json')
+            self.assertEqual(response.status_code, 400, spa)
+
+    def create_without_returning(self, rows, offset):
+        """bulk_create as on MySQL, with LAST_INSERT_ID() off by ``offset`` from the real first id"""
+        def last_insert_id():
+            return Machine.objects.order_by('-id').values_list('id', flat=True)[len(rows) - 1] + offset
+
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False), \
+                mock.patch('apps.machine.bulk._last_insert_id', last_insert_id):
+            return self.post('bulk_create', {'machines': rows}, format='json')
+
+    def test_create_without_returning(self):
+        rows = [{'machine_name': 'First'}, {'machine_name': 'Second'}]
+        response = self.create_without_returning(rows, 0)
+        self.assertEqual(response.status_code, 201)
+        names = [Machine.objects.get(id=row['id']).machine_name for row in response.data['results']]
+        self.assertEqual(names, ['First', 'Second'])
+
+    def test_interleaved_ids_found_by_serial(self):
+        rows = [{'serial_number': 'SN-A', 'machine_name': 'First'}, {'serial_number': 'SN-B', 'machine_name': 'Second'}]
+        response = self.create_without_returning(rows, -1)
+        self.assertEqual(response.status_code, 201)
+        names = [Machine.objects.get(id=row['id']).machine_name for row in response.data['results']]
+        self.assertEqual(names, ['First', 'Second'])
+
+    def test_interleaved_ids_without_serials_conflict(self):
+        rows = [{'serial_number': 'SN-A'}, {'machine_name': 'No serial'}]
+        response = self.create_without_returning(rows, -1)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Machine.objects.count(), 1)
+
+
+class MachineSearchTests(TestCase):
+    """``?search=`` matching rules over the machine search index"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@example.com', password='x', first_name='Ada', last_name='Admin', user_type='admin',
+        ))
+        area = Area.objects.create(name='Baner', city=City.objects.create(
+            name='Pune', state=State.objects.create(name='Maharashtra'),
+        ))
+        spa = Spa.objects.create(
+            spa_code='1001', spa_name='Lotus Spa', area=area,
+            primary_owner=PrimaryOwner.objects.create(fullname='Priya Owner'),
+        )
+        self.lotus = Machine.objects.create(
+            spa=spa, serial_number='SN-004567', machine_code='MC-77', mid='MID 9001', tid='T-12',
+            machine_name='Front desk', bank_name='State Bank',
+        )
+        self.other = Machine.objects.create(serial_number='XY-1200', machine_code='MC-78', mid='MID8001', tid='T-34')
+
+    def search(self, term):
+        response = self.client.get('/api/machines/', {'search': term})
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(row['id'] for row in response.data['results'])
+
+    def test_exact_identifiers(self):
+        self.assertEqual(self.search('sn004567'), [self.lotus.id])
+        self.assertEqual(self.search('MID-9001'), [self.lotus.id])
+        self.assertEqual(self.search('t12'), [self.lotus.id])
+
+    def test_identifier_substrings(self):
+        self.assertEqual(self.search('4567'), [self.lotus.id])
+        self.assertEqual(self.search('001'), sorted([self.lotus.id, self.other.id]))
+        self.assertEqual(self.search('C-77'), [self.lotus.id])
+        # Too short to substring-match; only word prefixes count
+        self.assertEqual(self.search('67'), [])
+
+    def test_word_prefixes(self):
+        self.assertEqual(self.search('fro'), [self.lotus.id])
+        self.assertEqual(self.search('lotus bank'), [self.lotus.id])
+        self.assertEqual(self.search('pune'), [self.lotus.id])
+        self.assertEqual(self.search('otus'), [])
+        self.assertEqual(self.search('lotus missing'), [])
+
+    def test_index_follows_updates(self):
+        self.other.serial_number = 'XY-5678'
+        self.other.save()
+        self.assertEqual(self.search('5678'), [self.other.id])
+        self.assertEqual(self.search('1200'), [])
+
+
+HEALTH_RULES = {
+    'RULES': ['broken', 'missing_mid_tid', 'missing_bank_info', 'no_account_holder', 'stale_record', 'outdated_firmware'],
+    'STALE_AFTER_DAYS': 180,
+    'MIN_FIRMWARE_VERSION': '2.1',
+}
+
+
+@override_settings(MACHINE_HEALTH=HEALTH_RULES)
+class MachineHealthTests(TestCase):
+    """Service-health rules and the MachineHealth upsert"""
+
+    def setUp(self):
+        self.holder = AccountHolder.objects.create(full_name='Hari Holder')
+
+    def healthy(self, **fields):
+        values = {
+            'status': 'in_use', 'mid': 'MID1', 'tid': 'TID1', 'bank_name': 'State Bank',
+            'account_name': 'Lotus Spa', 'acc_holder': self.holder, 'firmware_version': '2.1.0',
+        }
+        values.update(fields)
+        return Machine.objects.create(**values)
+
+    def test_rules(self):
+        cases = {
+            (): {},
+            ('broken',): {'status': 'broken'},
+            ('missing_mid_tid',): {'tid': '  '},
+            ('missing_bank_info',): {'bank_name': None},
+            ('no_account_holder',): {'acc_holder': None},
+            ('outdated_firmware',): {'firmware_version': 'v2.0.9'},
+            ('missing_mid_tid', 'missing_bank_info'): {'mid': '', 'account_name': ''},
+        }
+        for issues, fields in cases.items():
+            self.assertEqual(health.evaluate_machine(self.healthy(**fields)), list(issues), fields)
+        # Unknown firmware is not outdated
+        self.assertEqual(health.evaluate_machine(self.healthy(firmware_version='unknown')), [])
+
+    def test_stale_and_disabled_rules(self):
+        machine = self.healthy()
+        Machine.objects.filter(id=machine.id).update(updated_at=timezone.now() - timedelta(days=200))
+        machine.refresh_from_db()
+        self.assertEqual(health.evaluate_machine(machine), ['stale_record'])
+        with override_settings(MACHINE_HEALTH={**HEALTH_RULES, 'RULES': ['broken']}):
+            self.assertEqual(health.evaluate_machine(machine), [])
+
+    def test_save_upserts_one_row(self):
+        machine = self.healthy(status='broken')
+        self.assertEqual((machine.health.needs_service, machine.health.issues), (True, ['broken']))
+        machine.status = 'in_use'
+        machine.save()
+        row = MachineHealth.objects.get(machine=machine)
+        self.assertEqual((row.needs_service, row.issues, row.issue_count), (False, [], 0))
+
+    def test_refresh_all(self):
+        machines = [self.healthy(), self.healthy(mid=None)]
+        MachineHealth.objects.filter(machine=machines[0]).update(needs_service=True, issues=['broken'], issue_count=1)
+        MachineHealth.objects.filter(machine=machines[1]).delete()
+        self.assertEqual(health.refresh_all_machine_health(batch_size=1), 2)
+        self.assertEqual(
+            list(MachineHealth.objects.order_by('machine_id').values_list('needs_service', 'issues')),
+            [(False, []), (True, ['missing_mid_tid'])],
+        )
+
+
+@override_settings(MACHINE_HEALTH=HEALTH_RULES)
+class MachineHealthMigrationTests(TransactionTestCase):
+    """0007 backfills health rows for machines that have none, as the live rules would"""
+
+    before = [('machine', '0006_accountholder_full_name_norm')]
+    after = [('machine', '0007_backfill_machine_health')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfill(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        old_apps = executor.loader.project_state(self.before).apps
+        OldMachine = old_apps.get_model('machine', 'Machine')
+        holder = old_apps.get_model('machine', 'AccountHolder').objects.create(full_name='Hari Holder')
+        fine = OldMachine.objects.create(
+            status='in_use', mid='MID1', tid='TID1', bank_name='State Bank', account_name='Lotus Spa',
+            acc_holder_id=holder.id, firmware_version='2.1',
+        )
+        broken = OldMachine.objects.create(status='broken', firmware_version='1.9')
+        old_apps.get_model('machine', 'MachineHealth').objects.filter(machine_id=fine.id).delete()
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        rows = MachineHealth.objects.order_by('machine_id')
+        self.assertEqual(
+            [(row.machine_id, row.issues) for row in rows],
+            [(fine.id, []), (broken.id, health.evaluate_machine(Machine.objects.get(id=broken.id)))],
+        )
+        self.assertEqual(rows[1].issues, [
+            'broken', 'missing_mid_tid', 'missing_bank_info', 'no_account_holder', 'outdated_firmware',
+        ])
+
+
+class MachineStatisticsTests(TestCase):
+    """statistics honours the list filters and is recomputed after location changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@example.com', password='x', first_name='Ada', last_name='Admin', user_type='admin',
+        ))
+        self.state = State.objects.create(name='Maharashtra')
+        owner = PrimaryOwner.objects.create(fullname='Priya Owner')
+        pune = Area.objects.create(name='Baner', city=City.objects.create(name='Pune', state=self.state))
+        goa = Area.objects.create(name='Calangute', city=City.objects.create(
+            name='Panaji', state=State.objects.create(name='Goa'),
+        ))
+        self.pune_spa = Spa.objects.create(spa_code='1001', spa_name='Lotus Spa', area=pune, primary_owner=owner)
+        goa_spa = Spa.objects.create(spa_code='1002', spa_name='Orchid Spa', area=goa, primary_owner=owner)
+        for serial, spa, status in (('SN-1', self.pune_spa, 'in_use'), ('SN-2', self.pune_spa, 'broken'),
+                                    ('SN-3', goa_spa, 'in_use')):
+            Machine.objects.create(serial_number=serial, spa=spa, status=status)
+
+    def statistics(self, **params):
+        response = self.client.get('/api/machines/statistics/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_filters(self):
+        self.assertEqual(self.statistics()['totals']['total_machines'], 3)
+        self.assertEqual(self.statistics(status='in_use')['totals']['total_machines'], 2)
+        by_state = self.statistics(state=self.state.id)
+        self.assertEqual((by_state['totals']['total_machines'], by_state['totals']['broken']), (2, 1))
+        self.assertEqual([row['spa__area__city__state__name'] for row in by_state['by_state']], ['Maharashtra'])
+        self.assertEqual(self.statistics(search='SN-3')['totals']['total_machines'], 1)
+
+    def test_location_changes_invalidate(self):
+        names = lambda: {row['spa__area__city__state__name'] for row in self.statistics()['by_state']}
+        self.assertEqual(names(), {'Maharashtra', 'Goa'})
+        self.state.name = 'MH'
+        self.state.save()
+        self.assertEqual(names(), {'MH', 'Goa'})
+        self.pune_spa.area.delete()
+        self.assertEqual(names(), {'Goa'})
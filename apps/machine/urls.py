@@ -1,12 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MachineViewSet, AccountHolderViewSet
+from .views import MachineViewSet, AccountHolderViewSet, AccountHolderAutocompleteView
 
 router = DefaultRouter()
 router.register(r'machines', MachineViewSet, basename='machine')
 router.register(r'account-holders', AccountHolderViewSet, basename='account-holder')
 
 urlpatterns = [
+    path('autocomplete/account-holders/', AccountHolderAutocompleteView.as_view(), name='account-holder-autocomplete'),
     path('', include(router.urls)),
 ]
 
@@ -0,0 +1,26 @@
+"""
+Utility functions for machine statistics caching
+"""
+
+from spa_central.caching import invalidate, query_params_digest, versioned_key
+
+MACHINE_STATS_CACHE_NAMESPACE = 'machine:stats'
+MACHINE_STATS_CACHE_TIMEOUT = 60 * 5  # Invalidated by signals, TTL is only a safety net
+
+
+def machine_stats_cache_key(query_params):
+    """
+    Build the cache key for a statistics request
+
+    Args:
+        query_params: Request query parameters (filters/search)
+
+    Returns:
+        Cache key scoped to the current stats version and the filter set
+    """
+    return versioned_key(MACHINE_STATS_CACHE_NAMESPACE, query_params_digest(query_params))
+
+
+def invalidate_machine_statistics():
+    """Expire every cached statistics payload by bumping the version"""
+    invalidate(MACHINE_STATS_CACHE_NAMESPACE)
@@ -3,29 +3,46 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from apps.users.permissions import IsAdminUser
+from apps.audit.mixins import HistoryMixin
+from spa_central.autocomplete import AutocompleteView
+from spa_central.bulk import BulkConflict, request_flag
+from spa_central.mixins import ConditionalGetMixin, SparseQuerysetMixin
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.cache import cache
 from django.db.models import Count, Q
+from apps.spas.models import Spa
 from .models import Machine, AccountHolder
 from .serializers import (
     MachineListSerializer,
     MachineDetailSerializer,
     MachineCreateUpdateSerializer,
+    MachineServiceSerializer,
     AccountHolderSerializer
 )
-from .filters import MachineFilter
+from .filters import MachineFilter, MachineSearchFilter
+from .search import exact_lookup
+from .utils import machine_stats_cache_key, MACHINE_STATS_CACHE_TIMEOUT
+from .bulk import (
+    BULK_MAX_ROWS,
+    bulk_create_machines,
+    bulk_update_machines,
+    bulk_set_machines,
+)
 
 
-class MachineViewSet(viewsets.ModelViewSet):
+class MachineViewSet(ConditionalGetMixin, SparseQuerysetMixin, HistoryMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Machines (Card Swipe Machines)
     Complete record keeping system replacing Excel
     """
+    etag_related = ('spa', 'spa__area', 'spa__area__city', 'spa__area__city__state', 'acc_holder', 'created_by')
     queryset = Machine.objects.select_related(
         'spa', 'spa__area', 'spa__area__city', 'spa__area__city__state', 'created_by', 'acc_holder'
     ).all()
     permission_classes = [IsAdminUser]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, MachineSearchFilter, filters.OrderingFilter]
     filterset_class = MachineFilter
+    # Indexed by apps.machine.search; kept for the browsable API and schema
     search_fields = [
         'serial_number', 'machine_code', 'machine_name', 'model_name',
         'spa__spa_name', 'spa__spa_code', 'spa__landmark', 
@@ -48,86 +65,109 @@ class MachineViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def statistics(self, request):
-        """Get comprehensive machine statistics"""
-        total_machines = Machine.objects.count()
+        """Get comprehensive machine statistics (honours MachineFilter/search params)"""
+        cache_key = machine_stats_cache_key(request.query_params)
+        stats = cache.get(cache_key)
+        if stats is None:
+            stats = self._build_statistics(self.filter_queryset(self.get_queryset()).order_by())
+            cache.set(cache_key, stats, MACHINE_STATS_CACHE_TIMEOUT)
+        return Response(stats)
+
+    def _build_statistics(self, machines):
+        """Compute statistics for the given machine queryset in one pass per dimension"""
+        def filled(field):
+            return Q(**{f'{field}__isnull': False}) & ~Q(**{field: ''})
+
+        # Totals, status and banking completeness in a single conditional aggregate
+        aggregates = {
+            'total_machines': Count('id'),
+            'holders_with_machines': Count('acc_holder', distinct=True),
+            'machines_with_mid': Count('id', filter=filled('mid')),
+            'machines_with_tid': Count('id', filter=filled('tid')),
+            'machines_with_bank_info': Count('id', filter=filled('account_name') & filled('bank_name')),
+            'machines_with_account_holder': Count('id', filter=Q(acc_holder__isnull=False)),
+            'needs_service': Count('id', filter=Q(health__needs_service=True)),
+        }
+        for status_code, _ in Machine.STATUS_CHOICES:
+            aggregates[f'status_{status_code}'] = Count('id', filter=Q(status=status_code))
+        totals = machines.aggregate(**aggregates)
+
         total_account_holders = AccountHolder.objects.count()
-        
+
         # Status breakdown
-        status_counts = {}
-        for status_code, status_label in Machine.STATUS_CHOICES:
-            count = Machine.objects.filter(status=status_code).count()
-            status_counts[status_code] = {
+        status_counts = {
+            status_code: {
                 'label': status_label,
-                'count': count
+                'count': totals[f'status_{status_code}'],
             }
-        
+            for status_code, status_label in Machine.STATUS_CHOICES
+        }
+
         # Account holder statistics
-        account_holders_with_machines = AccountHolder.objects.annotate(
-            machine_count=Count('machines')
-        ).filter(machine_count__gt=0)
-        
+        top_holders = machines.filter(acc_holder__isnull=False).values(
+            'acc_holder__id', 'acc_holder__full_name', 'acc_holder__designation'
+        ).annotate(
+            machine_count=Count('id')
+        ).order_by('-machine_count')[:5]
+
         account_holders_stats = {
             'total_account_holders': total_account_holders,
-            'holders_with_machines': account_holders_with_machines.count(),
-            'holders_without_machines': total_account_holders - account_holders_with_machines.count(),
-            'top_holders': list(
-                account_holders_with_machines.values(
-                    'id', 'full_name', 'designation', 'machine_count'
-                ).order_by('-machine_count')[:5]
-            )
+            'holders_with_machines': totals['holders_with_machines'],
+            'holders_without_machines': total_account_holders - totals['holders_with_machines'],
+            'top_holders': [
+                {
+                    'id': holder['acc_holder__id'],
+                    'full_name': holder['acc_holder__full_name'],
+                    'designation': holder['acc_holder__designation'],
+                    'machine_count': holder['machine_count'],
+                }
+                for holder in top_holders
+            ]
         }
-        
+
         # Machines by location
-        machines_by_state = Machine.objects.filter(
+        machines_by_state = machines.filter(
             spa__area__city__state__isnull=False
         ).values(
             'spa__area__city__state__id', 'spa__area__city__state__name'
         ).annotate(
             machine_count=Count('id')
         ).order_by('-machine_count')[:10]
-        
-        machines_by_spa = Machine.objects.filter(
+
+        machines_by_spa = machines.filter(
             spa__isnull=False
         ).values(
             'spa__id', 'spa__spa_name', 'spa__spa_code'
         ).annotate(
             machine_count=Count('id')
         ).order_by('-machine_count')[:10]
-        
+
         # Recent machines
-        recent_machines = Machine.objects.select_related(
-            'spa', 'spa__area', 'spa__area__city', 'spa__area__city__state', 'acc_holder'
-        ).order_by('-created_at')[:5]
-        
-        # Machines needing service - placeholder (can be customized based on other criteria)
-        needs_service_count = 0  # Can be implemented based on other business logic if needed
-        
+        recent_machines = machines.order_by('-created_at')[:5]
+
         # Machines by model
-        machines_by_model = Machine.objects.filter(
+        machines_by_model = machines.filter(
             model_name__isnull=False
         ).values('model_name').annotate(
             count=Count('id')
         ).order_by('-count')[:5]
-        
+
         # Banking statistics
         banking_stats = {
-            'machines_with_mid': Machine.objects.exclude(mid__isnull=True).exclude(mid='').count(),
-            'machines_with_tid': Machine.objects.exclude(tid__isnull=True).exclude(tid='').count(),
-            'machines_with_bank_info': Machine.objects.exclude(
-                Q(account_name__isnull=True) | Q(account_name='') |
-                Q(bank_name__isnull=True) | Q(bank_name='')
-            ).count(),
-            'machines_with_account_holder': Machine.objects.exclude(acc_holder__isnull=True).count(),
+            'machines_with_mid': totals['machines_with_mid'],
+            'machines_with_tid': totals['machines_with_tid'],
+            'machines_with_bank_info': totals['machines_with_bank_info'],
+            'machines_with_account_holder': totals['machines_with_account_holder'],
         }
-        
-        return Response({
+
+        return {
             'totals': {
-                'total_machines': total_machines,
+                'total_machines': totals['total_machines'],
                 'total_account_holders': total_account_holders,
                 'in_use': status_counts.get('in_use', {}).get('count', 0),
                 'not_in_use': status_counts.get('not_in_use', {}).get('count', 0),
                 'broken': status_counts.get('broken', {}).get('count', 0),
-                'needs_service': needs_service_count,
+                'needs_service': totals['needs_service'],
             },
             'status_breakdown': status_counts,
             'account_holders': account_holders_stats,
@@ -135,8 +175,8 @@ class MachineViewSet(viewsets.ModelViewSet):
             'by_state': list(machines_by_state),
             'by_spa': list(machines_by_spa),
             'by_model': list(machines_by_model),
-            'recent': MachineListSerializer(recent_machines, many=True).data,
-        })
+            'recent': list(MachineListSerializer(recent_machines, many=True).data),
+        }
     
     @action(detail=False, methods=['get'])
     def by_status(self, request):
@@ -162,14 +202,130 @@ class MachineViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def needs_service(self, request):
-        """Get machines that need service - placeholder endpoint"""
-        # Can be customized based on business logic
-        machines = []
+        """Get machines failing service-health rules (indexed read of MachineHealth)"""
+        machines = self.filter_queryset(self.get_queryset()).filter(
+            health__needs_service=True
+        ).select_related('health')
+
+        page = self.paginate_queryset(machines)
+        if page is not None:
+            serializer = MachineServiceSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = MachineServiceSerializer(machines, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def lookup(self, request):
+        """Exact lookup by ?mid=, ?tid= and/or ?serial= (case, spaces and dashes ignored)"""
+        values = {key: request.query_params.get(key) for key in ('mid', 'tid', 'serial')}
+        if not any(values.values()):
+            return Response(
+                {'error': 'Provide at least one of mid, tid or serial'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        machines = exact_lookup(self.get_queryset(), **values)
         serializer = MachineListSerializer(machines, many=True)
         return Response(serializer.data)
 
 
-class AccountHolderViewSet(viewsets.ModelViewSet):
+    def _bulk_rows(self, request):
+        """Extract and size-check the ``machines`` list from a bulk request"""
+        rows = request.data.get('machines') if isinstance(request.data, dict) else None
+        if not isinstance(rows, list) or not rows:
+            return None, Response({'error': 'machines must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > BULK_MAX_ROWS:
+            return None, Response(
+                {'error': f'At most {BULK_MAX_ROWS} machines per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return rows, None
+
+    def _bulk_ids(self, request):
+        """Extract and size-check the ``ids`` list from a bulk request"""
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+            return None, Response({'error': 'ids must be a non-empty list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > BULK_MAX_ROWS:
+            return None, Response(
+                {'error': f'At most {BULK_MAX_ROWS} ids per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return ids, None
+
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """
+        Create many machines in one transaction
+        Body: {"machines": [{...}, ...], "allow_partial": false}
+        Without allow_partial nothing is written if any row is invalid
+        """
+        rows, error = self._bulk_rows(request)
+        if error:
+            return error
+        user = request.user if request.user.is_authenticated else None
+        allow_partial = request_flag(request, 'allow_partial')
+        try:
+            body, has_errors = bulk_create_machines(rows, user=user, allow_partial=allow_partial)
+        except BulkConflict as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+        if has_errors and not allow_partial:
+            return Response(body, status=status.HTTP_400_BAD_REQUEST)
+        return Response(body, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def bulk_update(self, request):
+        """
+        Partially update many machines in one transaction
+        Body: {"machines": [{"id": 1, "status": "broken"}, ...], "allow_partial": false}
+        """
+        rows, error = self._bulk_rows(request)
+        if error:
+            return error
+        allow_partial = request_flag(request, 'allow_partial')
+        body, has_errors = bulk_update_machines(rows, allow_partial=allow_partial)
+        if has_errors and not allow_partial:
+            return Response(body, status=status.HTTP_400_BAD_REQUEST)
+        return Response(body)
+
+    @action(detail=False, methods=['post'])
+    def bulk_status(self, request):
+        """
+        Set the status of many machines with one UPDATE
+        Body: {"ids": [1, 2, 3], "status": "broken"}
+        """
+        ids, error = self._bulk_ids(request)
+        if error:
+            return error
+        new_status = request.data.get('status')
+        if new_status not in dict(Machine.STATUS_CHOICES):
+            return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(bulk_set_machines(ids, status=new_status))
+
+    @action(detail=False, methods=['post'])
+    def bulk_reassign(self, request):
+        """
+        Move many machines to another spa with one UPDATE
+        Body: {"ids": [1, 2, 3], "spa": 5}
+        """
+        ids, error = self._bulk_ids(request)
+        if error:
+            return error
+        spa_id = request.data.get('spa')
+        try:
+            spa_id = int(spa_id) if spa_id not in (None, '') else None
+        except (TypeError, ValueError):
+            return Response({'error': 'spa must be an integer or null'}, status=status.HTTP_400_BAD_REQUEST)
+        spa = Spa.objects.filter(id=spa_id).only('id', 'spa_name', 'area_id').first() if spa_id else None
+        if spa_id and not spa:
+            return Response({'error': f'Spa {spa_id} does not exist'}, status=status.HTTP_400_BAD_REQUEST)
+        if spa and not spa.area_id:
+            return Response(
+                {'error': f"The selected spa '{spa.spa_name}' does not have a location (area) assigned."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(bulk_set_machines(ids, spa_id=spa.id if spa else None))
+
+class AccountHolderViewSet(ConditionalGetMixin, SparseQuerysetMixin, HistoryMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Account Holders
     """
@@ -179,4 +335,12 @@ class AccountHolderViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['full_name', 'designation']
     ordering_fields = ['full_name', 'created_at']
-    ordering = ['full_name']
\ No newline at end of file
+    ordering = ['full_name']
+
+
+class AccountHolderAutocompleteView(AutocompleteView):
+    """Account holder picker: ``q`` matches the start of the holder's name"""
+    name = 'account-holders'
+    model = AccountHolder
+    search_fields = ('full_name_norm',)
+    label_fields = ('full_name', 'designation')
@@ -0,0 +1,36 @@
+"""
+Cache backends counting hits and misses into cache_requests_total
+
+Drop-in replacements for the stock backends; configure them in CACHES.
+"""
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from . import metrics
+
+_MISSING = object()
+
+
+class CacheMetricsMixin:
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        hit = value is not _MISSING
+        if metrics.is_enabled():
+            metrics.record_cache_lookup(key, hit)
+        return value if hit else default
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        if metrics.is_enabled():
+            for key in keys:
+                metrics.record_cache_lookup(key, key in found)
+        return found
+
+
+class InstrumentedLocMemCache(CacheMetricsMixin, LocMemCache):
+    pass
+
+
+class InstrumentedRedisCache(CacheMetricsMixin, RedisCache):
+    pass
@@ -0,0 +1,45 @@
+from . import metrics, profiling
+
+
+class ConnectionMetricsMixin:
+    """Track accepted connections of an AsyncWebsocketConsumer in the websocket_connections gauge"""
+
+    _metrics_connected = False
+
+    async def accept(self, subprotocol=None, headers=None):
+        await super().accept(subprotocol=subprotocol, headers=headers)
+        if not self._metrics_connected:
+            self._metrics_connected = True
+            metrics.WEBSOCKET_CONNECTIONS.labels(type(self).__name__).inc()
+
+    async def websocket_disconnect(self, message):
+        if self._metrics_connected:
+            self._metrics_connected = False
+            metrics.WEBSOCKET_CONNECTIONS.labels(type(self).__name__).dec()
+        await super().websocket_disconnect(message)
+
+
+class ProfiledConsumerMixin:
+    """
+    Profile a sample of websocket events handled by an AsyncWebsocketConsumer
+
+    Each dispatched message (connect, every frame received, every group
+    event) is one profile named ``<Consumer>.<message type>``; bytes pushed
+    to the client while it runs count as the response size.
+    """
+
+    async def dispatch(self, message):
+        if not profiling.is_enabled() or not profiling.should_sample():
+            return await super().dispatch(message)
+
+        token = profiling.start('websocket', f"{type(self).__name__}.{message.get('type')}")
+        try:
+            return await super().dispatch(message)
+        finally:
+            profiling.finish(token, path=self.scope.get('path'))
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        profile = profiling.current()
+        if profile is not None:
+            profile.response_bytes += len(text_data.encode()) if text_data is not None else len(bytes_data or b'')
+        await super().send(text_data=text_data, bytes_data=bytes_data, close=close)
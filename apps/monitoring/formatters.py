@@ -0,0 +1,23 @@
+import json
+import logging
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line
+
+    A dict passed as ``extra={'profile': ...}`` is merged into the top level
+    so log pipelines can index its fields directly.
+    """
+
+    def format(self, record):
+        payload = {
+            'level': record.levelname,
+            'time': self.formatTime(record),
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        payload.update(getattr(record, 'profile', None) or {})
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
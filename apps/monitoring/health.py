@@ -0,0 +1,184 @@
+"""
+Readiness checks for load balancers
+
+Each dependency check runs in a shared thread pool and the whole probe is
+bounded by HEALTH['TIMEOUT']; a check that has not finished by then counts
+as failed. A pool thread cannot be cancelled, so every check also bounds
+its own client: the database check uses a separate connection opened with
+connect/read timeouts, the channel layer round trip is wrapped in
+asyncio.wait_for, and the Redis cache has socket timeouts in CACHES. The report is kept in process memory for HEALTH['CACHE_SECONDS']
+(not in the default cache, which is itself being checked), so frequent
+probes from several balancers cost one round of checks per window. One
+probe refreshes an expired report while the others keep answering from
+the previous one instead of queueing behind the checks.
+"""
+import asyncio
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+# Enough for one probe of every check plus one set still stuck after a timeout
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='readiness')
+_lock = threading.Lock()
+_refreshed = threading.Condition(_lock)
+_refreshing = False
+_last_report = None
+_last_checked = 0.0
+
+
+def get_setting(name):
+    return settings.HEALTH[name]
+
+
+def probe_options(vendor, options, timeout):
+    """
+    Connection OPTIONS for a readiness probe: the configured ones without
+    the pool, plus the driver's own timeouts so a hung server fails the
+    check instead of holding a pool thread
+    """
+    options = {key: value for key, value in options.items() if key != 'pool'}
+    seconds = max(1, math.ceil(timeout))
+    if vendor == 'mysql':
+        options.update(connect_timeout=seconds, read_timeout=seconds, write_timeout=seconds)
+    elif vendor == 'postgresql':
+        # libpq rounds connect_timeout below 2 seconds up to 2
+        options.update(connect_timeout=max(2, seconds))
+        options['options'] = f"{options.get('options', '')} -c statement_timeout={round(timeout * 1000)}".strip()
+    elif vendor == 'sqlite':
+        options.update(timeout=timeout)
+    return options
+
+
+def check_database():
+    timeout = get_setting('TIMEOUT')
+    for alias in connections:
+        # A connection of its own: the thread's shared one has no timeouts
+        # and may come from the pool the probe is meant to check
+        probe = connections.create_connection(alias)
+        probe.settings_dict = {
+            **probe.settings_dict,
+            'OPTIONS': probe_options(probe.vendor, probe.settings_dict.get('OPTIONS', {}), timeout),
+        }
+        try:
+            with probe.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        finally:
+            probe.close()
+
+
+def check_channel_layer():
+    layer = get_channel_layer()
+    if layer is None:
+        raise RuntimeError('no channel layer configured')
+
+    async def round_trip():
+        channel = await layer.new_channel()
+        await layer.send(channel, {'type': 'health.ping'})
+        message = await layer.receive(channel)
+        if message.get('type') != 'health.ping':
+            raise RuntimeError('unexpected message on health channel')
+
+    async def bounded():
+        # Cancels the receive, which would otherwise wait for a reply forever
+        await asyncio.wait_for(round_trip(), timeout=get_setting('TIMEOUT'))
+
+    async_to_sync(bounded)()
+
+
+def check_cache():
+    key = f'health:{uuid.uuid4().hex}'
+    cache.set(key, 1, timeout=10)
+    try:
+        if cache.get(key) != 1:
+            raise RuntimeError('cache did not return the value just set')
+    finally:
+        cache.delete(key)
+
+
+def check_media():
+    with tempfile.NamedTemporaryFile(dir=settings.MEDIA_ROOT, prefix='.health-') as handle:
+        handle.write(b'ok')
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+CHECKS = {
+    'database': check_database,
+    'channel_layer': check_channel_layer,
+    'cache': check_cache,
+    'media': check_media,
+}
+
+
+def _timed(check):
+    started = time.perf_counter()
+    error = None
+    try:
+        check()
+    except Exception as exc:
+        error = type(exc).__name__
+    return error, time.perf_counter() - started
+
+
+def run_checks():
+    """
+    Returns:
+        {'status': 'ok' | 'unavailable', 'checks': {name: {'ok', 'latency_ms'[, 'error']}}}
+
+    Errors are reported by exception class only so the public probe does not
+    leak hostnames or credentials.
+    """
+    timeout = get_setting('TIMEOUT')
+    futures = {name: _executor.submit(_timed, check) for name, check in CHECKS.items()}
+    wait(futures.values(), timeout=timeout)
+
+    results = {}
+    for name, future in futures.items():
+        if future.done():
+            error, seconds = future.result()
+        else:
+            error, seconds = 'Timeout', timeout
+        result = {'ok': error is None, 'latency_ms': round(seconds * 1000, 2)}
+        if error is not None:
+            result['error'] = error
+        results[name] = result
+
+    healthy = all(result['ok'] for result in results.values())
+    return {'status': 'ok' if healthy else 'unavailable', 'checks': results}
+
+
+def get_report():
+    """Latest readiness report, re-checked at most once per CACHE_SECONDS"""
+    global _last_report, _last_checked, _refreshing
+    with _lock:
+        expired = _last_report is None or time.monotonic() - _last_checked >= get_setting('CACHE_SECONDS')
+        if not expired:
+            return _last_report
+        if _refreshing:
+            if _last_report is None:
+                # Nothing to serve before the first round finishes
+                _refreshed.wait_for(lambda: not _refreshing)
+            return _last_report
+        _refreshing = True
+
+    report = None
+    try:
+        report = run_checks()
+    finally:
+        with _lock:
+            if report is not None:
+                _last_report = report
+                _last_checked = time.monotonic()
+            _refreshing = False
+            _refreshed.notify_all()
+    return report
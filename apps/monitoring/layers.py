@@ -0,0 +1,27 @@
+"""
+Channel layers timing group_send into channel_layer_group_send_seconds
+
+Drop-in replacements for the stock layers; configure them in CHANNEL_LAYERS.
+"""
+import time
+from channels.layers import InMemoryChannelLayer
+from channels_redis.core import RedisChannelLayer
+from . import metrics
+
+
+class GroupSendMetricsMixin:
+
+    async def group_send(self, group, message):
+        started = time.perf_counter()
+        try:
+            return await super().group_send(group, message)
+        finally:
+            metrics.GROUP_SEND_LATENCY.observe(time.perf_counter() - started)
+
+
+class InstrumentedInMemoryChannelLayer(GroupSendMetricsMixin, InMemoryChannelLayer):
+    pass
+
+
+class InstrumentedRedisChannelLayer(GroupSendMetricsMixin, RedisChannelLayer):
+    pass
@@ -0,0 +1,77 @@
+"""
+Management command to benchmark response compression
+Fetches an API response (default: a 500-row machine page) without
+compression, then encodes it with several gzip levels and brotli qualities
+and prints the compressed size, ratio and CPU milliseconds per MB of input,
+both as one buffer and as a stream of small chunks (the CSV export path).
+
+Usage: python manage.py benchmark_compression [--path /api/machines/?page_size=500] [--file payload.json] [--repeat 20]
+"""
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+from apps.users.models import User
+from spa_central.compression import ENCODERS, compress_bytes, compress_stream, get_setting
+
+GZIP_LEVELS = (1, 4, 6, 9)
+BROTLI_QUALITIES = (1, 4, 5, 7)
+STREAM_CHUNK_SIZE = 200  # roughly one CSV row
+
+
+class Command(BaseCommand):
+    help = 'Measure CPU cost per MB and ratio of gzip/brotli settings on an API payload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/machines/?page_size=500', help='API path to fetch the payload from')
+        parser.add_argument('--file', help='Benchmark this file instead of fetching --path')
+        parser.add_argument('--repeat', type=int, default=20, help='Encodings per setting (default: 20)')
+
+    def handle(self, *args, **options):
+        payload = self._payload(options)
+        self.stdout.write(f'Payload: {len(payload)} bytes\n')
+
+        settings_to_try = [('gzip', level) for level in GZIP_LEVELS]
+        if 'br' in ENCODERS:
+            settings_to_try += [('br', quality) for quality in BROTLI_QUALITIES]
+        else:
+            self.stdout.write('Brotli is not installed; only gzip is measured\n')
+
+        header = f"{'encoding':<10}{'level':>6}{'bytes':>10}{'ratio':>8}{'cpu ms/MB':>12}{'stream ms/MB':>14}{'stream bytes':>14}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        megabytes = len(payload) / (1024 * 1024)
+        chunks = [payload[index:index + STREAM_CHUNK_SIZE] for index in range(0, len(payload), STREAM_CHUNK_SIZE)]
+        flush_size = get_setting('STREAM_FLUSH_SIZE')
+
+        for encoding, level in settings_to_try:
+            encoder_class = ENCODERS[encoding]
+            buffered, size = self._time(options['repeat'], lambda: compress_bytes(encoder_class(level), payload))
+            streamed, stream_size = self._time(
+                options['repeat'], lambda: b''.join(compress_stream(encoder_class(level), chunks, flush_size))
+            )
+            self.stdout.write(
+                f'{encoding:<10}{level:>6}{size:>10}{len(payload) / size:>8.1f}'
+                f'{buffered / megabytes:>12.1f}{streamed / megabytes:>14.1f}{stream_size:>14}'
+            )
+
+    def _payload(self, options):
+        if options['file']:
+            with open(options['file'], 'rb') as handle:
+                return handle.read()
+        client = APIClient()
+        client.force_authenticate(User(email='benchmark@localhost', user_type='admin'))
+        response = client.get(options['path'], HTTP_ACCEPT_ENCODING='identity')
+        if response.status_code != 200:
+            raise CommandError(f"GET {options['path']} returned {response.status_code}")
+        return response.content
+
+    @staticmethod
+    def _time(repeat, encode):
+        """Median CPU milliseconds of ``encode`` and the size it produced"""
+        timings = []
+        for _ in range(repeat):
+            started = time.process_time()
+            output = encode()
+            timings.append((time.process_time() - started) * 1000)
+        return statistics.median(timings), len(output)
@@ -0,0 +1,112 @@
+"""
+Prometheus metrics for HTTP, websocket, DB, cache, channel-layer and email activity
+
+Collectors are module-level so every process registers them once. When
+PROMETHEUS_MULTIPROC_DIR is set before this module is imported (as the
+gunicorn/daphne entrypoints do), prometheus_client writes each process's
+values to mmap files in that directory, and ``render`` aggregates them.
+Otherwise the in-process registry is exported as-is (runserver, shell).
+"""
+import os
+import re
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+# Views that did not resolve share one label to keep cardinality bounded
+UNRESOLVED_VIEW = 'unresolved'
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by view/action',
+    ['view', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter('http_requests_total', 'HTTP responses by view/action and status', ['view', 'method', 'status'])
+REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests being handled', multiprocess_mode='livesum')
+
+DB_QUERIES = Counter('db_queries_total', 'SQL statements executed', ['alias'])
+DB_QUERY_ERRORS = Counter('db_query_errors_total', 'SQL statements that raised', ['alias'])
+DB_QUERY_SECONDS = Counter('db_query_seconds_total', 'Time spent executing SQL', ['alias'])
+
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by key namespace and result', ['namespace', 'result'])
+
+WEBSOCKET_CONNECTIONS = Gauge(
+    'websocket_connections', 'Open websocket connections per consumer', ['consumer'], multiprocess_mode='livesum',
+)
+GROUP_SEND_LATENCY = Histogram(
+    'channel_layer_group_send_seconds', 'Channel layer group_send latency',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+EMAILS_SENT = Counter('emails_sent_total', 'Emails by delivery result', ['result'])
+
+_NAMESPACE = re.compile(r'[A-Za-z]+')
+
+
+def is_enabled():
+    return settings.METRICS['ENABLED']
+
+
+def cache_namespace(key):
+    """'machine:stats:...' -> 'machine', 'throttle_anon_1.2.3.4' -> 'throttle'"""
+    match = _NAMESPACE.match(str(key))
+    return match.group(0) if match else 'other'
+
+
+def record_cache_lookup(key, hit):
+    CACHE_REQUESTS.labels(cache_namespace(key), 'hit' if hit else 'miss').inc()
+
+
+def count_query(execute, sql, params, many, context):
+    """Execute wrapper feeding the DB counters"""
+    alias = context['connection'].alias
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    except Exception:
+        DB_QUERY_ERRORS.labels(alias).inc()
+        raise
+    finally:
+        DB_QUERIES.labels(alias).inc()
+        DB_QUERY_SECONDS.labels(alias).inc(time.perf_counter() - started)
+
+
+def _install_query_counter(sender, connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def install():
+    if not is_enabled():
+        return
+    connection_created.connect(_install_query_counter, dispatch_uid='metrics_query_counter')
+
+
+@contextmanager
+def track_email():
+    """Count an email send by its result"""
+    try:
+        yield
+    except Exception:
+        EMAILS_SENT.labels('failed').inc()
+        raise
+    else:
+        EMAILS_SENT.labels('sent').inc()
+
+
+def render():
+    """
+    Returns:
+        (body bytes, content type) in the Prometheus text format
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
@@ -0,0 +1,126 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from . import metrics, profiling
+
+
+class MetricsMiddleware:
+    """
+    Request latency, status and in-flight metrics (see apps/monitoring/metrics.py)
+
+    Listed first so the latency covers the whole middleware stack. Requests
+    are labelled by view name (``spa-list``, ``spa-statistics``), never by
+    raw path.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = metrics.is_enabled()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        started = self._start()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._finish(request, started, status)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        started = self._start()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._finish(request, started, status)
+
+    @staticmethod
+    def _start():
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        return time.perf_counter()
+
+    @staticmethod
+    def _finish(request, started, status):
+        metrics.REQUESTS_IN_FLIGHT.dec()
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match.route) if match is not None else metrics.UNRESOLVED_VIEW
+        metrics.REQUEST_LATENCY.labels(view, request.method).observe(time.perf_counter() - started)
+        metrics.REQUESTS.labels(view, request.method, status).inc()
+
+
+class ProfilingMiddleware:
+    """
+    Profile a sample of HTTP requests (see apps/monitoring/profiling.py)
+
+    The view name is only known once the URL resolved, so the profile is
+    started under the path and renamed when the response comes back.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = profiling.is_enabled()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled or not profiling.should_sample():
+            return self.get_response(request)
+
+        token = profiling.start('http', request.path)
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            profiling.current().response_bytes = self._response_size(response)
+            return response
+        finally:
+            self._finish(request, token, status)
+
+    async def __acall__(self, request):
+        if not self.enabled or not profiling.should_sample():
+            return await self.get_response(request)
+
+        token = profiling.start('http', request.path)
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            profiling.current().response_bytes = self._response_size(response)
+            return response
+        finally:
+            self._finish(request, token, status)
+
+    @staticmethod
+    def _finish(request, token, status):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            profiling.current().name = match.view_name or match.route
+        profiling.finish(token, method=request.method, path=request.path, status=status)
+
+    @staticmethod
+    def _response_size(response):
+        if response.streaming:
+            return int(response.get('Content-Length') or 0)
+        return len(response.content)
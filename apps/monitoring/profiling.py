@@ -0,0 +1,240 @@
+"""
+Sampled per-request SQL and serializer profiling
+
+A sampled HTTP request (ProfilingMiddleware) or websocket event
+(ProfiledConsumerMixin) gets a RequestProfile in a context variable. Every
+database connection carries ``record_query`` as an execute wrapper, and
+``BaseSerializer.data`` is timed, so queries and serialization are charged
+to the active profile, including those run in ``database_sync_to_async``
+threads (asgiref copies the context into them). Unsampled work pays one
+context-variable lookup per query.
+
+Finished profiles are logged as JSON through the ``apps.monitoring.profiling``
+logger and folded into a per-view summary kept in the default cache, which
+is shared by every worker in production. The summary is read-modify-write
+without locking: concurrent samples can overwrite each other, which is
+acceptable for a sampling profiler.
+"""
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_KEY = 'profiling:summary'
+# Entries beyond this many views are dropped, least-sampled first
+SUMMARY_MAX_VIEWS = 500
+FINGERPRINT_MAX_LENGTH = 300
+
+_current_profile = ContextVar('current_profile', default=None)
+
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def get_setting(name):
+    return settings.PROFILING[name]
+
+
+def is_enabled():
+    return get_setting('SAMPLE_RATE') > 0
+
+
+def should_sample():
+    rate = get_setting('SAMPLE_RATE')
+    return rate >= 1 or random.random() < rate
+
+
+def fingerprint(sql):
+    """
+    Reduce a statement to its shape so repeats with other parameters match
+
+    ``WHERE id = %s`` already hides parameters; literals and ``IN`` lists
+    of any length are collapsed as well.
+    """
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class RequestProfile:
+    """Counters collected while one request or websocket event runs"""
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+        self.fingerprints = Counter()
+        self.response_bytes = 0
+
+    def duplicates(self):
+        """Statements repeated often enough to look like an N+1"""
+        threshold = get_setting('N_PLUS_ONE_THRESHOLD')
+        return [
+            {'sql': sql[:FINGERPRINT_MAX_LENGTH], 'count': count}
+            for sql, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+    def as_dict(self, **extra):
+        return {
+            'kind': self.kind,
+            'view': self.name,
+            'duration_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'queries': self.queries,
+            'db_ms': round(self.db_seconds * 1000, 2),
+            'serializer_ms': round(self.serializer_seconds * 1000, 2),
+            'response_bytes': self.response_bytes,
+            'duplicate_queries': self.duplicates(),
+            **extra,
+        }
+
+
+def start(kind, name):
+    """Begin profiling; returns the token for ``finish``"""
+    return _current_profile.set(RequestProfile(kind, name))
+
+
+def current():
+    return _current_profile.get()
+
+
+def finish(token, **extra):
+    """Stop the profile started with ``token``, log it and update the summary"""
+    profile = _current_profile.get()
+    _current_profile.reset(token)
+    if profile is None:
+        return None
+
+    data = profile.as_dict(**extra)
+    level = logging.WARNING if data['duplicate_queries'] else logging.INFO
+    logger.log(level, 'request profile', extra={'profile': data})
+    try:
+        _update_summary(data)
+    except Exception:
+        # A cache outage must not fail the request being profiled
+        logger.exception('Could not update the profiling summary')
+    return data
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper charging the query to the active profile, if any"""
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries += 1
+        profile.db_seconds += time.perf_counter() - started
+        profile.fingerprints[fingerprint(sql)] += 1
+
+
+def _install_query_recorder(sender, connection, **kwargs):
+    # connection_created fires again after a reconnect on the same wrapper
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _install_serializer_timer():
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data.fget
+
+    def timed_data(serializer):
+        profile = _current_profile.get()
+        if profile is None:
+            return original(serializer)
+        # Nested and list serializers call .data recursively; only the
+        # outermost call is timed
+        profile.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(serializer)
+        finally:
+            profile.serializer_depth -= 1
+            if not profile.serializer_depth:
+                profile.serializer_seconds += time.perf_counter() - started
+
+    BaseSerializer.data = property(timed_data)
+
+
+def install():
+    """Hook the query recorder and serializer timer in; no-op when sampling is off"""
+    if not is_enabled():
+        return
+    connection_created.connect(_install_query_recorder, dispatch_uid='profiling_query_recorder')
+    _install_serializer_timer()
+
+
+def _update_summary(data):
+    summary = cache.get(SUMMARY_CACHE_KEY) or {}
+    entry = summary.setdefault(data['view'], {
+        'kind': data['kind'],
+        'samples': 0,
+        'total_ms': 0.0,
+        'max_ms': 0.0,
+        'total_queries': 0,
+        'max_queries': 0,
+        'total_db_ms': 0.0,
+        'total_serializer_ms': 0.0,
+        'total_bytes': 0,
+        'n_plus_one_samples': 0,
+        'duplicate_queries': [],
+    })
+    entry['samples'] += 1
+    entry['total_ms'] += data['duration_ms']
+    entry['max_ms'] = max(entry['max_ms'], data['duration_ms'])
+    entry['total_queries'] += data['queries']
+    entry['max_queries'] = max(entry['max_queries'], data['queries'])
+    entry['total_db_ms'] += data['db_ms']
+    entry['total_serializer_ms'] += data['serializer_ms']
+    entry['total_bytes'] += data['response_bytes']
+    if data['duplicate_queries']:
+        entry['n_plus_one_samples'] += 1
+        entry['duplicate_queries'] = data['duplicate_queries'][:5]
+
+    if len(summary) > SUMMARY_MAX_VIEWS:
+        rarest = min(summary, key=lambda view: summary[view]['samples'])
+        del summary[rarest]
+    cache.set(SUMMARY_CACHE_KEY, summary, get_setting('SUMMARY_TIMEOUT'))
+
+
+def get_summary():
+    """Per-view averages, slowest first"""
+    rows = []
+    for view, entry in (cache.get(SUMMARY_CACHE_KEY) or {}).items():
+        samples = entry['samples']
+        rows.append({
+            'view': view,
+            'kind': entry['kind'],
+            'samples': samples,
+            'avg_ms': round(entry['total_ms'] / samples, 2),
+            'max_ms': entry['max_ms'],
+            'avg_queries': round(entry['total_queries'] / samples, 1),
+            'max_queries': entry['max_queries'],
+            'avg_db_ms': round(entry['total_db_ms'] / samples, 2),
+            'avg_serializer_ms': round(entry['total_serializer_ms'] / samples, 2),
+            'avg_bytes': round(entry['total_bytes'] / samples),
+            'n_plus_one_samples': entry['n_plus_one_samples'],
+            'duplicate_queries': entry['duplicate_queries'],
+        })
+    return sorted(rows, key=lambda row: row['avg_ms'], reverse=True)
+
+
+def reset_summary():
+    cache.delete(SUMMARY_CACHE_KEY)
@@ -0,0 +1,101 @@
+import asyncio
+import tempfile
+import threading
+import time
+from unittest import mock
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from . import health
+
+
+@override_settings(HEALTH={'TIMEOUT': 0.2, 'CACHE_SECONDS': 60})
+class ReadinessTests(TestCase):
+    """health.run_checks/get_report timeouts and report reuse"""
+
+    def setUp(self):
+        health._last_report, health._last_checked, health._refreshing = None, 0.0, False
+        self.addCleanup(setattr, health, '_last_report', None)
+
+    def test_checks_pass(self):
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            report = health.run_checks()
+        self.assertEqual(report['status'], 'ok', report)
+        self.assertEqual(set(report['checks']), set(health.CHECKS))
+
+    def test_hung_check_times_out(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        checks = {'stuck': lambda: release.wait(5), 'fine': lambda: None}
+        with mock.patch.dict(health.CHECKS, checks, clear=True):
+            started = time.monotonic()
+            report = health.run_checks()
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(report['status'], 'unavailable')
+        self.assertEqual(report['checks']['stuck'], {'ok': False, 'latency_ms': 200.0, 'error': 'Timeout'})
+        self.assertTrue(report['checks']['fine']['ok'])
+
+    def test_errors_report_class_only(self):
+        def failing():
+            raise ConnectionError('redis://secret@host')
+
+        with mock.patch.dict(health.CHECKS, {'cache': failing}, clear=True):
+            report = health.run_checks()
+        self.assertEqual(report['checks']['cache']['error'], 'ConnectionError')
+        self.assertNotIn('secret', str(report))
+
+    def test_channel_layer_receive_is_bounded(self):
+        class SilentLayer:
+            async def new_channel(self):
+                return 'health!1'
+
+            async def send(self, channel, message):
+                pass
+
+            async def receive(self, channel):
+                await asyncio.sleep(5)
+
+        with mock.patch.object(health, 'get_channel_layer', return_value=SilentLayer()):
+            started = time.monotonic()
+            with self.assertRaises(asyncio.TimeoutError):
+                health.check_channel_layer()
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_database_probe_uses_own_connection(self):
+        connection.ensure_connection()
+        shared = connection.connection
+        health.check_database()
+        self.assertIs(connection.connection, shared)
+
+    def test_report_is_reused(self):
+        with mock.patch.object(health, 'run_checks', return_value={'status': 'ok', 'checks': {}}) as run:
+            first = health.get_report()
+            self.assertIs(health.get_report(), first)
+            self.assertEqual(run.call_count, 1)
+            with override_settings(HEALTH={'TIMEOUT': 0.2, 'CACHE_SECONDS': 0}):
+                health.get_report()
+            self.assertEqual(run.call_count, 2)
+
+    def test_failed_refresh_keeps_previous_report(self):
+        with mock.patch.object(health, 'run_checks', return_value={'status': 'ok', 'checks': {}}):
+            first = health.get_report()
+        with override_settings(HEALTH={'TIMEOUT': 0.2, 'CACHE_SECONDS': 0}):
+            with mock.patch.object(health, 'run_checks', side_effect=RuntimeError):
+                with self.assertRaises(RuntimeError):
+                    health.get_report()
+        self.assertIs(health._last_report, first)
+        self.assertFalse(health._refreshing)
+
+
+class ProbeOptionsTests(SimpleTestCase):
+    """Driver timeouts added to the readiness probe's database connection"""
+
+    def test_mysql(self):
+        options = health.probe_options('mysql', {'charset': 'utf8mb4'}, 0.5)
+        self.assertEqual(options, {'charset': 'utf8mb4', 'connect_timeout': 1, 'read_timeout': 1, 'write_timeout': 1})
+
+    def test_postgresql_drops_pool(self):
+        options = health.probe_options('postgresql', {'pool': {'max_size': 10}}, 2.0)
+        self.assertEqual(options, {'connect_timeout': 2, 'options': '-c statement_timeout=2000'})
+
+    def test_sqlite(self):
+        self.assertEqual(health.probe_options('sqlite', {}, 1.5), {'timeout': 1.5})
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import ProfilingSummaryView
+
+urlpatterns = [
+    path('monitoring/profiling/', ProfilingSummaryView.as_view(), name='profiling-summary'),
+]
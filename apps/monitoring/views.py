@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from apps.users.permissions import IsAdminOnly
+from . import health, metrics, profiling
+
+
+class ProfilingSummaryView(APIView):
+    """
+    Sampled request profiles aggregated per view, slowest first
+
+    GET returns the summary; DELETE clears it (e.g. after a deploy).
+    Admin accounts only (user_type, not Django's is_staff flag).
+    """
+    permission_classes = [IsAdminOnly]
+
+    def get(self, request):
+        return Response({
+            'sample_rate': profiling.get_setting('SAMPLE_RATE'),
+            'n_plus_one_threshold': profiling.get_setting('N_PLUS_ONE_THRESHOLD'),
+            'views': profiling.get_summary(),
+        })
+
+    def delete(self, request):
+        profiling.reset_summary()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint
+
+    Plain Django view so scrapes skip DRF authentication and throttling;
+    the scraper must send METRICS_TOKEN as a bearer token. Without a
+    configured token the endpoint is closed, since the metrics expose
+    route names, latencies and cache/channel-layer internals.
+    """
+    token = settings.METRICS['TOKEN']
+    if not token:
+        return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not constant_time_compare(header, f'Bearer {token}'):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    body, content_type = metrics.render()
+    return HttpResponse(body, content_type=content_type)
+
+
+@require_GET
+def readiness_view(request):
+    """
+    Readiness probe: 503 while the DB, channel layer, cache or media
+    storage is failing, so balancers take the instance out of rotation.
+    Liveness stays on the trivial /health/ route.
+    """
+    report = health.get_report()
+    code = status.HTTP_200_OK if report['status'] == 'ok' else status.HTTP_503_SERVICE_UNAVAILABLE
+    response = JsonResponse(report, status=code)
+    response['Cache-Control'] = 'no-store'
+    return response
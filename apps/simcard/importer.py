@@ -0,0 +1,193 @@
+"""
+Bulk SIM card import from carrier CSV batches
+
+Every row is validated first (including ``mobile_validator``); spa codes
+are resolved through one in-memory map, and both unique columns are
+checked against the payload and the table with one ``IN`` query each.
+Rows whose mobile number and serial number already belong to the same
+SIM update it, new pairs create one, and anything else is reported as a
+conflict. Valid rows are then upserted with ``bulk_create`` in a single
+transaction, so a batch is either fully applied or not at all unless
+partial imports are allowed.
+"""
+
+import csv
+import io
+from django.db import connection, transaction
+from rest_framework import serializers
+from apps.audit.models import ChangeLogEntry
+from apps.audit.recorder import log, initial_values, log_many
+from apps.spas.models import Spa
+from spa_central.bulk import BulkResult
+from .models import SimCard
+from .serializers import SimCardImportRowSerializer
+from .utils import invalidate_simcard_statistics
+
+IMPORT_MAX_ROWS = 5000
+IMPORT_BATCH_SIZE = 500
+
+CSV_COLUMNS = ['date_of_issue', 'mobile_number', 'simcard_serial_number', 'sim_owner_name', 'status', 'spa_code']
+UPSERT_FIELDS = ['date_of_issue', 'mobile_number', 'sim_owner_name', 'status', 'spa', 'updated_by', 'updated_at']
+
+
+def read_csv(file_or_text):
+    """
+    Parse a carrier CSV into row dicts keyed by CSV_COLUMNS
+
+    Header names are matched case-insensitively; unknown columns are ignored.
+    """
+    if isinstance(file_or_text, bytes):
+        file_or_text = file_or_text.decode('utf-8-sig')
+    if isinstance(file_or_text, str):
+        file_or_text = io.StringIO(file_or_text)
+    reader = csv.DictReader(file_or_text)
+    if not reader.fieldnames:
+        raise serializers.ValidationError('The CSV file is empty.')
+
+    columns = {name: name.strip().lower().replace(' ', '_') for name in reader.fieldnames}
+    missing = {'date_of_issue', 'mobile_number', 'simcard_serial_number', 'sim_owner_name'} - set(columns.values())
+    if missing:
+        raise serializers.ValidationError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+
+    return [
+        {columns[name]: value for name, value in row.items() if name in columns and columns[name] in CSV_COLUMNS}
+        for row in reader
+    ]
+
+
+def _validate_rows(rows, result):
+    serializer = SimCardImportRowSerializer()
+    validated = [None] * len(rows)
+    for index, row in enumerate(rows):
+        try:
+            validated[index] = serializer.run_validation(row)
+        except serializers.ValidationError as exc:
+            result.merge_errors(index, exc.detail)
+    return validated
+
+
+def _resolve_spas(validated, result):
+    """Map spa codes to ids with one query"""
+    codes = {data['spa_code'] for data in validated if data and data.get('spa_code')}
+    spa_ids = dict(Spa.objects.filter(spa_code__in=codes).values_list('spa_code', 'id'))
+    for index, data in enumerate(validated):
+        if data and data.get('spa_code') and data['spa_code'] not in spa_ids:
+            result.add_error(index, 'spa_code', f"Spa with code '{data['spa_code']}' does not exist.")
+    return spa_ids
+
+
+def _match_existing(validated, result):
+    """
+    Check both unique columns against the payload and the table
+
+    Returns:
+        {row index: existing SimCard} for rows that update a SIM
+    """
+    first_seen = {'mobile_number': {}, 'simcard_serial_number': {}}
+    for index, data in enumerate(validated):
+        if not data:
+            continue
+        for field, seen in first_seen.items():
+            if data[field] in seen:
+                result.add_error(index, field, f'Duplicate value in import (row {seen[data[field]] + 1}).')
+            else:
+                seen[data[field]] = index
+
+    by_mobile = SimCard.objects.in_bulk(list(first_seen['mobile_number']), field_name='mobile_number')
+    by_serial = SimCard.objects.in_bulk(list(first_seen['simcard_serial_number']), field_name='simcard_serial_number')
+
+    existing = {}
+    for index, data in enumerate(validated):
+        if not data or not result.is_valid(index):
+            continue
+        by_number = by_mobile.get(data['mobile_number'])
+        by_card = by_serial.get(data['simcard_serial_number'])
+        if by_number and by_card and by_number.pk == by_card.pk:
+            existing[index] = by_card
+        elif by_number:
+            result.add_error(
+                index, 'mobile_number',
+                f"Mobile number already belongs to SIM {by_number.simcard_serial_number}."
+            )
+        elif by_card:
+            result.add_error(
+                index, 'simcard_serial_number',
+                f"Serial number already belongs to mobile number {by_card.mobile_number}."
+            )
+    return existing
+
+
+def _upsert(simcards):
+    unique_fields = ['simcard_serial_number'] if connection.features.supports_update_conflicts_with_target else None
+    SimCard.objects.bulk_create(
+        simcards,
+        batch_size=IMPORT_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=UPSERT_FIELDS,
+    )
+
+
+def import_simcards(rows, user=None, allow_partial=False, dry_run=False):
+    """
+    Validate and upsert SIM card rows (dicts keyed by CSV_COLUMNS)
+
+    Returns:
+        (report body, has_errors)
+    """
+    result = BulkResult(len(rows))
+    validated = _validate_rows(rows, result)
+    spa_ids = _resolve_spas(validated, result)
+    existing = _match_existing(validated, result)
+
+    if dry_run:
+        for index in existing:
+            result.rows[index]['status'] = 'would_update'
+        return result.finish('would_create'), bool(result.error_count)
+    if result.error_count and not allow_partial:
+        return result.finish('not_applied'), True
+
+    simcards, created, updated = [], [], []
+    for index, data in enumerate(validated):
+        if not result.is_valid(index):
+            continue
+        current = existing.get(index)
+        code = data.get('spa_code')
+        values = {
+            'date_of_issue': data['date_of_issue'],
+            'mobile_number': data['mobile_number'],
+            'simcard_serial_number': data['simcard_serial_number'],
+            'sim_owner_name': data['sim_owner_name'],
+            # Blank optional columns keep the current value on updates
+            'status': data.get('status') or (current.status if current else SimCard.STATUS_ACTIVE),
+            'spa_id': spa_ids[code] if code else (current.spa_id if current else None),
+            'updated_by': user,
+        }
+        simcard = SimCard(created_by=user, **values)
+        simcards.append(simcard)
+        if current:
+            for field, value in values.items():
+                setattr(current, field, value)
+            updated.append(current)
+            result.rows[index].update(status='updated', id=current.pk)
+        else:
+            created.append((index, simcard))
+            result.rows[index]['status'] = 'created'
+
+    with transaction.atomic():
+        _upsert(simcards)
+        # bulk_create skips post_save; log the change history explicitly
+        log_many(updated, ChangeLogEntry.ACTION_UPDATE)
+        # Upserts do not return ids on every backend; fetch new ones in one query
+        new_ids = dict(
+            SimCard.objects.filter(
+                simcard_serial_number__in=[simcard.simcard_serial_number for _index, simcard in created]
+            ).values_list('simcard_serial_number', 'id')
+        )
+        for index, simcard in created:
+            simcard.pk = new_ids[simcard.simcard_serial_number]
+            result.rows[index]['id'] = simcard.pk
+            log(SimCard, simcard.pk, ChangeLogEntry.ACTION_CREATE, initial_values(simcard))
+        invalidate_simcard_statistics()
+
+    return result.finish('created'), bool(result.error_count)
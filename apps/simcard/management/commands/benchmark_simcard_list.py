@@ -0,0 +1,169 @@
+"""
+Management command to benchmark the SIM card list endpoint
+Seeds synthetic SIM rows (default 100k), then times the filtered/ordered
+list requests the dashboard makes, once without the SimCard Meta indexes
+and once with them, and prints a before/after table.
+
+Usage: python manage.py benchmark_simcard_list --settings=benchmarks.settings [--rows 100000] [--repeat 5] [--keep]
+It drops and recreates indexes and bulk-deletes rows, so it refuses to run
+outside benchmarks.settings, which points at a dedicated database.
+"""
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.simcard.models import SimCard
+from apps.simcard.utils import invalidate_simcard_statistics
+from apps.spas.models import Spa
+from apps.users.models import User
+
+BENCH_SETTINGS = 'benchmarks.settings'
+BENCH_PREFIX = 'BENCH-'
+SEED_BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the SIM card list endpoint over synthetic rows with and without indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Synthetic SIM rows to seed (default: 100000)')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per scenario (default: 5)')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic rows afterwards')
+        parser.add_argument('--no-compare', action='store_true', help='Only measure the current schema')
+
+    def handle(self, *args, **options):
+        if settings.SETTINGS_MODULE != BENCH_SETTINGS:
+            raise CommandError(
+                f'Refusing to drop indexes on {connection.settings_dict["NAME"]}: '
+                f'run with --settings={BENCH_SETTINGS} (a dedicated benchmark database)'
+            )
+        self._seed(options['rows'])
+        spa_id = SimCard.objects.filter(
+            simcard_serial_number__startswith=BENCH_PREFIX, spa__isnull=False
+        ).values_list('spa_id', flat=True).first()
+
+        scenarios = [
+            ('default order', ''),
+            ('status filter', '?status=suspended'),
+            ('order by issue date', '?ordering=date_of_issue'),
+            ('status + issue date', '?status=active&ordering=date_of_issue'),
+            ('order by mobile', '?ordering=mobile_number'),
+        ]
+        if spa_id:
+            # Without spas in the database the filter is rejected as an invalid choice
+            scenarios.insert(2, ('spa filter', f'?spa={spa_id}'))
+
+        try:
+            results = {}
+            if not options['no_compare']:
+                self._set_indexes(enabled=False)
+                try:
+                    results['before'] = self._run(scenarios, options['repeat'])
+                finally:
+                    self._set_indexes(enabled=True)
+            results['after'] = self._run(scenarios, options['repeat'])
+            self._report(scenarios, results)
+        finally:
+            if not options['keep']:
+                self._cleanup()
+            invalidate_simcard_statistics()
+
+    def _seed(self, rows):
+        existing = SimCard.objects.filter(simcard_serial_number__startswith=BENCH_PREFIX).count()
+        missing = rows - existing
+        if missing <= 0:
+            self.stdout.write(f'Using {existing} existing synthetic rows')
+            return
+
+        self.stdout.write(f'Seeding {missing} synthetic SIM rows...')
+        spa_ids = list(Spa.objects.values_list('id', flat=True)[:500]) or [None]
+        statuses = [SimCard.STATUS_ACTIVE] * 7 + [SimCard.STATUS_SUSPENDED, SimCard.STATUS_CLOSED, SimCard.STATUS_LOST]
+        rng = random.Random(42)
+        start = date.today() - timedelta(days=5 * 365)
+
+        batch = []
+        for number in range(existing, rows):
+            batch.append(SimCard(
+                date_of_issue=start + timedelta(days=rng.randrange(5 * 365)),
+                mobile_number=str(6000000000 + number),
+                simcard_serial_number=f'{BENCH_PREFIX}{number:08d}',
+                sim_owner_name=f'Bench Owner {number}',
+                status=rng.choice(statuses),
+                spa_id=rng.choice(spa_ids) if rng.random() < 0.9 else None,
+            ))
+            if len(batch) >= SEED_BATCH_SIZE:
+                SimCard.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            SimCard.objects.bulk_create(batch)
+
+        # auto_now_add stamps every row with the same time; spread created_at
+        # so ordering by it is realistic
+        now = timezone.now()
+        ids = SimCard.objects.filter(
+            simcard_serial_number__startswith=BENCH_PREFIX
+        ).order_by('id').values_list('id', flat=True)[existing:]
+        updates = [SimCard(id=sim_id, created_at=now - timedelta(minutes=rng.randrange(5 * 365 * 24 * 60))) for sim_id in ids]
+        SimCard.objects.bulk_update(updates, ['created_at'], batch_size=SEED_BATCH_SIZE)
+
+    def _set_indexes(self, enabled):
+        with connection.schema_editor() as editor:
+            for index in SimCard._meta.indexes:
+                if enabled:
+                    editor.add_index(SimCard, index)
+                else:
+                    editor.remove_index(SimCard, index)
+
+    def _run(self, scenarios, repeat):
+        # The default 'testserver' host fails ALLOWED_HOSTS and every request would time the error page
+        host = next((host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')), 'localhost')
+        client = APIClient(HTTP_HOST=host, SERVER_NAME=host)
+        client.force_authenticate(User(email='benchmark@localhost', user_type='admin'))
+
+        results = {}
+        for label, query in scenarios:
+            timings, db_timings, queries, size = [], [], 0, 0
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(f'/api/simcards/{query}')
+                    timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f'{label}: GET /api/simcards/{query} returned {response.status_code}')
+                db_timings.append(sum(float(item['time']) for item in captured.captured_queries) * 1000)
+                queries = len(captured)
+                size = len(response.content)
+            results[label] = {
+                'ms': statistics.median(timings),
+                'db_ms': statistics.median(db_timings),
+                'queries': queries,
+                'bytes': size,
+            }
+        return results
+
+    def _report(self, scenarios, results):
+        columns = ''.join(f'{phase + " ms":>12}{phase + " db ms":>15}' for phase in results)
+        header = f"{'scenario':<24}{columns}{'queries':>9}{'bytes':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for label, _query in scenarios:
+            timings = ''.join(
+                f"{results[phase][label]['ms']:>12.1f}{results[phase][label]['db_ms']:>15.1f}" for phase in results
+            )
+            after = results['after'][label]
+            self.stdout.write(f"{label:<24}{timings}{after['queries']:>9}{after['bytes']:>10}")
+
+    def _cleanup(self):
+        # Raw delete: synthetic rows must not flood the change log via signals
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(SimCard._meta.db_table)} WHERE simcard_serial_number LIKE %s',
+                [f'{BENCH_PREFIX}%'],
+            )
+        self.stdout.write('Removed synthetic rows')
@@ -0,0 +1,50 @@
+"""
+Management command to import a carrier SIM card batch from CSV
+Usage: python manage.py import_simcards batch.csv [--dry-run] [--allow-partial] [--user admin@example.com]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from apps.simcard.importer import import_simcards, read_csv
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Import SIM cards from a carrier CSV with a per-row report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Path to the carrier CSV file')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, do not write')
+        parser.add_argument('--allow-partial', action='store_true', help='Import valid rows even if some rows fail')
+        parser.add_argument('--user', help='Email of the user recorded as creator/updater')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.filter(email=options['user']).first()
+            if user is None:
+                raise CommandError(f"User '{options['user']}' not found")
+
+        try:
+            with open(options['csv_path'], encoding='utf-8-sig', newline='') as handle:
+                rows = read_csv(handle)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except ValidationError as exc:
+            raise CommandError(exc.detail[0] if isinstance(exc.detail, list) else exc.detail)
+
+        report, has_errors = import_simcards(
+            rows, user=user, allow_partial=options['allow_partial'], dry_run=options['dry_run']
+        )
+
+        for row in report['results']:
+            if row['status'] == 'error':
+                messages = '; '.join(
+                    f"{field}: {' '.join(errors)}" for field, errors in row['errors'].items()
+                )
+                # +2: header line and 1-based numbering
+                self.stdout.write(self.style.ERROR(f"Line {row['index'] + 2}: {messages}"))
+
+        summary = ', '.join(f'{status}: {count}' for status, count in sorted(report['summary'].items()))
+        if has_errors and not options['allow_partial'] and not options['dry_run']:
+            raise CommandError(f'Import aborted, nothing was written ({summary})')
+        self.stdout.write(self.style.SUCCESS(f'Import finished ({summary})'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simcard', '0001_initial'),
+        ('spas', '0007_spa_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='simcard',
+            index=models.Index(fields=['-created_at'], name='idx_sim_created'),
+        ),
+        migrations.AddIndex(
+            model_name='simcard',
+            index=models.Index(fields=['status', '-created_at'], name='idx_sim_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='simcard',
+            index=models.Index(fields=['spa', '-created_at'], name='idx_sim_spa_created'),
+        ),
+        migrations.AddIndex(
+            model_name='simcard',
+            index=models.Index(fields=['date_of_issue'], name='idx_sim_issue_date'),
+        ),
+        migrations.AddIndex(
+            model_name='simcard',
+            index=models.Index(fields=['status', 'date_of_issue'], name='idx_sim_status_issue_date'),
+        ),
+    ]
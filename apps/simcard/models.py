@@ -1,9 +1,10 @@
 from django.db import models
 from django.conf import settings
+from apps.audit.models import AuditedModel
 from django.core.validators import RegexValidator
 
 
-class SimCard(models.Model):
+class SimCard(AuditedModel, models.Model):
     STATUS_ACTIVE = 'active'
     STATUS_SUSPENDED = 'suspended'
     STATUS_CLOSED = 'closed'
@@ -64,6 +65,14 @@ class SimCard(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        # Match SimCardViewSet filter (status, spa) + ordering combinations
+        indexes = [
+            models.Index(fields=['-created_at'], name='idx_sim_created'),
+            models.Index(fields=['status', '-created_at'], name='idx_sim_status_created'),
+            models.Index(fields=['spa', '-created_at'], name='idx_sim_spa_created'),
+            models.Index(fields=['date_of_issue'], name='idx_sim_issue_date'),
+            models.Index(fields=['status', 'date_of_issue'], name='idx_sim_status_issue_date'),
+        ]
 
     def __str__(self):
         return f"{self.mobile_number} ({self.get_status_display()})"
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from spa_central.serializers import SparseFieldsetMixin
 from .models import SimCard
 
 
-class SimCardSerializer(serializers.ModelSerializer):
+class SimCardSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for SimCard model"""
 
     # Spa details
@@ -55,6 +56,16 @@ class SimCardSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at',
         ]
+        sparse_sources = {
+            'spa_name': ['spa__spa_name'],
+            'spa_code': ['spa__spa_code'],
+            'spa_address': ['spa__address'],
+            'area_name': ['spa__area__name'],
+            'city_name': ['spa__area__city__name'],
+            'state_name': ['spa__area__city__state__name'],
+            'created_by_name': ['created_by__first_name', 'created_by__last_name', 'created_by__email'],
+            'updated_by_name': ['updated_by__first_name', 'updated_by__last_name', 'updated_by__email'],
+        }
 
         read_only_fields = [
             'created_at',
@@ -92,3 +103,27 @@ class SimCardSerializer(serializers.ModelSerializer):
 
     def get_state_name(self, obj):
         return obj.spa.area.city.state.name if obj.spa and obj.spa.area and obj.spa.area.city and obj.spa.area.city.state else None
+
+
+class SimCardImportRowSerializer(serializers.Serializer):
+    """
+    One row of a carrier SIM import
+
+    Uniqueness is not checked here; the importer checks the whole batch
+    with one query per unique column instead of one query per row.
+    """
+    date_of_issue = serializers.DateField(input_formats=['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y'])
+    mobile_number = serializers.CharField(max_length=15, validators=[SimCard.mobile_validator])
+    simcard_serial_number = serializers.CharField(max_length=50)
+    sim_owner_name = serializers.CharField(max_length=100)
+    status = serializers.ChoiceField(choices=SimCard.STATUS_CHOICES, required=False, allow_blank=True)
+    spa_code = serializers.CharField(max_length=50, required=False, allow_blank=True)
+
+    def to_internal_value(self, data):
+        # Carrier sheets often carry stray spaces and dashes in numbers
+        data = {key: value.strip() if isinstance(value, str) else value for key, value in data.items()}
+        if data.get('mobile_number'):
+            data['mobile_number'] = data['mobile_number'].replace(' ', '').replace('-', '')
+        if data.get('status'):
+            data['status'] = data['status'].lower()
+        return super().to_internal_value(data)
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import SimCard
+from .utils import invalidate_simcard_statistics
+
+
+@receiver([post_save, post_delete], sender=SimCard)
+@receiver([post_save, post_delete], sender='spas.Spa')
+@receiver([post_save, post_delete], sender='location.State')
+@receiver([post_save, post_delete], sender='location.City')
+@receiver([post_save, post_delete], sender='location.Area')
+def simcard_statistics_changed(sender, **kwargs):
+    """Invalidate cached SIM statistics (spa locations and their names feed the state/city rollups)"""
+    invalidate_simcard_statistics()
@@ -1,3 +1,64 @@
+from datetime import date
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.location.models import State, City, Area
+from apps.spas.models import PrimaryOwner, Spa
+from apps.users.models import User
+from .models import SimCard
 
-# Create your tests here.
+
+class SimCardStatisticsTests(TestCase):
+    """statistics honours the list filters and is recomputed after location changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@example.com', password='x', first_name='Ada', last_name='Admin', user_type='admin',
+        ))
+        self.city = City.objects.create(name='Pune', state=State.objects.create(name='Maharashtra'))
+        self.area = Area.objects.create(name='Baner', city=self.city)
+        self.spa = Spa.objects.create(
+            spa_code='1001', spa_name='Lotus Spa', area=self.area,
+            primary_owner=PrimaryOwner.objects.create(fullname='Priya Owner'),
+        )
+        rows = (
+            ('9000000001', 'active', self.spa, date(2026, 1, 5)),
+            ('9000000002', 'lost', self.spa, date(2026, 2, 5)),
+            ('9000000003', 'active', None, date(2025, 12, 5)),
+        )
+        for mobile, status, spa, issued in rows:
+            SimCard.objects.create(
+                mobile_number=mobile, simcard_serial_number=f'SER{mobile}', sim_owner_name='Ravi Kumar',
+                status=status, spa=spa, date_of_issue=issued,
+            )
+
+    def statistics(self, **params):
+        response = self.client.get('/api/simcards/statistics/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_totals(self):
+        stats = self.statistics()
+        self.assertEqual(
+            {key: stats['totals'][key] for key in ('total_simcards', 'assigned', 'unassigned', 'active', 'lost')},
+            {'total_simcards': 3, 'assigned': 2, 'unassigned': 1, 'active': 2, 'lost': 1},
+        )
+        self.assertEqual(stats['issued_by_year'], [{'year': 2025, 'count': 1}, {'year': 2026, 'count': 2}])
+
+    def test_filters(self):
+        self.assertEqual(self.statistics(status='active')['totals']['total_simcards'], 2)
+        by_spa = self.statistics(spa=self.spa.id)
+        self.assertEqual((by_spa['totals']['total_simcards'], by_spa['totals']['unassigned']), (2, 0))
+        self.assertEqual(self.statistics(search='9000000003')['totals']['total_simcards'], 1)
+
+    def test_location_changes_invalidate(self):
+        cities = lambda: [row['spa__area__city__name'] for row in self.statistics()['by_city']]
+        self.assertEqual(cities(), ['Pune'])
+        self.city.name = 'Poona'
+        self.city.save()
+        self.assertEqual(cities(), ['Poona'])
+        self.area.delete()
+        stats = self.statistics()
+        self.assertEqual((stats['by_city'], stats['totals']['assigned_without_location']), ([], 2))
@@ -0,0 +1,26 @@
+"""
+Utility functions for SIM card statistics caching
+"""
+
+from spa_central.caching import invalidate, query_params_digest, versioned_key
+
+SIMCARD_STATS_CACHE_NAMESPACE = 'simcard:stats'
+SIMCARD_STATS_CACHE_TIMEOUT = 60 * 5  # Invalidated by signals, TTL is only a safety net
+
+
+def simcard_stats_cache_key(query_params):
+    """
+    Build the cache key for a statistics request
+
+    Args:
+        query_params: Request query parameters (filters/search)
+
+    Returns:
+        Cache key scoped to the current stats version and the filter set
+    """
+    return versioned_key(SIMCARD_STATS_CACHE_NAMESPACE, query_params_digest(query_params))
+
+
+def invalidate_simcard_statistics():
+    """Expire every cached statistics payload by bumping the version"""
+    invalidate(SIMCARD_STATS_CACHE_NAMESPACE)
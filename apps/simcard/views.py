@@ -1,14 +1,27 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, filters, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth, TruncYear
 
+from apps.audit.mixins import HistoryMixin
+from spa_central.mixins import ConditionalGetMixin, SparseQuerysetMixin
+from spa_central.bulk import request_flag
+from apps.users.permissions import IsAdminUser
+from .importer import import_simcards, read_csv, IMPORT_MAX_ROWS
 from .models import SimCard
 from .serializers import SimCardSerializer
+from .utils import simcard_stats_cache_key, SIMCARD_STATS_CACHE_TIMEOUT
 
 
-class SimCardViewSet(viewsets.ModelViewSet):
+class SimCardViewSet(ConditionalGetMixin, SparseQuerysetMixin, HistoryMixin, viewsets.ModelViewSet):
     """
     CRUD API for SimCard
     """
+    etag_related = ('spa', 'spa__area', 'spa__area__city', 'spa__area__city__state', 'created_by', 'updated_by')
     serializer_class = SimCardSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -71,3 +84,115 @@ class SimCardViewSet(viewsets.ModelViewSet):
         Auto-update updated_by
         """
         serializer.save(updated_by=self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def statistics(self, request):
+        """Get SIM card statistics (honours the list filters/search params)"""
+        cache_key = simcard_stats_cache_key(request.query_params)
+        stats = cache.get(cache_key)
+        if stats is None:
+            stats = self._build_statistics(self.filter_queryset(self.get_queryset()).order_by())
+            cache.set(cache_key, stats, SIMCARD_STATS_CACHE_TIMEOUT)
+        return Response(stats)
+
+    def _build_statistics(self, simcards):
+        """Compute statistics for the given SIM queryset with one grouped query per dimension"""
+        # Totals and status breakdown in a single conditional aggregate
+        aggregates = {
+            'total_simcards': Count('id'),
+            'unassigned': Count('id', filter=Q(spa__isnull=True)),
+            'assigned_without_location': Count('id', filter=Q(spa__isnull=False, spa__area__isnull=True)),
+        }
+        for status_code, _ in SimCard.STATUS_CHOICES:
+            aggregates[f'status_{status_code}'] = Count('id', filter=Q(status=status_code))
+        totals = simcards.aggregate(**aggregates)
+
+        status_counts = {
+            status_code: {
+                'label': status_label,
+                'count': totals[f'status_{status_code}'],
+            }
+            for status_code, status_label in SimCard.STATUS_CHOICES
+        }
+
+        # SIMs by location (through the spa)
+        by_state = simcards.filter(
+            spa__area__city__state__isnull=False
+        ).values(
+            'spa__area__city__state__id', 'spa__area__city__state__name'
+        ).annotate(
+            simcard_count=Count('id')
+        ).order_by('-simcard_count')
+
+        by_city = simcards.filter(
+            spa__area__city__isnull=False
+        ).values(
+            'spa__area__city__id', 'spa__area__city__name', 'spa__area__city__state__name'
+        ).annotate(
+            simcard_count=Count('id')
+        ).order_by('-simcard_count')
+
+        # Issue-date histograms
+        issued_by_month = simcards.annotate(
+            month=TruncMonth('date_of_issue')
+        ).values('month').annotate(
+            count=Count('id')
+        ).order_by('-month')[:24]
+
+        issued_by_year = simcards.annotate(
+            year=TruncYear('date_of_issue')
+        ).values('year').annotate(
+            count=Count('id')
+        ).order_by('year')
+
+        return {
+            'totals': {
+                'total_simcards': totals['total_simcards'],
+                'assigned': totals['total_simcards'] - totals['unassigned'],
+                'unassigned': totals['unassigned'],
+                'assigned_without_location': totals['assigned_without_location'],
+                **{status_code: totals[f'status_{status_code}'] for status_code, _ in SimCard.STATUS_CHOICES},
+            },
+            'status_breakdown': status_counts,
+            'by_state': list(by_state),
+            'by_city': list(by_city),
+            'issued_by_month': [
+                {'month': row['month'].strftime('%Y-%m'), 'count': row['count']}
+                for row in list(issued_by_month)[::-1]
+            ],
+            'issued_by_year': [
+                {'year': row['year'].year, 'count': row['count']}
+                for row in issued_by_year
+            ],
+        }
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def bulk_import(self, request):
+        """
+        Import a carrier batch of SIM cards
+
+        Upload a CSV as multipart ``file`` (columns: date_of_issue,
+        mobile_number, simcard_serial_number, sim_owner_name, optional status
+        and spa_code) or post JSON ``{"rows": [...]}`` with the same keys.
+        ``dry_run=true`` only validates; ``allow_partial=true`` applies the
+        valid rows even when others fail.
+        """
+        upload = request.FILES.get('file')
+        try:
+            rows = read_csv(upload.read()) if upload else request.data.get('rows')
+        except (ValidationError, UnicodeDecodeError) as exc:
+            detail = exc.detail[0] if isinstance(exc, ValidationError) else 'The CSV file must be UTF-8 encoded.'
+            return Response({'error': detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+            return Response({'error': 'Provide a CSV file or a non-empty rows list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > IMPORT_MAX_ROWS:
+            return Response({'error': f'At most {IMPORT_MAX_ROWS} SIM cards per import'}, status=status.HTTP_400_BAD_REQUEST)
+
+        allow_partial = request_flag(request, 'allow_partial')
+        report, has_errors = import_simcards(
+            rows, user=request.user, allow_partial=allow_partial, dry_run=request_flag(request, 'dry_run')
+        )
+        if has_errors and not allow_partial:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
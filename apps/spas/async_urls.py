@@ -0,0 +1,9 @@
+from django.urls import path
+from .async_views import SpaListView, SpaDetailView, SpaStatisticsView
+
+# Same paths and names as the router's routes in urls.py
+urlpatterns = [
+    path('spas/', SpaListView.as_view(), name='spa-list'),
+    path('spas/statistics/', SpaStatisticsView.as_view(), name='spa-statistics'),
+    path('spas/<int:pk>/', SpaDetailView.as_view(), name='spa-detail'),
+]
@@ -0,0 +1,23 @@
+"""ASGI-native reads for the spa dashboard (see spa_central/async_views.py)"""
+from spa_central.async_views import ViewSetListView, ViewSetRetrieveView, ViewSetReadView, gather_queries
+from .views import SpaViewSet
+
+
+class SpaListView(ViewSetListView):
+    viewset_class = SpaViewSet
+
+
+class SpaDetailView(ViewSetRetrieveView):
+    viewset_class = SpaViewSet
+
+
+class SpaStatisticsView(ViewSetReadView):
+    """SpaViewSet.statistics with its independent counts run concurrently"""
+    viewset_class = SpaViewSet
+    action = 'statistics'
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.get_viewset(request, kwargs)
+        queries = viewset.statistics_queries()
+        values = await gather_queries(*queries.values())
+        return self.respond(request, viewset._build_statistics(dict(zip(queries, values))))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spas', '0006_spa_google_drive_link_spamedia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spa',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:08
+
+from django.conf import settings
+from django.db import migrations, models
+from spa_central.models import normalize
+
+
+NORMALIZED = {
+    'Spa': {'spa_code_norm': 'spa_code', 'spa_name_norm': 'spa_name'},
+    'PrimaryOwner': {'fullname_norm': 'fullname'},
+    'SecondaryOwner': {'fullname_norm': 'fullname'},
+    'ThirdOwner': {'fullname_norm': 'fullname'},
+    'FourthOwner': {'fullname_norm': 'fullname'},
+}
+
+
+def fill_normalized(apps, schema_editor):
+    for model_name, fields in NORMALIZED.items():
+        model = apps.get_model('spas', model_name)
+        rows = list(model.objects.only(*fields.values()))
+        for row in rows:
+            for target, source in fields.items():
+                setattr(row, target, normalize(getattr(row, source)))
+        model.objects.bulk_update(rows, list(fields), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location', '0002_area_name_norm'),
+        ('spas', '0007_spa_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fourthowner',
+            name='fullname_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='primaryowner',
+            name='fullname_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='secondaryowner',
+            name='fullname_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='spa',
+            name='spa_code_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='spa',
+            name='spa_name_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='thirdowner',
+            name='fullname_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddIndex(
+            model_name='fourthowner',
+            index=models.Index(fields=['fullname_norm'], name='idx_fowner_fullname_norm', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='primaryowner',
+            index=models.Index(fields=['fullname_norm'], name='idx_powner_fullname_norm', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='secondaryowner',
+            index=models.Index(fields=['fullname_norm'], name='idx_sowner_fullname_norm', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='spa',
+            index=models.Index(fields=['spa_code_norm'], name='idx_spa_code_norm', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='spa',
+            index=models.Index(fields=['spa_name_norm'], name='idx_spa_name_norm', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='thirdowner',
+            index=models.Index(fields=['fullname_norm'], name='idx_towner_fullname_norm', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(fill_normalized, migrations.RunPython.noop),
+    ]
@@ -1,75 +1,103 @@
 # apps/spas/models.py
 from django.db import models
 from django.conf import settings
+from apps.audit.models import AuditedModel
+from spa_central.models import NormalizedFieldsModel
 
 
-class PrimaryOwner(models.Model):
+class PrimaryOwner(NormalizedFieldsModel):
     """Independent Primary Owner model"""
     fullname = models.CharField(max_length=200)
+    fullname_norm = models.CharField(max_length=200, blank=True, default='', editable=False)
     email = models.EmailField(blank=True, null=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    normalized_fields = {'fullname_norm': 'fullname'}
+
     class Meta:
         db_table = 'primary_owners'
         ordering = ['fullname']
+        indexes = [
+            models.Index(fields=['fullname_norm'], name='idx_powner_fullname_norm', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.fullname
 
 
-class SecondaryOwner(models.Model):
+class SecondaryOwner(NormalizedFieldsModel):
     """Independent Secondary Owner model"""
     fullname = models.CharField(max_length=200)
+    fullname_norm = models.CharField(max_length=200, blank=True, default='', editable=False)
     email = models.EmailField(blank=True, null=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    normalized_fields = {'fullname_norm': 'fullname'}
+
     class Meta:
         db_table = 'secondary_owners'
         ordering = ['fullname']
+        indexes = [
+            models.Index(fields=['fullname_norm'], name='idx_sowner_fullname_norm', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.fullname
 
 
-class ThirdOwner(models.Model):
+class ThirdOwner(NormalizedFieldsModel):
     """Independent Third Owner model"""
     fullname = models.CharField(max_length=200)
+    fullname_norm = models.CharField(max_length=200, blank=True, default='', editable=False)
     email = models.EmailField(blank=True, null=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    normalized_fields = {'fullname_norm': 'fullname'}
+
     class Meta:
         db_table = 'third_owners'
         ordering = ['fullname']
+        indexes = [
+            models.Index(fields=['fullname_norm'], name='idx_towner_fullname_norm', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.fullname
 
 
-class FourthOwner(models.Model):
+class FourthOwner(NormalizedFieldsModel):
     """Independent Fourth Owner model"""
     fullname = models.CharField(max_length=200)
+    fullname_norm = models.CharField(max_length=200, blank=True, default='', editable=False)
     email = models.EmailField(blank=True, null=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    normalized_fields = {'fullname_norm': 'fullname'}
+
     class Meta:
         db_table = 'fourth_owners'
         ordering = ['fullname']
+        indexes = [
+            models.Index(fields=['fullname_norm'], name='idx_fowner_fullname_norm', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.fullname
 
 
-class Spa(models.Model):
+class Spa(AuditedModel, NormalizedFieldsModel):
     spa_code = models.CharField(max_length=50, unique=True)
     spa_name = models.CharField(max_length=200)
+    spa_code_norm = models.CharField(max_length=50, blank=True, default='', editable=False)
+    spa_name_norm = models.CharField(max_length=200, blank=True, default='', editable=False)
     area = models.ForeignKey('location.Area', on_delete=models.SET_NULL, null=True, related_name='spas')
 
     # One-to-many relationships with independent owner models
@@ -144,6 +172,7 @@ class Spa(models.Model):
     remark = models.TextField(blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -151,12 +180,16 @@ class Spa(models.Model):
         related_name='spas_created'
     )
 
+    normalized_fields = {'spa_code_norm': 'spa_code', 'spa_name_norm': 'spa_name'}
+
     class Meta:
         db_table = 'spas'
         indexes = [
             models.Index(fields=['spa_code'], name='idx_spa_code'),
             models.Index(fields=['status'], name='idx_spa_status'),
             models.Index(fields=['spa_name'], name='idx_spa_name'),
+            models.Index(fields=['spa_code_norm'], name='idx_spa_code_norm', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['spa_name_norm'], name='idx_spa_name_norm', opclasses=['varchar_pattern_ops']),
         ]
         ordering = ['spa_name']
 
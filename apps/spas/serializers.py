@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from spa_central.serializers import SparseFieldsetMixin
 from apps.location.models import State, City, Area
 from .models import PrimaryOwner, SecondaryOwner, ThirdOwner, FourthOwner, Spa, SpaManager,SocialMediaLink,SpaWebsite, SpaMedia
 
@@ -25,67 +26,99 @@ class AreaSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'city']
 
 
-class PrimaryOwnerSerializer(serializers.ModelSerializer):
+class PrimaryOwnerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     spa_count = serializers.SerializerMethodField()
     document_count = serializers.SerializerMethodField()
     
     class Meta:
         model = PrimaryOwner
         fields = ['id', 'fullname', 'email', 'phone', 'spa_count', 'document_count', 'created_at', 'updated_at']
+        sparse_sources = {
+            'spa_count': [],
+            'document_count': [],
+        }
     
     def get_spa_count(self, obj):
+        if hasattr(obj, 'spa_count'):
+            return obj.spa_count
         return obj.spas.count()
     
     def get_document_count(self, obj):
+        if hasattr(obj, 'document_count'):
+            return obj.document_count
         return obj.documents.count()
 
 
-class SecondaryOwnerSerializer(serializers.ModelSerializer):
+class SecondaryOwnerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     spa_count = serializers.SerializerMethodField()
     document_count = serializers.SerializerMethodField()
     
     class Meta:
         model = SecondaryOwner
         fields = ['id', 'fullname', 'email', 'phone', 'spa_count', 'document_count', 'created_at', 'updated_at']
+        sparse_sources = {
+            'spa_count': [],
+            'document_count': [],
+        }
     
     def get_spa_count(self, obj):
+        if hasattr(obj, 'spa_count'):
+            return obj.spa_count
         return obj.spas.count()
     
     def get_document_count(self, obj):
+        if hasattr(obj, 'document_count'):
+            return obj.document_count
         return obj.documents.count()
 
 
-class ThirdOwnerSerializer(serializers.ModelSerializer):
+class ThirdOwnerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     spa_count = serializers.SerializerMethodField()
     document_count = serializers.SerializerMethodField()
     
     class Meta:
         model = ThirdOwner
         fields = ['id', 'fullname', 'email', 'phone', 'spa_count', 'document_count', 'created_at', 'updated_at']
+        sparse_sources = {
+            'spa_count': [],
+            'document_count': [],
+        }
     
     def get_spa_count(self, obj):
+        if hasattr(obj, 'spa_count'):
+            return obj.spa_count
         return obj.spas.count()
     
     def get_document_count(self, obj):
+        if hasattr(obj, 'document_count'):
+            return obj.document_count
         return obj.documents.count()
 
 
-class FourthOwnerSerializer(serializers.ModelSerializer):
+class FourthOwnerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     spa_count = serializers.SerializerMethodField()
     document_count = serializers.SerializerMethodField()
     
     class Meta:
         model = FourthOwner
         fields = ['id', 'fullname', 'email', 'phone', 'spa_count', 'document_count', 'created_at', 'updated_at']
+        sparse_sources = {
+            'spa_count': [],
+            'document_count': [],
+        }
     
     def get_spa_count(self, obj):
+        if hasattr(obj, 'spa_count'):
+            return obj.spa_count
         return obj.spas.count()
     
     def get_document_count(self, obj):
+        if hasattr(obj, 'document_count'):
+            return obj.document_count
         return obj.documents.count()
 
 
-class SpaListSerializer(serializers.ModelSerializer):
+class SpaListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     primary_owner_name = serializers.CharField(source='primary_owner.fullname', read_only=True)
     secondary_owner_name = serializers.CharField(source='secondary_owner.fullname', read_only=True)
     third_owner_name = serializers.CharField(source='third_owner.fullname', read_only=True)
@@ -108,7 +141,7 @@ class SpaListSerializer(serializers.ModelSerializer):
         ]
 
 
-class SpaDetailSerializer(serializers.ModelSerializer):
+class SpaDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     primary_owner = PrimaryOwnerSerializer(read_only=True)
     secondary_owner = SecondaryOwnerSerializer(read_only=True)
     third_owner = ThirdOwnerSerializer(read_only=True)
@@ -152,7 +185,7 @@ class SpaCreateUpdateSerializer(serializers.ModelSerializer):
         return data
 
 
-class SpaManagerSerializer(serializers.ModelSerializer):
+class SpaManagerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     spa_name = serializers.CharField(source='spa.spa_name', read_only=True)
     spa_code = serializers.CharField(source='spa.spa_code', read_only=True)
     area_name = serializers.CharField(source='spa.area.name', read_only=True)
@@ -169,12 +202,15 @@ class SpaManagerSerializer(serializers.ModelSerializer):
             'document_count',
             'created_at', 'updated_at'
         ]
+        sparse_sources = {
+            'document_count': ['documents'],
+        }
     
     def get_document_count(self, obj):
         return obj.documents.count()
 
 
-class SpaManagerListSerializer(serializers.ModelSerializer):
+class SpaManagerListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     spa_name = serializers.CharField(source='spa.spa_name', read_only=True)
     spa_code = serializers.CharField(source='spa.spa_code', read_only=True)
     area_name = serializers.CharField(source='spa.area.name', read_only=True)
@@ -191,6 +227,9 @@ class SpaManagerListSerializer(serializers.ModelSerializer):
             'document_count',
             'created_at'
         ]
+        sparse_sources = {
+            'document_count': ['documents'],
+        }
     
     def get_document_count(self, obj):
         return obj.documents.count()
@@ -206,7 +245,7 @@ class SpaManagerCreateUpdateSerializer(serializers.ModelSerializer):
         return data
 
 
-class SocialMediaLinkSerializer(serializers.ModelSerializer):
+class SocialMediaLinkSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     spa_name = serializers.CharField(source='spa.spa_name', read_only=True)
     spa_code = serializers.CharField(source='spa.spa_code', read_only=True)
     spa_address = serializers.CharField(source='spa.address', read_only=True)
@@ -219,7 +258,7 @@ class SocialMediaLinkSerializer(serializers.ModelSerializer):
         fields = ['id', 'spa', 'spa_name', 'spa_code', 'spa_address', 'area_name', 'city_name', 'state_name', 'platform', 'url', 'created_at', 'updated_at']
 
 
-class SpaWebsiteLinkSerializer(serializers.ModelSerializer):
+class SpaWebsiteLinkSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     spa_name = serializers.CharField(source='spa.spa_name', read_only=True)
     spa_code = serializers.CharField(source='spa.spa_code', read_only=True)
     spa_address = serializers.CharField(source='spa.address', read_only=True)
@@ -240,7 +279,7 @@ class SpaWebsiteLinkSerializer(serializers.ModelSerializer):
         ]
 
 
-class SpaMediaSerializer(serializers.ModelSerializer):
+class SpaMediaSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for SpaMedia with spa details"""
     spa_name = serializers.CharField(source='spa.spa_name', read_only=True)
     spa_code = serializers.CharField(source='spa.spa_code', read_only=True)
@@ -262,7 +301,7 @@ class SpaMediaSerializer(serializers.ModelSerializer):
         ]
 
 
-class SpaMediaListSerializer(serializers.ModelSerializer):
+class SpaMediaListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for SpaMedia list view"""
     spa_name = serializers.CharField(source='spa.spa_name', read_only=True)
     spa_code = serializers.CharField(source='spa.spa_code', read_only=True)
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from spa_central.autocomplete import invalidate_autocomplete
+from .models import Spa, PrimaryOwner, SecondaryOwner, ThirdOwner, FourthOwner
+
+# Autocomplete picker fed by each model (see views.*AutocompleteView)
+PICKERS = {
+    Spa: 'spas',
+    PrimaryOwner: 'primary-owners',
+    SecondaryOwner: 'secondary-owners',
+    ThirdOwner: 'third-owners',
+    FourthOwner: 'fourth-owners',
+}
+
+
+@receiver([post_save, post_delete], sender=Spa)
+@receiver([post_save, post_delete], sender=PrimaryOwner)
+@receiver([post_save, post_delete], sender=SecondaryOwner)
+@receiver([post_save, post_delete], sender=ThirdOwner)
+@receiver([post_save, post_delete], sender=FourthOwner)
+def picker_changed(sender, **kwargs):
+    """Start a new cache generation for the picker listing the changed model"""
+    invalidate_autocomplete(PICKERS[sender])
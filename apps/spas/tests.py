@@ -1,3 +1,89 @@
 from django.test import TestCase
+from spa_central.testing import AsyncParityTestCase
+from apps.users.models import User
+from apps.location.models import State, City, Area
+from .models import PrimaryOwner, SecondaryOwner, Spa, SpaManager
 
-# Create your tests here.
+
+class SpaAsyncViewTests(AsyncParityTestCase):
+    """spa-list, spa-detail and spa-statistics under ASGI match the sync viewset"""
+
+    def setUp(self):
+        super().setUp()
+        state = State.objects.create(name='Maharashtra')
+        city = City.objects.create(name='Pune', state=state)
+        area = Area.objects.create(name='Baner', city=city)
+        owner = PrimaryOwner.objects.create(fullname='Priya Owner', email='priya@example.com')
+        self.spa = Spa.objects.create(
+            spa_code='1001', spa_name='Lotus Spa', area=area, primary_owner=owner,
+            secondary_owner=SecondaryOwner.objects.create(fullname='Sam Second'), created_by=self.user,
+        )
+        Spa.objects.create(spa_code='1002', spa_name='Orchid Spa', primary_owner=owner, status='Closed')
+        SpaManager.objects.create(fullname='Manu Manager', phone='9800000000', spa=self.spa)
+
+    def test_list(self):
+        self.assertSameResponse('/api/spas/')
+        self.assertSameResponse('/api/spas/?fields=id,spa_name,primary_owner')
+        self.assertSameResponse('/api/spas/?fields=id,spa_nmae', status=400)
+
+    def test_detail_with_owner(self):
+        response = self.assertSameResponse(f'/api/spas/{self.spa.pk}/')
+        self.assertEqual(response.json()['primary_owner']['spa_count'], 2)
+
+    def test_detail_not_modified(self):
+        etag = self.get_sync(f'/api/spas/{self.spa.pk}/')['ETag']
+        response = self.get_async(f'/api/spas/{self.spa.pk}/', If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_missing(self):
+        self.assertSameResponse('/api/spas/999999/', status=404)
+
+    def test_statistics(self):
+        self.assertSameResponse('/api/spas/statistics/')
+
+
+class SpaConditionalGetTests(TestCase):
+    """ETags change when any rendered related row changes"""
+
+    def setUp(self):
+        user = User.objects.create_user(email='admin@example.com', password='x', first_name='A', last_name='B', user_type='admin')
+        self.client.force_login(user)
+        self.state = State.objects.create(name='Maharashtra')
+        self.city = City.objects.create(name='Pune', state=self.state)
+        self.owner = PrimaryOwner.objects.create(fullname='Priya Owner')
+        self.spa = Spa.objects.create(
+            spa_code='1001', spa_name='Lotus Spa', primary_owner=self.owner,
+            area=Area.objects.create(name='Baner', city=self.city),
+        )
+
+    def assertEtagChanges(self, path, change):
+        etag = self.client.get(path)['ETag']
+        self.assertEqual(self.client.get(path, headers={'If-None-Match': etag}).status_code, 304)
+        change()
+        response = self.client.get(path, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_state_rename(self):
+        def rename():
+            self.state.name = 'Goa'
+            self.state.save()
+        self.assertEtagChanges('/api/spas/', rename)
+
+    def test_city_rename(self):
+        def rename():
+            self.city.name = 'Mumbai'
+            self.city.save()
+        self.assertEtagChanges(f'/api/spas/{self.spa.pk}/', rename)
+
+    def test_owner_spa_count(self):
+        self.assertEtagChanges(
+            f'/api/spas/{self.spa.pk}/',
+            lambda: Spa.objects.create(spa_code='1002', spa_name='Orchid Spa', primary_owner=self.owner),
+        )
+
+    def test_owner_list_counts(self):
+        self.assertEtagChanges(
+            '/api/primary-owners/',
+            lambda: Spa.objects.create(spa_code='1002', spa_name='Orchid Spa', primary_owner=self.owner),
+        )
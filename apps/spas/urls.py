@@ -10,6 +10,11 @@ from .views import (
     SocialMediaLinkViewSet,
     SpaWebsiteLinkViewset,
     SpaMediaViewSet,
+    SpaAutocompleteView,
+    PrimaryOwnerAutocompleteView,
+    SecondaryOwnerAutocompleteView,
+    ThirdOwnerAutocompleteView,
+    FourthOwnerAutocompleteView,
 )
 
 router = DefaultRouter()
@@ -24,6 +29,11 @@ router.register(r'spa-websites', SpaWebsiteLinkViewset, basename='spa-website')
 router.register(r'spa-media', SpaMediaViewSet, basename='spa-media')
 
 urlpatterns = [
+    path('autocomplete/spas/', SpaAutocompleteView.as_view(), name='spa-autocomplete'),
+    path('autocomplete/primary-owners/', PrimaryOwnerAutocompleteView.as_view(), name='primary-owner-autocomplete'),
+    path('autocomplete/secondary-owners/', SecondaryOwnerAutocompleteView.as_view(), name='secondary-owner-autocomplete'),
+    path('autocomplete/third-owners/', ThirdOwnerAutocompleteView.as_view(), name='third-owner-autocomplete'),
+    path('autocomplete/fourth-owners/', FourthOwnerAutocompleteView.as_view(), name='fourth-owner-autocomplete'),
     path('', include(router.urls)),
 ]
 
@@ -1,9 +1,13 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
+from django.db.models import Count, Prefetch
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from apps.users.permissions import IsAdminUser
+from apps.audit.mixins import HistoryMixin
+from spa_central.autocomplete import AutocompleteView
+from spa_central.mixins import ConditionalGetMixin, SparseQuerysetMixin
 from .models import PrimaryOwner, SecondaryOwner, ThirdOwner, FourthOwner, Spa, SpaManager, SocialMediaLink,SpaWebsite, SpaMedia
 from .filters import (
     SpaFilter,
@@ -35,8 +39,14 @@ from .serializers import (
 )
 
 
-class PrimaryOwnerViewSet(viewsets.ModelViewSet):
-    queryset = PrimaryOwner.objects.prefetch_related('documents').all()
+def with_owner_counts(queryset):
+    """Annotate the spa_count/document_count the owner serializers render"""
+    return queryset.annotate(spa_count=Count('spas', distinct=True), document_count=Count('documents', distinct=True))
+
+
+class PrimaryOwnerViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
+    etag_related = ('spas', 'documents')
+    queryset = with_owner_counts(PrimaryOwner.objects.all())
     serializer_class = PrimaryOwnerSerializer
     permission_classes = [IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -46,8 +56,9 @@ class PrimaryOwnerViewSet(viewsets.ModelViewSet):
     ordering = ['fullname']
 
 
-class SecondaryOwnerViewSet(viewsets.ModelViewSet):
-    queryset = SecondaryOwner.objects.prefetch_related('documents').all()
+class SecondaryOwnerViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
+    etag_related = ('spas', 'documents')
+    queryset = with_owner_counts(SecondaryOwner.objects.all())
     serializer_class = SecondaryOwnerSerializer
     permission_classes = [IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -57,8 +68,9 @@ class SecondaryOwnerViewSet(viewsets.ModelViewSet):
     ordering = ['fullname']
 
 
-class ThirdOwnerViewSet(viewsets.ModelViewSet):
-    queryset = ThirdOwner.objects.prefetch_related('documents').all()
+class ThirdOwnerViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
+    etag_related = ('spas', 'documents')
+    queryset = with_owner_counts(ThirdOwner.objects.all())
     serializer_class = ThirdOwnerSerializer
     permission_classes = [IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -68,8 +80,9 @@ class ThirdOwnerViewSet(viewsets.ModelViewSet):
     ordering = ['fullname']
 
 
-class FourthOwnerViewSet(viewsets.ModelViewSet):
-    queryset = FourthOwner.objects.prefetch_related('documents').all()
+class FourthOwnerViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
+    etag_related = ('spas', 'documents')
+    queryset = with_owner_counts(FourthOwner.objects.all())
     serializer_class = FourthOwnerSerializer
     permission_classes = [IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -79,7 +92,16 @@ class FourthOwnerViewSet(viewsets.ModelViewSet):
     ordering = ['fullname']
 
 
-class SpaViewSet(viewsets.ModelViewSet):
+class SpaViewSet(ConditionalGetMixin, SparseQuerysetMixin, HistoryMixin, viewsets.ModelViewSet):
+    etag_related = (
+        'primary_owner', 'secondary_owner', 'third_owner', 'fourth_owner', 'area', 'area__city', 'area__city__state',
+    )
+    # SpaDetailSerializer nests each owner with its spa_count and document_count
+    etag_detail_related = tuple(
+        f'{owner}__{relation}'
+        for owner in ('primary_owner', 'secondary_owner', 'third_owner', 'fourth_owner')
+        for relation in ('spas', 'documents')
+    )
     queryset = Spa.objects.select_related(
         'primary_owner', 'secondary_owner', 'third_owner', 'fourth_owner', 'area__city__state', 'created_by'
     ).all()
@@ -101,6 +123,20 @@ class SpaViewSet(viewsets.ModelViewSet):
         if self.action in ['create', 'update', 'partial_update']:
             return SpaCreateUpdateSerializer
         return SpaDetailSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('retrieve', 'by_status', 'by_agreement'):
+            return queryset
+        # SpaDetailSerializer's nested owners render their counts: one
+        # annotated query per owner kind instead of two COUNTs per spa
+        owners = {
+            'primary_owner': PrimaryOwner, 'secondary_owner': SecondaryOwner,
+            'third_owner': ThirdOwner, 'fourth_owner': FourthOwner,
+        }
+        return queryset.select_related(None).select_related('area__city__state', 'created_by').prefetch_related(
+            *(Prefetch(name, queryset=with_owner_counts(model.objects.all())) for name, model in owners.items())
+        )
     
     def perform_create(self, serializer):
         """Auto-assign created_by when creating spa"""
@@ -111,7 +147,7 @@ class SpaViewSet(viewsets.ModelViewSet):
         """Get spas grouped by status"""
         status_param = request.query_params.get('status')
         if status_param:
-            spas = self.queryset.filter(status=status_param)
+            spas = self.get_queryset().filter(status=status_param)
             serializer = self.get_serializer(spas, many=True)
             return Response(serializer.data)
         return Response({'error': 'Status parameter required'}, status=400)
@@ -121,7 +157,7 @@ class SpaViewSet(viewsets.ModelViewSet):
         """Get spas grouped by agreement status"""
         agreement = request.query_params.get('agreement_status')
         if agreement:
-            spas = self.queryset.filter(agreement_status=agreement)
+            spas = self.get_queryset().filter(agreement_status=agreement)
             serializer = self.get_serializer(spas, many=True)
             return Response(serializer.data)
         return Response({'error': 'agreement_status parameter required'}, status=400)
@@ -129,32 +165,47 @@ class SpaViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get spa statistics"""
-        from django.db.models import Count, Q
-        
-        # Get status counts
-        by_status = dict(self.queryset.values('status').annotate(count=Count('id')).values_list('status', 'count'))
-        
-        # Get agreement status counts
-        by_agreement = dict(self.queryset.values('agreement_status').annotate(count=Count('id')).values_list('agreement_status', 'count'))
-        
+        results = {name: query() for name, query in self.statistics_queries().items()}
+        return Response(self._build_statistics(results))
+
+    def statistics_queries(self):
+        """Independent statistics queries by name (the async endpoint runs them concurrently)"""
+        spas = self.queryset.order_by()
+        return {
+            'by_status': lambda: dict(spas.values('status').annotate(count=Count('id')).values_list('status', 'count')),
+            'by_agreement': lambda: dict(
+                spas.values('agreement_status').annotate(count=Count('id')).values_list('agreement_status', 'count')
+            ),
+            'total': spas.count,
+            'with_primary_owner': spas.filter(primary_owner__isnull=False).count,
+            'with_secondary_owner': spas.filter(secondary_owner__isnull=False).count,
+            'with_third_owner': spas.filter(third_owner__isnull=False).count,
+            'with_fourth_owner': spas.filter(fourth_owner__isnull=False).count,
+        }
+
+    @staticmethod
+    def _build_statistics(results):
+        by_status = results['by_status']
+        by_agreement = results['by_agreement']
+
         # Build stats in the format frontend expects
-        stats = {
-            'total_spas': self.queryset.count(),
+        return {
+            'total_spas': results['total'],
             'open_spas': by_status.get('Open', 0),
             'closed_spas': by_status.get('Closed', 0),
             'temp_closed_spas': by_status.get('Temporarily Closed', 0),  # Fixed: Use correct status name
             'processing_spas': by_status.get('Processing', 0),
             'done_agreements': by_agreement.get('done', 0),
             'pending_agreements': by_agreement.get('pending', 0),
-            'with_primary_owner': self.queryset.filter(primary_owner__isnull=False).count(),
-            'with_secondary_owner': self.queryset.filter(secondary_owner__isnull=False).count(),
-            'with_third_owner': self.queryset.filter(third_owner__isnull=False).count(),
-            'with_fourth_owner': self.queryset.filter(fourth_owner__isnull=False).count(),
+            'with_primary_owner': results['with_primary_owner'],
+            'with_secondary_owner': results['with_secondary_owner'],
+            'with_third_owner': results['with_third_owner'],
+            'with_fourth_owner': results['with_fourth_owner'],
         }
-        return Response(stats)
 
 
-class SpaManagerViewSet(viewsets.ModelViewSet):
+class SpaManagerViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
+    etag_related = ('spa', 'spa__area', 'spa__area__city', 'spa__area__city__state', 'documents')
     queryset = SpaManager.objects.select_related(
         'spa', 'spa__area', 'spa__area__city', 'spa__area__city__state'
     ).prefetch_related('documents').all()
@@ -207,7 +258,8 @@ class SpaManagerViewSet(viewsets.ModelViewSet):
         })
 
 
-class SocialMediaLinkViewSet(viewsets.ModelViewSet):
+class SocialMediaLinkViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
+    etag_related = ('spa', 'spa__area', 'spa__area__city', 'spa__area__city__state')
     queryset = SocialMediaLink.objects.select_related(
         'spa', 'spa__area', 'spa__area__city', 'spa__area__city__state'
     ).all()
@@ -221,7 +273,8 @@ class SocialMediaLinkViewSet(viewsets.ModelViewSet):
 
 # Create your views here.
 
-class SpaWebsiteLinkViewset(viewsets.ModelViewSet):
+class SpaWebsiteLinkViewset(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
+    etag_related = ('spa', 'spa__area', 'spa__area__city', 'spa__area__city__state')
     queryset = SpaWebsite.objects.select_related(
         'spa',
         'spa__area',
@@ -244,8 +297,9 @@ class SpaWebsiteLinkViewset(viewsets.ModelViewSet):
         serializer.save(created_by=self.request.user)
 
 
-class SpaMediaViewSet(viewsets.ModelViewSet):
+class SpaMediaViewSet(ConditionalGetMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     """ViewSet for managing SpaMedia (Google Drive links for photos/videos)"""
+    etag_related = ('spa', 'spa__area', 'spa__area__city', 'spa__area__city__state', 'created_by')
     queryset = SpaMedia.objects.select_related(
         'spa',
         'spa__area',
@@ -282,3 +336,35 @@ class SpaMediaViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(media, many=True)
         return Response(serializer.data)
 
+
+class SpaAutocompleteView(AutocompleteView):
+    """Spa picker: ``q`` matches the start of the spa code or name"""
+    name = 'spas'
+    model = Spa
+    search_fields = ('spa_name_norm', 'spa_code_norm')
+    label_fields = ('spa_code', 'spa_name')
+
+
+class OwnerAutocompleteView(AutocompleteView):
+    search_fields = ('fullname_norm',)
+    label_fields = ('fullname',)
+
+
+class PrimaryOwnerAutocompleteView(OwnerAutocompleteView):
+    name = 'primary-owners'
+    model = PrimaryOwner
+
+
+class SecondaryOwnerAutocompleteView(OwnerAutocompleteView):
+    name = 'secondary-owners'
+    model = SecondaryOwner
+
+
+class ThirdOwnerAutocompleteView(OwnerAutocompleteView):
+    name = 'third-owners'
+    model = ThirdOwner
+
+
+class FourthOwnerAutocompleteView(OwnerAutocompleteView):
+    name = 'fourth-owners'
+    model = FourthOwner
@@ -8,6 +8,7 @@ from datetime import timedelta
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
+from apps.monitoring.metrics import track_email
 from .models import OTP, User
 
 
@@ -132,14 +133,15 @@ Disha Online Solution Team
     """
     
     try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@dishaonlinesoution.com',
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        with track_email():
+            send_mail(
+                subject=subject,
+                message=message,
+                from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@dishaonlinesoution.com',
+                recipient_list=[user.email],
+                html_message=html_message,
+                fail_silently=False,
+            )
         return True
     except Exception as e:
         print(f"Error sending OTP email: {str(e)}")
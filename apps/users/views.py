@@ -22,7 +22,7 @@ from .permissions import IsAdminUser
 
 
 class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+    queryset = User.objects.select_related('profile')
     serializer_class = UserSerializer
     
     def get_permissions(self):
@@ -60,11 +60,11 @@ def home(request):
 
 def health_check(request):
     """
-    Simple health check endpoint for load balancers/uptime monitors.
-    Returns minimal JSON and 200 when app is healthy.
+    Liveness endpoint for load balancers/uptime monitors.
+    Returns minimal JSON and 200 whenever the process can serve requests;
+    dependency checks live in the readiness probe (/health/ready/).
     Do NOT expose detailed internals or DB credentials here.
     """
-    # Optionally you can check DB, cache, redis etc. and return 200/503 accordingly.
     payload = {"status": "ok"}
     response = JsonResponse(payload, status=200)
     return _add_security_headers(response)
@@ -0,0 +1,20 @@
+"""
+API performance regression benchmarks
+
+Seeds a dedicated database with realistic volumes, requests every GET
+list/detail/statistics/custom-action endpoint and compares query counts,
+wall time and response size against the committed baselines.
+
+Usage:
+    python -m benchmarks.run                    # seed if needed, run, compare
+    python -m benchmarks.run --scale 1          # full volumes (queries and statuses only)
+    python -m benchmarks.run --update-baselines # record new baselines
+
+The committed baselines are recorded at the default --scale (0.02), which
+CI runs with --queries-only (.github/workflows/ci.yml); re-record them in
+the commit that changes an endpoint's query count.
+
+The database is SQLite at benchmarks/bench.sqlite3 unless BENCH_DB_ENGINE
+(plus BENCH_DB_NAME/DB_USER/DB_PASSWORD/DB_HOST/DB_PORT) points elsewhere,
+so the benchmark never touches the development database.
+"""
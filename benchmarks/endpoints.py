@@ -0,0 +1,112 @@
+"""
+Discovery of the GET endpoints exercised by the benchmarks
+
+Every DRF route under /api/ is found through the URL resolver, so new
+viewsets and actions are benchmarked without registering them here:
+list routes and ``detail=False`` GET actions are requested as-is, detail
+routes and ``detail=True`` GET actions with the first id returned by the
+matching list route. Routes that require a query parameter get it from
+REQUIRED_PARAMS; EXTRA_CASES adds query-string variants (filters, search).
+"""
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+# Routes that stream files or need data the factories do not create
+SKIPPED_ROUTES = {
+    'file-download',
+}
+SKIPPED_SUFFIXES = ('-download',)
+
+# Query parameters without which a route answers 400 (route name -> params
+# builder taking the context dict); the plain case of the route sends them
+REQUIRED_PARAMS = {
+    'chat-history': lambda ctx: {'user_id': ctx['peer_id']},
+    'document-by-type': lambda ctx: {'doc_type': ctx['doc_type_id']},
+    'document-by-user': lambda ctx: {'user': ctx['document_user_id']},
+    'machine-by-spa': lambda ctx: {'spa_id': ctx['spa_id']},
+    'machine-by-status': lambda ctx: {'status': 'broken'},
+    'machine-lookup': lambda ctx: {'mid': 'MID000000100'},
+    'owner-document-by-owner': lambda ctx: {'owner_id': ctx['owner_id']},
+    'spa-by-agreement': lambda ctx: {'agreement_status': 'pending'},
+    'spa-by-status': lambda ctx: {'status': 'Open'},
+    'spa-manager-by-spa': lambda ctx: {'spa_id': ctx['spa_id']},
+    'spa-manager-document-by-manager': lambda ctx: {'manager_id': ctx['manager_id']},
+    'spa-media-by-spa': lambda ctx: {'spa_id': ctx['spa_id']},
+}
+
+# (route name, label suffix, params builder taking the context dict)
+EXTRA_CASES = [
+    ('spa-list', 'search', lambda ctx: {'search': 'lotus'}),
+    ('spa-list', 'filtered', lambda ctx: {'status': 'Open', 'page_size': 100}),
+    ('machine-list', 'search', lambda ctx: {'search': 'verifone'}),
+    ('machine-list', 'search identifier', lambda ctx: {'search': 'MID000000100'}),
+    ('machine-list', 'state filter', lambda ctx: {'state': ctx['state_id']}),
+    ('machine-statistics', 'filtered', lambda ctx: {'status': 'broken'}),
+    ('document-list', 'spa filter', lambda ctx: {'spa': ctx['spa_id']}),
+    ('simcard-list', 'status filter', lambda ctx: {'status': 'suspended'}),
+    ('simcard-statistics', 'filtered', lambda ctx: {'status': 'active'}),
+]
+
+def _walk(patterns, prefix=''):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns, prefix + str(pattern.pattern))
+        elif isinstance(pattern, URLPattern):
+            yield prefix + str(pattern.pattern), pattern
+
+
+def discover():
+    """
+    Returns:
+        List of dicts with route ``name``, router ``basename``, ``detail``
+        flag and extra ``params``
+    """
+    endpoints = {}
+    for route, pattern in _walk(get_resolver().url_patterns):
+        name = pattern.name
+        callback = pattern.callback
+        if not name or name in endpoints or name in SKIPPED_ROUTES or name.endswith(SKIPPED_SUFFIXES):
+            continue
+        if not route.lstrip('^').startswith('api/'):
+            continue
+        if 'format' in pattern.pattern.regex.groupindex:
+            continue
+
+        actions = getattr(callback, 'actions', None)
+        view_class = getattr(callback, 'cls', None)
+        if actions is not None:
+            if 'get' not in actions:
+                continue
+        elif view_class is None or not hasattr(view_class, 'get'):
+            continue
+
+        kwargs = set(pattern.pattern.regex.groupindex)
+        if kwargs - {'pk'}:
+            continue
+        basename = getattr(callback, 'initkwargs', {}).get('basename')
+        endpoints[name] = {
+            'name': name, 'basename': basename, 'detail': 'pk' in kwargs, 'params': REQUIRED_PARAMS.get(name, {}),
+        }
+
+    cases = sorted(endpoints.values(), key=lambda case: case['name'])
+    for name, label, params in EXTRA_CASES:
+        if name in endpoints:
+            cases.append({**endpoints[name], 'params': params, 'label': label})
+    return cases
+
+
+def case_key(case):
+    return f"{case['name']} [{case['label']}]" if case.get('label') else case['name']
+
+
+def list_route_for(case):
+    """'machine-detail' / 'machine-history' -> 'machine-list'"""
+    return f"{case['basename']}-list" if case.get('basename') else None
+
+
+def build_url(case, pk=None, context=None):
+    kwargs = {'pk': pk} if case['detail'] else {}
+    url = reverse(case['name'], kwargs=kwargs)
+    params = case['params'](context) if callable(case['params']) else case['params']
+    if params:
+        url += '?' + '&'.join(f'{key}={value}' for key, value in params.items())
+    return url
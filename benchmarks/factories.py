@@ -0,0 +1,239 @@
+"""
+Bulk factories seeding realistic data volumes for the benchmarks
+
+Rows are written with bulk_create in batches (no per-row signals), then
+the derived tables that signals normally maintain (machine health,
+search index, unread counters) are rebuilt once. The benchmark user gets
+the rows a first request would otherwise create (its profile), so every
+measured request sees the steady state.
+"""
+import random
+from datetime import date, timedelta
+from django.db import transaction
+from apps.chat.models import ChatMessage, ChatNotification, UnreadCounter
+from apps.chat.unread import rebuild_unread_counters
+from apps.documents.models import Document, DocumentType, OwnerDocument
+from apps.location.models import State, City, Area
+from apps.machine.health import refresh_all_machine_health
+from apps.machine.models import Machine, AccountHolder
+from apps.machine.search import index_machines
+from apps.simcard.models import SimCard
+from apps.spas.models import PrimaryOwner, SecondaryOwner, Spa, SpaManager
+from apps.users.models import User, UserProfile
+
+# Full-scale volumes; --scale multiplies every entry
+VOLUMES = {
+    'users': 200,
+    'states': 30,
+    'cities': 300,
+    'areas': 3000,
+    'owners': 2000,
+    'spas': 10000,
+    'spa_managers': 5000,
+    'account_holders': 1000,
+    'machines': 50000,
+    'simcards': 20000,
+    'documents': 100000,
+    'owner_documents': 10000,
+    'chat_messages': 1000000,
+    'notifications': 50000,
+}
+
+BATCH_SIZE = 5000
+BENCH_USER_EMAIL = 'benchmark@spa-central.local'
+
+
+def volumes_for(scale):
+    return {name: max(1, int(count * scale)) for name, count in VOLUMES.items()}
+
+
+def _bulk(model, objects):
+    model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+
+def _chunks(total, make):
+    """bulk_create ``total`` objects built by ``make(i)`` without holding them all in memory"""
+    batch = []
+    for index in range(total):
+        batch.append(make(index))
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def is_seeded(scale):
+    return Spa.objects.count() == volumes_for(scale)['spas'] and User.objects.filter(email=BENCH_USER_EMAIL).exists()
+
+
+def seed(scale=1.0, log=print):
+    """Populate an empty database; returns the volumes used"""
+    counts = volumes_for(scale)
+    rng = random.Random(2024)
+    today = date.today()
+
+    def step(name):
+        log(f'  seeding {counts[name]:>9} {name}')
+
+    with transaction.atomic():
+        step('users')
+        bench_user = User.objects.create_superuser(BENCH_USER_EMAIL, 'benchmark', first_name='Bench', last_name='Admin', user_type='admin')
+        UserProfile.objects.create(user=bench_user)
+        _bulk(User, [
+            User(email=f'user{i}@bench.local', username=f'user{i}', first_name='User', last_name=str(i),
+                 user_type=rng.choice(['employee', 'manager', 'spa_manager']), password='!')
+            for i in range(counts['users'])
+        ])
+        # The benchmark user first: factories below rely on user_ids[0]
+        user_ids = [bench_user.id] + list(User.objects.exclude(pk=bench_user.pk).values_list('id', flat=True))
+
+        step('states')
+        _bulk(State, [State(name=f'State {i}') for i in range(counts['states'])])
+        state_ids = list(State.objects.values_list('id', flat=True))
+        step('cities')
+        _bulk(City, [City(name=f'City {i}', state_id=rng.choice(state_ids)) for i in range(counts['cities'])])
+        city_ids = list(City.objects.values_list('id', flat=True))
+        step('areas')
+        _bulk(Area, [Area(name=f'Area {i}', city_id=rng.choice(city_ids)) for i in range(counts['areas'])])
+        area_ids = list(Area.objects.values_list('id', flat=True))
+
+        step('owners')
+        _bulk(PrimaryOwner, [PrimaryOwner(fullname=f'Primary Owner {i}', phone=f'98{i:08d}') for i in range(counts['owners'])])
+        _bulk(SecondaryOwner, [SecondaryOwner(fullname=f'Secondary Owner {i}') for i in range(counts['owners'] // 2 or 1)])
+        primary_ids = list(PrimaryOwner.objects.values_list('id', flat=True))
+        secondary_ids = list(SecondaryOwner.objects.values_list('id', flat=True))
+
+        step('spas')
+        statuses = [code for code, _ in Spa.STATUS_CHOICES]
+        for batch in _chunks(counts['spas'], lambda i: Spa(
+            spa_code=str(1000 + i),
+            spa_name=f'Spa {rng.choice(["Lotus", "Orchid", "Jasmine", "Rose", "Zen"])} {i}',
+            area_id=rng.choice(area_ids) if rng.random() < 0.95 else None,
+            primary_owner_id=rng.choice(primary_ids),
+            secondary_owner_id=rng.choice(secondary_ids) if rng.random() < 0.4 else None,
+            status=rng.choice(statuses),
+            landmark=f'Near landmark {i % 500}',
+            emails=f'spa{i}@bench.local',
+            phones=f'97{i:08d}',
+            address=f'{i} Bench Street',
+            opening_date=today - timedelta(days=rng.randrange(3650)),
+            created_by_id=user_ids[0],
+        )):
+            _bulk(Spa, batch)
+        spa_ids = list(Spa.objects.values_list('id', flat=True))
+
+        step('spa_managers')
+        _bulk(SpaManager, [
+            SpaManager(fullname=f'Manager {i}', phone=f'96{i:08d}', spa_id=rng.choice(spa_ids))
+            for i in range(counts['spa_managers'])
+        ])
+
+        step('account_holders')
+        _bulk(AccountHolder, [
+            AccountHolder(full_name=f'Holder {i}', designation=rng.choice(['Owner', 'Manager', 'Partner']))
+            for i in range(counts['account_holders'])
+        ])
+        holder_ids = list(AccountHolder.objects.values_list('id', flat=True))
+
+        step('machines')
+        machine_statuses = [code for code, _ in Machine.STATUS_CHOICES]
+        for batch in _chunks(counts['machines'], lambda i: Machine(
+            spa_id=rng.choice(spa_ids),
+            serial_number=f'SN{i:08d}',
+            machine_code=f'MC{i:06d}',
+            machine_name=f'Terminal {i}',
+            model_name=rng.choice(['Ingenico Move', 'Verifone V240', 'PAX A920', 'Pine Labs Plutus']),
+            firmware_version=f'{rng.randrange(1, 4)}.{rng.randrange(10)}',
+            account_name=f'Account {i % 3000}' if rng.random() < 0.9 else None,
+            bank_name=rng.choice(['HDFC', 'ICICI', 'SBI', 'Axis', None]),
+            mid=f'MID{i:09d}' if rng.random() < 0.9 else None,
+            tid=f'TID{i:08d}' if rng.random() < 0.9 else None,
+            acc_holder_id=rng.choice(holder_ids) if rng.random() < 0.8 else None,
+            status=rng.choice(machine_statuses),
+            created_by_id=user_ids[0],
+        )):
+            _bulk(Machine, batch)
+
+        step('simcards')
+        sim_statuses = [SimCard.STATUS_ACTIVE] * 7 + [SimCard.STATUS_SUSPENDED, SimCard.STATUS_CLOSED, SimCard.STATUS_LOST]
+        for batch in _chunks(counts['simcards'], lambda i: SimCard(
+            date_of_issue=today - timedelta(days=rng.randrange(1825)),
+            mobile_number=str(6000000000 + i),
+            simcard_serial_number=f'SIM{i:010d}',
+            sim_owner_name=f'Sim Owner {i}',
+            status=rng.choice(sim_statuses),
+            spa_id=rng.choice(spa_ids) if rng.random() < 0.9 else None,
+        )):
+            _bulk(SimCard, batch)
+
+        step('documents')
+        _bulk(DocumentType, [DocumentType(name=name) for name in ['Agreement', 'License', 'ID Proof', 'Invoice', 'Photo']])
+        doc_type_ids = list(DocumentType.objects.values_list('id', flat=True))
+        spa_names = dict(Spa.objects.values_list('id', 'spa_name'))
+        for batch in _chunks(counts['documents'], lambda i: _document(rng, i, spa_ids, spa_names, doc_type_ids, user_ids)):
+            _bulk(Document, batch)
+        for batch in _chunks(counts['owner_documents'], lambda i: OwnerDocument(
+            primary_owner_id=rng.choice(primary_ids),
+            title=f'Owner document {i}',
+            file=f'documents/bench/owner_{i}.pdf',
+            owner_name=f'Primary Owner {i}',
+            owner_type='primary',
+            uploaded_by_id=user_ids[0],
+        )):
+            _bulk(OwnerDocument, batch)
+
+    # Chat volume is large; commit in separate transactions
+    step('chat_messages')
+    bench_user_id = user_ids[0]
+    for batch in _chunks(counts['chat_messages'], lambda i: _message(rng, i, user_ids, bench_user_id)):
+        _bulk(ChatMessage, batch)
+
+    step('notifications')
+    for batch in _chunks(counts['notifications'], lambda i: ChatNotification(
+        user_id=bench_user_id if i % 5 == 0 else rng.choice(user_ids),
+        sender_id=rng.choice(user_ids),
+        notification_type='message',
+        message=f'New message {i}',
+        is_read=rng.random() < 0.7,
+    )):
+        _bulk(ChatNotification, batch)
+
+    log('  rebuilding machine health, search index and unread counters')
+    refresh_all_machine_health()
+    index_machines(Machine.objects.all())
+    _bulk(UnreadCounter, [UnreadCounter(user_id=user_id) for user_id in user_ids])
+    rebuild_unread_counters()
+    return counts
+
+
+def _document(rng, index, spa_ids, spa_names, doc_type_ids, user_ids):
+    spa_id = rng.choice(spa_ids)
+    return Document(
+        spa_id=spa_id,
+        spa_name=spa_names[spa_id],
+        doc_type_id=rng.choice(doc_type_ids),
+        title=f'Document {index}',
+        file=f'documents/bench/doc_{index}.pdf',
+        uploaded_by_id=rng.choice(user_ids),
+        # The legacy owner field, still filtered on by documents/by_user
+        user_id=rng.choice(user_ids) if rng.random() < 0.2 else None,
+    )
+
+
+def _message(rng, index, user_ids, bench_user_id):
+    # Roughly a fifth of all traffic involves the benchmark user so the
+    # conversation endpoints see realistic history sizes
+    if index % 5 == 0:
+        sender, receiver = bench_user_id, rng.choice(user_ids[1:] or user_ids)
+        if rng.random() < 0.5:
+            sender, receiver = receiver, sender
+    else:
+        sender, receiver = rng.sample(user_ids, 2) if len(user_ids) > 1 else (user_ids[0], user_ids[0])
+    return ChatMessage(
+        sender_id=sender,
+        receiver_id=receiver,
+        message=f'Message {index}',
+        is_read=rng.random() < 0.8,
+        is_delivered=True,
+    )
@@ -0,0 +1,231 @@
+"""
+Run the API benchmarks and compare against benchmarks/baselines.json
+
+Exit status is 1 when any endpoint fails or regresses:
+- a 4xx/5xx response (always checked; such results are never recorded),
+- more queries than its baseline (always checked),
+- a different HTTP status (always checked),
+- wall time or response size above baseline + tolerance (only when the
+  baseline was recorded at the same --scale on the same database vendor,
+  and not with --queries-only).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASELINES_PATH = Path(__file__).resolve().parent / 'baselines.json'
+# Absolute slack so sub-10ms endpoints do not flap on timer noise
+TIME_SLACK_MS = 10
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='API query-count and latency regression benchmarks')
+    parser.add_argument(
+        '--scale', type=float, default=0.02,
+        help='Multiplier for the seeded volumes (default: 0.02, the scale baselines are recorded at)',
+    )
+    parser.add_argument('--repeat', type=int, default=3, help='Requests per endpoint; the median time is kept')
+    parser.add_argument('--only', help='Only run endpoints whose name contains this text')
+    parser.add_argument('--reseed', action='store_true', help='Flush and reseed the benchmark database')
+    parser.add_argument('--update-baselines', action='store_true', help='Write the results as the new baselines')
+    parser.add_argument('--time-tolerance', type=float, default=0.5, help='Allowed wall-time growth (default: 0.5 = 50%%)')
+    parser.add_argument('--bytes-tolerance', type=float, default=0.1, help='Allowed response-size growth (default: 0.1)')
+    parser.add_argument(
+        '--queries-only', action='store_true',
+        help='Compare only query counts and statuses, e.g. on shared CI runners whose timings vary',
+    )
+    return parser.parse_args(argv)
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+
+
+def prepare_database(scale, reseed):
+    from django.core.management import call_command
+    from benchmarks.factories import is_seeded, seed
+
+    call_command('migrate', verbosity=0)
+    if reseed or not is_seeded(scale):
+        print(f'Seeding benchmark database (scale {scale})...')
+        call_command('flush', interactive=False, verbosity=0)
+        started = time.perf_counter()
+        seed(scale)
+        print(f'Seeded in {time.perf_counter() - started:.0f}s')
+
+
+def build_context():
+    from django.db.models import Q
+    from apps.chat.models import ChatMessage
+    from apps.documents.models import Document, DocumentType, OwnerDocument
+    from apps.location.models import State
+    from apps.spas.models import SpaManager
+    from apps.users.models import User
+    from benchmarks.factories import BENCH_USER_EMAIL
+
+    user = User.objects.get(email=BENCH_USER_EMAIL)
+    peer = ChatMessage.objects.filter(Q(sender=user) | Q(receiver=user)).exclude(sender=user).values_list(
+        'sender_id', flat=True
+    ).first()
+    # Ids that have rows behind them, so filtered endpoints return data
+    manager = SpaManager.objects.values('id', 'spa_id').first() or {'id': 0, 'spa_id': 0}
+    return user, {
+        'state_id': State.objects.values_list('id', flat=True).first(),
+        'spa_id': manager['spa_id'],
+        'manager_id': manager['id'],
+        'peer_id': peer or user.id,
+        'document_user_id': Document.objects.exclude(user=None).values_list('user_id', flat=True).first() or user.id,
+        'owner_id': OwnerDocument.objects.values_list('primary_owner_id', flat=True).first() or 0,
+        'doc_type_id': DocumentType.objects.values_list('id', flat=True).first(),
+    }
+
+
+def first_id(client, list_route, cache_ids):
+    from django.urls import NoReverseMatch, reverse
+
+    if list_route not in cache_ids:
+        try:
+            response = client.get(reverse(list_route))
+        except NoReverseMatch:
+            cache_ids[list_route] = None
+            return None
+        data = response.json() if response.status_code == 200 else None
+        rows = data.get('results', []) if isinstance(data, dict) else (data or [])
+        cache_ids[list_route] = rows[0].get('id') if rows and isinstance(rows[0], dict) else None
+    return cache_ids[list_route]
+
+
+class QueryCounter:
+    """execute_wrapper counting queries; unlike CaptureQueriesContext it is not capped by the 9000-entry query log"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(client, url, repeat):
+    from django.core.cache import cache
+    from django.db import connection
+
+    timings = []
+    for _ in range(repeat):
+        # Cold caches: measure what the first visitor after a change pays
+        cache.clear()
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+    content = b''.join(response.streaming_content) if response.streaming else response.content
+    return {
+        'status': response.status_code,
+        'queries': counter.count,
+        'ms': round(statistics.median(timings), 1),
+        'bytes': len(content),
+    }
+
+
+def run(args):
+    from rest_framework.test import APIClient
+    from benchmarks.endpoints import build_url, case_key, discover, list_route_for
+
+    user, context = build_context()
+    # Record server errors as a 500 status instead of aborting the run
+    client = APIClient(raise_request_exception=False)
+    client.force_authenticate(user)
+
+    results, ids = {}, {}
+    for case in discover():
+        key = case_key(case)
+        if args.only and args.only not in key:
+            continue
+        pk = None
+        if case['detail']:
+            pk = first_id(client, list_route_for(case), ids)
+            if pk is None:
+                print(f'  skip {key}: no object to request')
+                continue
+        results[key] = measure(client, build_url(case, pk, context), args.repeat)
+        result = results[key]
+        print(f"  {key:<55} {result['status']:>4} {result['queries']:>5} q {result['ms']:>9.1f} ms {result['bytes']:>10} B")
+    return results
+
+
+def compare(results, baselines, args, vendor):
+    same_dataset = baselines.get('scale') == args.scale and baselines.get('database') == vendor
+    comparable = same_dataset and not args.queries_only
+    regressions = failures(results)
+    for key, result in results.items():
+        base = baselines.get('endpoints', {}).get(key)
+        if base is None:
+            continue
+        if result['status'] != base['status']:
+            regressions.append(f"{key}: status {base['status']} -> {result['status']}")
+        if result['queries'] > base['queries']:
+            regressions.append(f"{key}: queries {base['queries']} -> {result['queries']}")
+        if not comparable:
+            continue
+        if result['ms'] > base['ms'] * (1 + args.time_tolerance) + TIME_SLACK_MS:
+            regressions.append(f"{key}: time {base['ms']}ms -> {result['ms']}ms")
+        if result['bytes'] > base['bytes'] * (1 + args.bytes_tolerance):
+            regressions.append(f"{key}: bytes {base['bytes']} -> {result['bytes']}")
+    if not same_dataset:
+        print('Baselines were recorded at another scale or database; only queries and statuses compared.')
+    return regressions
+
+
+def failures(results):
+    """Endpoints answering with an error status, which usually means the case is missing parameters"""
+    return [f"{key}: status {result['status']}" for key, result in results.items() if result['status'] >= 400]
+
+
+def main(argv=None):
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    setup()
+    from django.db import connection
+
+    prepare_database(args.scale, args.reseed)
+    print('Running endpoints...')
+    results = run(args)
+
+    if args.update_baselines:
+        failed = failures(results)
+        if failed:
+            print(f'\nNot recording baselines; {len(failed)} endpoint(s) failed:')
+            for line in failed:
+                print(f'  {line}')
+            return 1
+        baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() and args.only else {}
+        endpoints = {**baselines.get('endpoints', {}), **results}
+        BASELINES_PATH.write_text(json.dumps({
+            'scale': args.scale,
+            'database': connection.vendor,
+            'endpoints': dict(sorted(endpoints.items())),
+        }, indent=2) + '\n')
+        print(f'Wrote {len(results)} baselines to {BASELINES_PATH}')
+        return 0
+
+    if not BASELINES_PATH.exists():
+        print('No baselines recorded yet; run with --update-baselines')
+        return 0
+    regressions = compare(results, json.loads(BASELINES_PATH.read_text()), args, connection.vendor)
+    if regressions:
+        print(f'\n{len(regressions)} regression(s):')
+        for line in regressions:
+            print(f'  {line}')
+        return 1
+    print('\nNo regressions against baselines')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
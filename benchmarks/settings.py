@@ -0,0 +1,33 @@
+"""Settings for the benchmark run: project settings on a dedicated database"""
+from pathlib import Path
+from decouple import config
+
+from spa_central.settings import *  # noqa: F401,F403
+
+BENCH_DIR = Path(__file__).resolve().parent
+
+_engine = config('BENCH_DB_ENGINE', default='django.db.backends.sqlite3')
+if _engine.endswith('sqlite3'):
+    DATABASES = {
+        'default': {
+            'ENGINE': _engine,
+            'NAME': config('BENCH_DB_NAME', default=str(BENCH_DIR / 'bench.sqlite3')),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': _engine,
+            'NAME': config('BENCH_DB_NAME', default='spa_central_bench'),
+            'USER': config('DB_USER', default=''),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default=''),
+        }
+    }
+
+# Measure the application, not a shared cache or debug tooling
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
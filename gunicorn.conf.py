@@ -0,0 +1,40 @@
+"""
+Gunicorn hooks for multiprocess Prometheus metrics
+
+Gunicorn loads this file from the working directory automatically; worker
+options stay on the command line (deployment/spacentral.service).
+PROMETHEUS_MULTIPROC_DIR is shared with daphne, so only files left by
+processes that are no longer running are cleared.
+"""
+import os
+import re
+from prometheus_client import multiprocess
+
+_PID = re.compile(r'_(\d+)\.db$')
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def on_starting(server):
+    # Stale files from a previous run would be summed into the new counters
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if not path:
+        return
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        match = _PID.search(name)
+        if match and not _alive(int(match.group(1))):
+            os.remove(os.path.join(path, name))
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
@@ -9,15 +9,36 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
-from apps.chat.routing import websocket_urlpatterns
-from apps.chat.auth_middleware import TokenAuthMiddleware
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'spa_central.settings')
+# Read by settings.py to turn off persistent database connections
+os.environ.setdefault('DJANGO_ASGI', 'True')
 
-django_asgi_app = get_asgi_application()
+django.setup(set_prefix=False)
+
+from apps.chat.routing import websocket_urlpatterns  # noqa: E402
+from apps.chat.auth_middleware import TokenAuthMiddleware  # noqa: E402
+
+
+class AsyncReadsASGIHandler(ASGIHandler):
+    """
+    Django's ASGI handler resolving against spa_central.async_urls, which
+    puts the async read endpoints ahead of the regular API (WSGI keeps
+    ROOT_URLCONF and the sync views)
+    """
+
+    urlconf = 'spa_central.async_urls'
+
+    async def get_response_async(self, request):
+        request.urlconf = self.urlconf
+        return await super().get_response_async(request)
+
+
+django_asgi_app = AsyncReadsASGIHandler()
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
@@ -0,0 +1,14 @@
+"""
+URL configuration used under ASGI (see spa_central/asgi.py)
+
+The async read endpoints come first and shadow the sync routes with the
+same path; everything else resolves exactly as in spa_central.urls.
+"""
+from django.urls import include, path
+from .urls import handler404, handler500, urlpatterns as sync_urlpatterns  # noqa: F401
+
+urlpatterns = [
+    path('api/', include('apps.spas.async_urls')),
+    path('api/', include('apps.machine.async_urls')),
+    path('api/', include('apps.chat.async_urls')),
+] + sync_urlpatterns
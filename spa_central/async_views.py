@@ -0,0 +1,301 @@
+"""
+ASGI-native read endpoints for the dashboard hot paths
+
+A sync DRF view under daphne holds a worker thread for the whole request,
+middleware and serialization included. The views here run on the event
+loop. Under ASGI, spa_central/async_urls.py mounts them ahead of the
+regular API (see spa_central/asgi.py); WSGI never sees them and keeps
+serving the sync viewsets.
+
+- AsyncReadView answers GET/HEAD itself. Any other method on the same URL
+  is handed to the sync view the regular urlconf resolves it to, so
+  creates, updates and OPTIONS behave exactly as before.
+- ViewSetListView / ViewSetRetrieveView drive an existing viewset for
+  everything that is not database I/O: permissions, filter backends,
+  sparse fieldsets, serializers, page sizes and ETags. They fetch through
+  the async ORM (aaggregate, acount, async iteration, aget), so responses
+  match the sync endpoints byte for byte. Filter backends and serializers
+  still run in sync_to_async: django-filter validates choice parameters
+  against the database, and serializers may query lazily (method fields
+  such as the owners' spa_count, relations not covered by select_related).
+- Django's async ORM runs each query in the request's thread-sensitive
+  thread, so awaiting several ORM calls with asyncio.gather still runs
+  them one after another. With a connection pool (DB_POOL), gather_queries
+  runs independent queries on the shared ASGI_THREADS pool instead, each
+  on its own pooled connection. Without one every such thread would open
+  and close a fresh connection (CONN_MAX_AGE is 0 under ASGI), which costs
+  more than the parallelism saves, so the calls run one after another on
+  the request's connection.
+"""
+import asyncio
+import math
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.urls import resolve
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .mixins import ConditionalGetMixin
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+async def authenticate(request):
+    """The REST_FRAMEWORK authentication defaults: Token header, then the session"""
+    auth = request.headers.get('Authorization', '').split()
+    if auth and auth[0].lower() == TokenAuthentication.keyword.lower():
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        model = TokenAuthentication().get_model()
+        try:
+            token = await model.objects.select_related('user').aget(key=auth[1])
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return token.user
+    return await request.auser()
+
+
+def _run_and_release(call):
+    try:
+        return call()
+    finally:
+        # Pool threads never see request_finished; return or keep each
+        # connection the way the end of a request would
+        for connection in connections.all(initialized_only=True):
+            connection.close_if_unusable_or_obsolete()
+
+
+async def gather_queries(*calls):
+    """Run independent zero-argument ORM callables (concurrently when pooled) and return their results in order"""
+    if not settings.DB_POOL:
+        return await sync_to_async(lambda: [call() for call in calls])()
+    return await asyncio.gather(*(
+        sync_to_async(_run_and_release, thread_sensitive=False)(call) for call in calls
+    ))
+
+
+async def serialize(viewset, instance, **kwargs):
+    """``viewset.get_serializer(instance, **kwargs).data`` off the event loop"""
+    return await sync_to_async(lambda: viewset.get_serializer(instance, **kwargs).data)()
+
+
+async def paginate(paginator, queryset, request):
+    """
+    Async PageNumberPagination: returns ``(objects, {'count', 'next',
+    'previous'})``, or None when the request is not paginated.
+    """
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return None
+    count = await queryset.acount()
+    num_pages = max(1, math.ceil(count / page_size))
+
+    page_number = request.query_params.get(paginator.page_query_param) or 1
+    if page_number in paginator.last_page_strings:
+        page_number = num_pages
+    try:
+        number = int(page_number)
+    except (TypeError, ValueError):
+        number = 0
+    if not 1 <= number <= num_pages:
+        raise exceptions.NotFound(paginator.invalid_page_message.format(page_number=page_number, message=''))
+
+    offset = (number - 1) * page_size
+    objects = [obj async for obj in queryset[offset:offset + page_size]]
+
+    url = request.build_absolute_uri()
+    param = paginator.page_query_param
+    if number == 1:
+        previous = None
+    elif number == 2:
+        previous = remove_query_param(url, param)
+    else:
+        previous = replace_query_param(url, param, number - 1)
+    return objects, {
+        'count': count,
+        'next': replace_query_param(url, param, number + 1) if number < num_pages else None,
+        'previous': previous,
+    }
+
+
+class AsyncReadView(View):
+    """
+    Base for async GET endpoints with DRF authentication, permissions,
+    content negotiation and error bodies.
+
+    ``get`` receives a DRF Request and returns ``self.respond(request, data)``
+    or any HttpResponse.
+    """
+
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    # The browsable API needs a DRF view to render against
+    renderer_classes = [
+        renderer for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+        if not issubclass(renderer, BrowsableAPIRenderer)
+    ]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Writes are handed to DRF views, which enforce CSRF for session auth
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return await self.fallback(request)
+
+        drf_request = Request(request, negotiator=DefaultContentNegotiation())
+        renderers = [renderer() for renderer in self.renderer_classes]
+        try:
+            renderer, media_type = drf_request.negotiator.select_renderer(drf_request, renderers, kwargs.get('format'))
+        except exceptions.NotAcceptable as exc:
+            drf_request.accepted_renderer, drf_request.accepted_media_type = renderers[0], renderers[0].media_type
+            return self.handle_exception(drf_request, exc)
+        drf_request.accepted_renderer, drf_request.accepted_media_type = renderer, media_type
+
+        try:
+            drf_request.user = await authenticate(request)
+            self.check_permissions(drf_request)
+            response = await self.get(drf_request, *args, **kwargs)
+        except (exceptions.APIException, Http404) as exc:
+            response = self.handle_exception(drf_request, exc)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    async def fallback(self, request):
+        """Serve the request with the sync view the regular urlconf routes it to"""
+        match = resolve(request.path_info, urlconf=settings.ROOT_URLCONF)
+        return await sync_to_async(match.func)(request, *match.args, **match.kwargs)
+
+    def get_permissions(self):
+        return [permission() for permission in self.permission_classes]
+
+    def check_permissions(self, request):
+        for permission in self.get_permissions():
+            if not permission.has_permission(request, self):
+                self.permission_denied(request, permission)
+
+    def check_object_permissions(self, request, obj):
+        for permission in self.get_permissions():
+            if not permission.has_object_permission(request, self, obj):
+                self.permission_denied(request, permission)
+
+    @staticmethod
+    def permission_denied(request, permission):
+        if not request.user.is_authenticated:
+            raise exceptions.NotAuthenticated()
+        raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def handle_exception(self, request, exc):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            # Same 401 challenge TokenAuthentication gives the sync views
+            exc.auth_header = TokenAuthentication.keyword
+        handled = api_settings.EXCEPTION_HANDLER(exc, {'view': self, 'request': request})
+        if handled is None:
+            raise exc
+        response = self.respond(request, handled.data, status=handled.status_code)
+        for header, value in handled.items():
+            if header.lower() != 'content-type':
+                response[header] = value
+        return response
+
+    def respond(self, request, data, status=200):
+        """Render ``data`` with the negotiated renderer into a plain HttpResponse"""
+        response = HttpResponse(status=status)
+        renderer = request.accepted_renderer
+        context = {'view': self, 'request': request, 'response': response}
+        response.content = renderer.render(data, request.accepted_media_type, context)
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        response['Content-Type'] = content_type
+        return response
+
+
+class ViewSetReadView(AsyncReadView):
+    """Serve one read action of ``viewset_class`` asynchronously"""
+
+    viewset_class = None
+    action = None
+
+    def get_permissions(self):
+        return [permission() for permission in self.viewset_class.permission_classes]
+
+    def get_viewset(self, request, kwargs):
+        viewset = self.viewset_class(
+            request=request, args=(), kwargs=kwargs, format_kwarg=kwargs.get('format'), action=self.action,
+        )
+        viewset.headers = {}
+        return viewset
+
+    async def get_filtered_queryset(self, viewset):
+        return await sync_to_async(viewset.filter_queryset)(viewset.get_queryset())
+
+
+class ViewSetListView(ViewSetReadView):
+    """The viewset's ``list`` with async counting, paging and ETags"""
+
+    action = 'list'
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.get_viewset(request, kwargs)
+        paginator = viewset.paginator
+        if paginator is not None and not isinstance(paginator, PageNumberPagination):
+            return await self.fallback(request._request)
+        queryset = await self.get_filtered_queryset(viewset)
+
+        etag = None
+        if isinstance(viewset, ConditionalGetMixin):
+            etag = await viewset.aget_list_etag(request, queryset)
+            if viewset._etag_matches(request, etag):
+                return viewset._not_modified(etag)
+
+        page = await paginate(paginator, queryset, request) if paginator is not None else None
+        if page is None:
+            objects = [obj async for obj in queryset]
+            data = await serialize(viewset, objects, many=True)
+        else:
+            objects, links = page
+            data = {**links, 'results': await serialize(viewset, objects, many=True)}
+
+        response = self.respond(request, data)
+        return viewset._set_validators(response, etag) if etag is not None else response
+
+
+class ViewSetRetrieveView(ViewSetReadView):
+    """The viewset's ``retrieve`` with an async lookup and ETags"""
+
+    action = 'retrieve'
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.get_viewset(request, kwargs)
+        queryset = await self.get_filtered_queryset(viewset)
+        lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+        try:
+            instance = await queryset.aget(**{viewset.lookup_field: kwargs[lookup_url_kwarg]})
+        except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+            # Same message get_object_or_404 gives the sync view
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        self.check_object_permissions(request, instance)
+
+        if not isinstance(viewset, ConditionalGetMixin):
+            return self.respond(request, await serialize(viewset, instance))
+
+        etag = await viewset.aget_detail_etag(request, instance)
+        last_modified = None if viewset.detail_etag_related else getattr(instance, viewset.etag_field, None)
+        if viewset._etag_matches(request, etag) or viewset._not_modified_since(request, last_modified):
+            return viewset._not_modified(etag, last_modified)
+        response = self.respond(request, await serialize(viewset, instance))
+        return viewset._set_validators(response, etag, last_modified)
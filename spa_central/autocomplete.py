@@ -0,0 +1,101 @@
+"""
+Prefix autocomplete for picker dropdowns
+
+Searchable models keep lowercased, whitespace-collapsed copies of their
+display columns in indexed ``*_norm`` fields (filled on save by
+spa_central.models.NormalizedFieldsModel). An AutocompleteView matches
+``?q=`` as a prefix of those columns and returns at most ``?limit=``
+``{id, label}`` pairs straight from ``values_list``, so no model instances
+or serializers are involved. Results are cached per prefix under a per-picker version that
+the owning app's signals bump on every change.
+
+The prefix match must stay a LIKE the column's index can serve. On
+PostgreSQL that is ``startswith`` with the varchar_pattern_ops indexes. On
+MySQL ``startswith`` compiles to LIKE BINARY, which bypasses the column
+collation and with it the index, so the case-insensitive ``istartswith``
+(a plain LIKE) is used there; the columns are already lowercase, so the
+matches are the same.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from django.utils.cache import patch_cache_control
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from apps.users.permissions import IsAdminUser
+from .caching import digest, invalidate, versioned_key
+from .models import normalize
+
+
+def get_setting(name):
+    return settings.AUTOCOMPLETE[name]
+
+
+def prefix_lookup(vendor):
+    """The startswith lookup that can use an index on ``vendor``'s normalized columns"""
+    return 'istartswith' if vendor == 'mysql' else 'startswith'
+
+
+def _namespace(name):
+    return f'autocomplete:{name}'
+
+
+def invalidate_autocomplete(*names):
+    """Start a new cache generation for the given pickers"""
+    invalidate(*(_namespace(name) for name in names))
+
+
+class AutocompleteView(APIView):
+    """
+    ``GET ?q=<prefix>&limit=<n>`` -> ``[{"id": 1, "label": "..."}, ...]``
+
+    Subclasses set ``name`` (cache namespace, also used by
+    ``invalidate_autocomplete``), ``model``, the normalized
+    ``search_fields`` matched by prefix (the first one orders results) and
+    the ``label_fields`` joined with ``label_separator`` into the label.
+    """
+
+    permission_classes = [IsAdminUser]
+    name = None
+    model = None
+    search_fields = ()
+    label_fields = ()
+    label_separator = ' - '
+
+    def get(self, request):
+        prefix = normalize(request.query_params.get('q'))[:100]
+        limit = self.get_limit(request)
+        key = versioned_key(_namespace(self.name), limit, digest(prefix))
+        results = cache.get(key)
+        if results is None:
+            results = self.search(prefix, limit)
+            cache.set(key, results, get_setting('CACHE_TIMEOUT'))
+        response = Response(results)
+        patch_cache_control(response, private=True, max_age=get_setting('CLIENT_MAX_AGE'))
+        return response
+
+    @staticmethod
+    def get_limit(request):
+        try:
+            limit = int(request.query_params.get('limit', get_setting('LIMIT')))
+        except ValueError:
+            limit = get_setting('LIMIT')
+        return max(1, min(limit, get_setting('MAX_LIMIT')))
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def search(self, prefix, limit):
+        queryset = self.get_queryset()
+        if prefix:
+            lookup = prefix_lookup(connections[queryset.db].vendor)
+            condition = Q()
+            for field in self.search_fields:
+                condition |= Q(**{f'{field}__{lookup}': prefix})
+            queryset = queryset.filter(condition)
+        rows = queryset.order_by(self.search_fields[0], 'pk').values_list('pk', *self.label_fields)[:limit]
+        return [{'id': row[0], 'label': self.format_label(row[1:])} for row in rows]
+
+    def format_label(self, values):
+        return self.label_separator.join(str(value) for value in values if value not in (None, ''))
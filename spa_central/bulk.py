@@ -0,0 +1,47 @@
+"""Shared helpers for bulk write endpoints"""
+
+
+class BulkConflict(Exception):
+    """A bulk write that was rolled back and can be retried as-is (HTTP 409)"""
+
+
+def request_flag(request, name):
+    """Boolean option from a JSON, form or multipart body; only 1/true/yes enable it"""
+    data = request.data if hasattr(request.data, 'get') else {}
+    return str(data.get(name, '')).lower() in ('1', 'true', 'yes')
+
+
+class BulkResult:
+    """Collects per-row outcomes for a bulk request"""
+
+    def __init__(self, size):
+        self.rows = [{'index': index, 'status': 'ok', 'errors': {}} for index in range(size)]
+
+    def add_error(self, index, field, message):
+        row = self.rows[index]
+        row['status'] = 'error'
+        row['errors'].setdefault(field, []).append(message)
+
+    def merge_errors(self, index, errors):
+        for field, messages in errors.items():
+            for message in messages if isinstance(messages, list) else [messages]:
+                self.add_error(index, field, str(message))
+
+    def is_valid(self, index):
+        return self.rows[index]['status'] != 'error'
+
+    @property
+    def error_count(self):
+        return sum(1 for row in self.rows if row['status'] == 'error')
+
+    def finish(self, applied_status):
+        """Mark remaining valid rows as applied (or not) and build the response body"""
+        for row in self.rows:
+            if row['status'] == 'ok':
+                row['status'] = applied_status
+            if not row['errors']:
+                del row['errors']
+        counts = {}
+        for row in self.rows:
+            counts[row['status']] = counts.get(row['status'], 0) + 1
+        return {'summary': counts, 'results': self.rows}
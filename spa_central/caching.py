@@ -0,0 +1,49 @@
+"""
+Versioned cache namespaces
+
+Payloads are cached under ``<namespace>:<version>:...`` where the version
+lives in the cache without expiry at ``<namespace>:version``. Bumping the
+version expires every payload of the namespace at once without tracking
+individual keys; the stale entries age out through their own timeout.
+"""
+
+import hashlib
+import uuid
+from django.core.cache import cache
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def get_version(namespace):
+    """Current version of ``namespace``, starting one if the cache has none"""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # A random version (not a counter) so an evicted version key can
+        # never bring back payloads cached under an earlier generation
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(*namespaces):
+    """Start a new cache generation for each namespace"""
+    cache.set_many({_version_key(namespace): uuid.uuid4().hex for namespace in namespaces}, None)
+
+
+def versioned_key(namespace, *parts):
+    """Cache key for ``parts`` under the current version of ``namespace``"""
+    return ':'.join([namespace, get_version(namespace), *(str(part) for part in parts)])
+
+
+def digest(value):
+    """Short stable digest of a string for use in cache keys"""
+    return hashlib.md5(value.encode(), usedforsecurity=False).hexdigest()
+
+
+def query_params_digest(query_params):
+    """Digest of request query parameters, independent of their order"""
+    items = sorted((key, tuple(sorted(query_params.getlist(key)))) for key in query_params)
+    return digest(repr(items))
@@ -0,0 +1,141 @@
+"""
+Read-replica routing for API traffic
+
+When DATABASES has a ``replica`` alias, ReplicaPinningMiddleware marks
+GET/HEAD/OPTIONS requests as replica-eligible, so list, detail and
+statistics reads leave the primary without any view changes. Everything
+else reads from the primary:
+
+- unsafe methods, management commands, websocket consumers and any code
+  running outside a request
+- the rest of a request once it wrote anything (read-after-write)
+- requests from a client that wrote within DB_REPLICA_STICKY_SECONDS,
+  identified by its Authorization header or session cookie, so a list
+  fetched right after an edit does not show replica lag
+- queries inside a transaction on the primary
+
+Without a ``replica`` alias both classes are no-ops.
+"""
+import hashlib
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_request_state = ContextVar('db_request_state', default=None)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+class RequestState:
+    """Routing decisions for one request"""
+
+    def __init__(self, request):
+        self.client_key = self._client_key(request)
+        self.safe = request.method in SAFE_METHODS
+        self.wrote = False
+        self._sticky = None
+
+    @staticmethod
+    def _client_key(request):
+        identity = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if not identity:
+            return None
+        return 'db:pin:' + hashlib.sha256(identity.encode()).hexdigest()
+
+    def sticky(self):
+        # Looked up on the first read only, so requests that never reach the
+        # database pay nothing
+        if self._sticky is None:
+            self._sticky = self.client_key is not None and cache.get(self.client_key) is not None
+        return self._sticky
+
+    def use_replica(self):
+        if not self.safe or self.wrote or connections[PRIMARY].in_atomic_block:
+            return False
+        return not self.sticky()
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if not replica_configured():
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Related lookups stay on the database the instance came from
+            return instance._state.db
+        state = _request_state.get()
+        if state is not None and state.use_replica():
+            return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """Track each request's routing state and start the sticky window after writes"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = replica_configured()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        state = RequestState(request)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if self._pins(state):
+            cache.set(state.client_key, 1, timeout=settings.DB_REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        # Async ORM calls copy this context into their threads, so the router
+        # sees the same state object
+        state = RequestState(request)
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if self._pins(state):
+            await cache.aset(state.client_key, 1, timeout=settings.DB_REPLICA_STICKY_SECONDS)
+        return response
+
+    @staticmethod
+    def _pins(state):
+        return (state.wrote or not state.safe) and state.client_key is not None
@@ -0,0 +1,184 @@
+import hashlib
+
+from django.db.models import Count, F, Func, Max, Subquery
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework.response import Response
+from .serializers import SparseFieldsetMixin
+
+
+class ConditionalGetMixin:
+    """Answer list/retrieve requests with ETag validators and 304 responses.
+
+    List ETags are built from ``Max(updated_at)`` plus the row count of the
+    filtered queryset and a hash of the request path/query string, so one
+    cheap aggregate query decides whether the page changed. Detail ETags are
+    built from the object's ``updated_at``. Either way the 304 is returned
+    before the serializer runs.
+
+    ``etag_related`` lists every relation path whose data is rendered into
+    the response, down to the deepest name (``spa``, ``spa__area__city``,
+    ``spa__area__city__state``, ...). ``etag_detail_related`` adds paths
+    only the detail serializer renders. Each path's latest ``updated_at``
+    and row count come from its own subquery over the related table
+    (``WHERE pk IN (<the page's related ids>)``), folded into the same
+    aggregate query, so a rename, a new row or a delete on the related side
+    changes the ETag without joining several reverse relations together.
+    """
+
+    etag_field = 'updated_at'
+    etag_related = ()
+    etag_detail_related = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        etag = self.get_list_etag(request, queryset)
+        if self._etag_matches(request, etag):
+            return self._not_modified(etag)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            response = Response(serializer.data)
+        return self._set_validators(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        etag = self.get_detail_etag(request, instance)
+        # Last-Modified only covers the row itself, so skip it when related
+        # rows feed the payload and rely on the ETag alone
+        last_modified = None if self.detail_etag_related else getattr(instance, self.etag_field, None)
+        if self._etag_matches(request, etag) or self._not_modified_since(request, last_modified):
+            return self._not_modified(etag, last_modified)
+
+        serializer = self.get_serializer(instance)
+        return self._set_validators(Response(serializer.data), etag, last_modified)
+
+    @property
+    def detail_etag_related(self):
+        return tuple(self.etag_related) + tuple(self.etag_detail_related)
+
+    def get_list_etag(self, request, queryset):
+        return self._make_etag(request, self._aggregate_validators(queryset, self.etag_related))
+
+    def get_detail_etag(self, request, instance):
+        parts = [instance.pk, getattr(instance, self.etag_field, None)]
+        if self.detail_etag_related:
+            queryset = self.get_queryset().filter(pk=instance.pk)
+            parts.extend(self._aggregate_validators(queryset, self.detail_etag_related))
+        return self._make_etag(request, parts)
+
+    async def aget_list_etag(self, request, queryset):
+        """get_list_etag for the async read views (spa_central/async_views.py)"""
+        aggregates = self._validator_aggregates(queryset, self.etag_related)
+        values = await queryset.order_by().aaggregate(**aggregates)
+        return self._make_etag(request, [values[key] for key in sorted(values)])
+
+    async def aget_detail_etag(self, request, instance):
+        parts = [instance.pk, getattr(instance, self.etag_field, None)]
+        if self.detail_etag_related:
+            queryset = self.get_queryset().filter(pk=instance.pk)
+            aggregates = self._validator_aggregates(queryset, self.detail_etag_related)
+            values = await queryset.order_by().aaggregate(**aggregates)
+            parts.extend(values[key] for key in sorted(values))
+        return self._make_etag(request, parts)
+
+    def _validator_aggregates(self, queryset, related):
+        aggregates = {
+            'max': Max(self.etag_field),
+            'count': Count('pk'),
+        }
+        if not related:
+            return aggregates
+        if queryset.query.annotations:
+            # Aggregate annotations would regroup values(path); go through the pks
+            queryset = queryset.model._default_manager.filter(pk__in=queryset.values('pk'))
+        for index, path in enumerate(related):
+            model = queryset.model
+            for name in path.split('__'):
+                model = model._meta.get_field(name).related_model
+            rows = model._default_manager.filter(pk__in=queryset.order_by().values(path)).order_by()
+            # Uncorrelated scalar subqueries: evaluated once, Max() only lifts
+            # them into the aggregate query
+            aggregates[f'related_{index}_max'] = Max(Subquery(
+                rows.annotate(value=Func(F(self.etag_field), function='MAX')).values('value')[:1]
+            ))
+            aggregates[f'related_{index}_count'] = Max(Subquery(
+                rows.annotate(value=Func(F('pk'), function='COUNT')).values('value')[:1]
+            ))
+        return aggregates
+
+    def _aggregate_validators(self, queryset, related):
+        values = queryset.order_by().aggregate(**self._validator_aggregates(queryset, related))
+        return [values[key] for key in sorted(values)]
+
+    def _make_etag(self, request, parts):
+        renderer = getattr(request, 'accepted_renderer', None)
+        parts = [request.get_full_path(), getattr(renderer, 'format', '')] + [
+            value.isoformat() if hasattr(value, 'isoformat') else value for value in parts
+        ]
+        digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+        return f'W/"{digest}"'
+
+    @staticmethod
+    def _strip_weak(etag):
+        return etag[2:] if etag.startswith('W/') else etag
+
+    def _etag_matches(self, request, etag):
+        header = request.headers.get('If-None-Match')
+        if not header:
+            return False
+        candidates = parse_etags(header)
+        if '*' in candidates:
+            return True
+        target = self._strip_weak(etag)
+        return any(self._strip_weak(candidate) == target for candidate in candidates)
+
+    @staticmethod
+    def _not_modified_since(request, last_modified):
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        if last_modified is None or request.headers.get('If-None-Match'):
+            return False
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return since is not None and int(last_modified.timestamp()) <= since
+
+    def _not_modified(self, etag, last_modified=None):
+        return self._set_validators(HttpResponseNotModified(), etag, last_modified)
+
+    @staticmethod
+    def _set_validators(response, etag, last_modified=None):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        # Force browsers to revalidate instead of serving stale dashboards
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class SparseQuerysetMixin:
+    """Narrow list/retrieve querysets to the fields a ``?fields=``/``?omit=`` request keeps.
+
+    The serializer (a SparseFieldsetMixin) prunes its own fields; this
+    mixin hands the pruned serializer the filtered queryset so unused
+    columns, joins and prefetches are dropped as well. ``etag_field`` is
+    always loaded so ConditionalGetMixin keeps working without a refetch.
+    """
+
+    sparse_actions = ('list', 'retrieve')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+        if self.action not in self.sparse_actions or not (params.get('fields') or params.get('omit')):
+            return queryset
+        serializer = self.get_serializer()
+        if not isinstance(serializer, SparseFieldsetMixin):
+            return queryset
+        extra = [self.etag_field] if hasattr(self, 'etag_field') else []
+        return serializer.sparse_queryset(queryset, extra=extra)
@@ -0,0 +1,29 @@
+"""Abstract model bases shared by the apps"""
+import re
+from django.db import models
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(value):
+    """'  Lotus   SPA ' -> 'lotus spa'"""
+    return _WHITESPACE.sub(' ', value or '').strip().lower()
+
+
+class NormalizedFieldsModel(models.Model):
+    """Fill ``normalized_fields`` ({target: source}) from their source columns on save"""
+
+    normalized_fields = {}
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        for target, source in self.normalized_fields.items():
+            setattr(self, target, normalize(getattr(self, source)))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                target for target, source in self.normalized_fields.items() if source in update_fields
+            }
+        super().save(*args, **kwargs)
@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -12,3 +12,16 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 10000
 
 
+class HistoryCursorPagination(CursorPagination):
+    """Cursor pagination for append-only logs; stable and O(page) at any depth."""
+
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-timestamp'
+
+
+class MessageCursorPagination(HistoryCursorPagination):
+    """Newest-first message history walking the (conversation, id) index."""
+
+    ordering = '-id'
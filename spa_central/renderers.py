@@ -0,0 +1,85 @@
+"""
+Compact renderers for high-volume list responses
+
+Both are picked by content negotiation (``Accept`` header or ``?format=``);
+clients that ask for nothing in particular keep getting plain JSON.
+
+- ``application/msgpack`` (``?format=msgpack``): the same structure as the
+  JSON response, packed as MessagePack.
+- ``application/vnd.spacentral.columnar+json`` (``?format=columnar``): every
+  list of objects (a plain list response or a page's ``results``) is sent as
+  ``{"columns": [...], "rows": [[...], ...]}``, so a 500-row page carries each
+  key once instead of 500 times. Other payloads render as plain JSON.
+"""
+import datetime
+import decimal
+import uuid
+import msgpack
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+def _vary_on_accept(renderer_context):
+    response = (renderer_context or {}).get('response')
+    if response is not None:
+        patch_vary_headers(response, ['Accept'])
+
+
+def to_columns(rows):
+    """
+    [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}]
+        -> {'columns': ['id', 'name'], 'rows': [[1, 'a'], [2, 'b']]}
+
+    Returns ``rows`` unchanged unless every item is a dict with the same keys.
+    """
+    if not rows or not all(isinstance(row, dict) for row in rows):
+        return rows
+    columns = list(rows[0])
+    keys = set(columns)
+    if any(row.keys() != keys for row in rows):
+        return rows
+    return {'columns': columns, 'rows': [[row[column] for column in columns] for row in rows]}
+
+
+def columnar(data):
+    if isinstance(data, list):
+        return to_columns(data)
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return {**data, 'results': to_columns(data['results'])}
+    return data
+
+
+def _encode(value):
+    """msgpack fallback for values DRF leaves unconverted"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID, Promise)):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, '__iter__'):
+        return list(value)
+    raise TypeError(f'Cannot serialize {type(value).__name__} to msgpack')
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        _vary_on_accept(renderer_context)
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encode, use_bin_type=True, datetime=False)
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    media_type = 'application/vnd.spacentral.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        _vary_on_accept(renderer_context)
+        return super().render(columnar(data), accepted_media_type, renderer_context)
@@ -0,0 +1,161 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def _resolve(model, lookup):
+    """Map a lookup to what a queryset must load for it.
+
+    Returns ``(column, relations, many)``: the ``only()`` path (None when the
+    lookup starts with a reverse/many relation), the forward relation
+    prefixes it crosses and whether it ends in a to-many relation. Returns
+    None when a part is neither a model field nor ``get_<field>_display``.
+    """
+    parts = lookup.split('__')
+    relations = []
+    current = model
+    for index, part in enumerate(parts):
+        try:
+            field = current._meta.get_field(part)
+        except FieldDoesNotExist:
+            if not (part.startswith('get_') and part.endswith('_display')):
+                return None
+            try:
+                field = current._meta.get_field(part[4:-8])
+            except FieldDoesNotExist:
+                return None
+        prefix = '__'.join(parts[:index] + [field.name])
+        if not field.is_relation:
+            return prefix, relations, False
+        if field.many_to_many or field.one_to_many or not field.concrete:
+            return ('__'.join(parts[:index]) or None), relations, True
+        relations.append(prefix)
+        current = field.related_model
+    return '__'.join(parts), relations[:-1], False
+
+
+def _select_related_paths(tree, prefix=''):
+    for name, children in tree.items():
+        path = f'{prefix}{name}'
+        if children:
+            yield from _select_related_paths(children, f'{path}__')
+        else:
+            yield path
+
+
+class SparseFieldsetMixin:
+    """Let read requests pick response fields with ``?fields=`` / ``?omit=``.
+
+    ``?fields=id,spa_code,spa_name`` keeps only those fields and ``?omit=``
+    drops fields; an unknown name is a 400 naming the parameter, so a
+    typo does not silently return a different shape. Fields are pruned in
+    ``get_fields`` so dropped fields are never serialized. Only the
+    top-level serializer of a GET/HEAD/OPTIONS request is pruned; nested
+    serializers and writes keep every field.
+
+    ``sparse_queryset`` narrows a queryset to the columns, joins and
+    prefetches the remaining fields read (see SparseQuerysetMixin). Fields
+    whose source is not a model lookup (SerializerMethodField, properties)
+    list the lookups they read in ``Meta.sparse_sources``; a field without
+    one leaves the queryset untouched.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested, omitted = self.get_sparse_fieldset()
+        errors = {
+            param: [f"Unknown field(s): {', '.join(sorted(names - set(fields)))}"]
+            for param, names in (('fields', requested), ('omit', omitted)) if names - set(fields)
+        }
+        if errors:
+            raise ValidationError(errors)
+        if requested:
+            fields = {name: field for name, field in fields.items() if name in requested}
+        for name in omitted:
+            fields.pop(name, None)
+        return fields
+
+    def get_sparse_fieldset(self):
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or not self._is_top_level():
+            return set(), set()
+        params = getattr(request, 'query_params', request.GET)
+        return _names(params.get('fields', '')), _names(params.get('omit', ''))
+
+    def _is_top_level(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, ListSerializer) and parent.parent is None)
+
+    def sparse_queryset(self, queryset, extra=()):
+        """Restrict ``queryset`` to what the (pruned) fields read, plus ``extra`` model fields if present"""
+        model = queryset.model
+        declared = getattr(self.Meta, 'sparse_sources', {})
+        columns = {model._meta.pk.name}
+        for lookup in extra:
+            resolved = _resolve(model, lookup)
+            if resolved is not None and resolved[0]:
+                columns.add(resolved[0])
+        relations = set()
+        whole = set()  # relations rendered by nested serializers, loaded in full
+        roots = set()
+
+        for name, field in self.fields.items():
+            if name in declared:
+                lookups = declared[name]
+            elif field.source == '*':
+                return queryset
+            else:
+                lookups = [field.source.replace('.', '__')]
+            for lookup in lookups:
+                resolved = _resolve(model, lookup)
+                if resolved is None:
+                    return queryset
+                column, crossed, many = resolved
+                roots.add(lookup.split('__')[0])
+                relations.update(crossed)
+                if column:
+                    columns.add(column)
+                if isinstance(field, BaseSerializer) and not many:
+                    relations.add(column)
+                    whole.add(column)
+
+        select_related = queryset.query.select_related
+        if isinstance(select_related, dict):
+            kept = set()
+            for path in _select_related_paths(select_related):
+                parts = path.split('__')
+                prefixes = ['__'.join(parts[:size]) for size in range(1, len(parts) + 1)]
+                if any(prefix in whole for prefix in prefixes):
+                    kept.add(path)
+                    continue
+                needed = [prefix for prefix in prefixes if prefix in relations]
+                if needed:
+                    kept.add(needed[-1])
+            queryset = queryset.select_related(None)
+            if kept:
+                queryset = queryset.select_related(*kept)
+            joined = {'__'.join(path.split('__')[:size]) for path in kept for size in range(1, path.count('__') + 2)}
+        else:
+            joined = set()
+
+        loaded = set()
+        for column in columns:
+            parts = column.split('__')
+            if any('__'.join(parts[:size]) in whole for size in range(1, len(parts))):
+                continue
+            # Columns behind a relation that is not joined load lazily through the FK
+            if len(parts) > 1 and '__'.join(parts[:-1]) not in joined:
+                column = parts[0]
+            loaded.add(column)
+
+        prefetches = [
+            lookup for lookup in queryset._prefetch_related_lookups
+            if getattr(lookup, 'prefetch_through', lookup).split('__')[0] in roots
+        ]
+        return queryset.prefetch_related(None).prefetch_related(*prefetches).only(*loaded)
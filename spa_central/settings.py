@@ -83,16 +83,23 @@ INSTALLED_APPS = [
     'apps.documents',
     'apps.chat',
     'apps.simcard',
+    'apps.audit',
+    'apps.monitoring',
 ]
 
 MIDDLEWARE = [
+    'apps.monitoring.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'spa_central.middleware.WhiteNoiseMiddleware',
+    'spa_central.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.audit.middleware.AuditContextMiddleware',
+    'spa_central.db_router.ReplicaPinningMiddleware',
+    'apps.monitoring.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -122,21 +129,76 @@ WSGI_APPLICATION = 'spa_central.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+#
+# Connections are reused instead of reconnecting per request:
+# - MySQL (production): persistent connections kept for DB_CONN_MAX_AGE
+#   seconds by each gunicorn worker
+# - Under daphne (DJANGO_ASGI, set by spa_central/asgi.py) never persistent:
+#   each sync_to_async thread opens its own connection, and Django only
+#   expires connections in the thread handling the request signals, so the
+#   others would stay open until the server dropped them
+# - PostgreSQL (docker-compose.yml): Django's native psycopg pool when
+#   DB_POOL is on, which replaces persistent connections
+# ASGI_THREADS in deployment/daphne.service must stay within DB_POOL_MAX_SIZE.
+DB_ENGINE = config('DB_ENGINE')
+DB_POOL = config('DB_POOL', default=True, cast=bool) and DB_ENGINE.endswith('postgresql')
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=10, cast=int)
+ASGI = config('DJANGO_ASGI', default=False, cast=bool)
+
+if DB_ENGINE.endswith('mysql'):
+    DB_OPTIONS = {
+        'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+        'charset': 'utf8mb4',
+    }
+elif DB_POOL:
+    DB_OPTIONS = {
+        'pool': {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            # Seconds a request waits for a free connection before erroring
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        },
+    }
+else:
+    DB_OPTIONS = {}
+
 DATABASES = {
     'default': {
-        'ENGINE': config('DB_ENGINE'),
+        'ENGINE': DB_ENGINE,
         'NAME': config('DB_NAME'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
-        'OPTIONS': {
-            'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
-            'charset': 'utf8mb4',
-        },
+        # Pooled connections must not also be persistent, nor may ASGI's
+        'CONN_MAX_AGE': 0 if DB_POOL or ASGI else config('DB_CONN_MAX_AGE', default=60, cast=int),
+        # Ping a reused connection once per request so a dropped one is replaced
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': DB_OPTIONS,
     }
 }
 
+# Optional read replica (see spa_central/db_router.py). Setting DB_REPLICA_NAME
+# enables it; other DB_REPLICA_* values default to the primary's, so two SQLite
+# files only need DB_NAME and DB_REPLICA_NAME.
+if config('DB_REPLICA_NAME', default=''):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME'),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': config('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        # Tests read their own writes through the replica alias
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['spa_central.db_router.ReplicaRouter']
+
+# Seconds a client keeps reading from the primary after it wrote
+DB_REPLICA_STICKY_SECONDS = config('DB_REPLICA_STICKY_SECONDS', default=5, cast=int)
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
@@ -212,14 +274,14 @@ if DEBUG:
     # Development: In-memory channel layer
     CHANNEL_LAYERS = {
         'default': {
-            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+            'BACKEND': 'apps.monitoring.layers.InstrumentedInMemoryChannelLayer',
         },
     }
 else:
     # Production: Redis channel layer
     CHANNEL_LAYERS = {
         'default': {
-            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'BACKEND': 'apps.monitoring.layers.InstrumentedRedisChannelLayer',
             'CONFIG': {
                 'hosts': [(config('REDIS_HOST', default='127.0.0.1'), config('REDIS_PORT', default=6379, cast=int))],
                 'capacity': 1500,
@@ -228,6 +290,31 @@ else:
         },
     }
 
+# Cache Configuration
+if DEBUG:
+    # Development: Per-process in-memory cache
+    CACHES = {
+        'default': {
+            'BACKEND': 'apps.monitoring.cache.InstrumentedLocMemCache',
+        },
+    }
+else:
+    # Production: Redis cache shared by all workers so signal-driven
+    # invalidation is seen by every process
+    CACHES = {
+        'default': {
+            'BACKEND': 'apps.monitoring.cache.InstrumentedRedisCache',
+            'LOCATION': f"redis://{config('REDIS_HOST', default='127.0.0.1')}:{config('REDIS_PORT', default=6379, cast=int)}/{config('REDIS_CACHE_DB', default=1, cast=int)}",
+            'KEY_PREFIX': 'spa_central',
+            # Fail instead of hanging a request (or a readiness check) on a stuck Redis
+            'OPTIONS': {
+                'socket_connect_timeout': config('REDIS_SOCKET_TIMEOUT', default=2.0, cast=float),
+                'socket_timeout': config('REDIS_SOCKET_TIMEOUT', default=2.0, cast=float),
+            },
+        },
+    }
+
+
 
 # ============================================================================
 # DJANGO REST FRAMEWORK CONFIGURATION
@@ -249,11 +336,13 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 500,      # Default page size
     'MAX_PAGE_SIZE': 10000,  # Maximum page size that can be requested
     
-    # Renderers
+    # Renderers (see spa_central/renderers.py); JSON stays first as the default.
+    # The browsable API is only rendered in development.
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
-    ],
+        'spa_central.renderers.MessagePackRenderer',
+        'spa_central.renderers.ColumnarJSONRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
     
     # Rate Limiting / Throttling Configuration
     'DEFAULT_THROTTLE_CLASSES': [],  # Applied per-view, not globally
@@ -277,6 +366,125 @@ REST_FRAMEWORK = {
 }
 
 
+# ============================================================================
+# MACHINE SERVICE-HEALTH RULES (see apps/machine/health.py)
+# ============================================================================
+MACHINE_HEALTH = {
+    # Rule codes to evaluate; drop a code to disable that rule
+    'RULES': config(
+        'MACHINE_HEALTH_RULES',
+        default='broken,missing_mid_tid,missing_bank_info,no_account_holder,stale_record,outdated_firmware',
+        cast=Csv()
+    ),
+    'STALE_AFTER_DAYS': config('MACHINE_HEALTH_STALE_AFTER_DAYS', default=180, cast=int),
+    'MIN_FIRMWARE_VERSION': config('MACHINE_HEALTH_MIN_FIRMWARE_VERSION', default=''),  # Empty disables the check
+}
+
+
+# ============================================================================
+# REQUEST PROFILING (see apps/monitoring/profiling.py)
+# ============================================================================
+PROFILING = {
+    # Fraction of HTTP requests / websocket events profiled; 0 disables profiling
+    'SAMPLE_RATE': config('PROFILING_SAMPLE_RATE', default=0.0, cast=float),
+    # Identical SQL shapes repeated this often in one request are flagged as N+1
+    'N_PLUS_ONE_THRESHOLD': config('PROFILING_N_PLUS_ONE_THRESHOLD', default=5, cast=int),
+    'SUMMARY_TIMEOUT': config('PROFILING_SUMMARY_TIMEOUT', default=60 * 60 * 24, cast=int),
+}
+
+
+# ============================================================================
+# PROMETHEUS METRICS (see apps/monitoring/metrics.py, served at /metrics/)
+# ============================================================================
+# Under gunicorn/daphne with several workers, export PROMETHEUS_MULTIPROC_DIR
+# (a writable directory shared by gunicorn and daphne) so /metrics/ aggregates
+# every process; gunicorn.conf.py clears files left by dead processes.
+METRICS = {
+    'ENABLED': config('METRICS_ENABLED', default=True, cast=bool),
+    # Scrapers must send "Authorization: Bearer <token>"; /metrics/ answers
+    # 403 while no token is configured
+    'TOKEN': config('METRICS_TOKEN', default=''),
+}
+
+
+# ============================================================================
+# READINESS PROBE (see apps/monitoring/health.py, served at /health/ready/)
+# ============================================================================
+HEALTH = {
+    # Seconds the DB, channel layer, cache and media checks may take together
+    'TIMEOUT': config('HEALTH_TIMEOUT', default=2.0, cast=float),
+    # Seconds a report is reused so probes cannot become a load source
+    'CACHE_SECONDS': config('HEALTH_CACHE_SECONDS', default=2.0, cast=float),
+}
+
+# ============================================================================
+# AUTOCOMPLETE PICKERS (see spa_central/autocomplete.py)
+# ============================================================================
+AUTOCOMPLETE = {
+    # Suggestions returned when the client sends no ?limit=, and the cap on it
+    'LIMIT': config('AUTOCOMPLETE_LIMIT', default=20, cast=int),
+    'MAX_LIMIT': config('AUTOCOMPLETE_MAX_LIMIT', default=100, cast=int),
+    # Seconds a prefix's results stay in the shared cache (edits bump a version)
+    'CACHE_TIMEOUT': config('AUTOCOMPLETE_CACHE_TIMEOUT', default=300, cast=int),
+    # Seconds browsers may reuse a response without asking again
+    'CLIENT_MAX_AGE': config('AUTOCOMPLETE_CLIENT_MAX_AGE', default=60, cast=int),
+}
+
+# ============================================================================
+# CHAT RETENTION (see apps/chat/retention.py)
+# ============================================================================
+CHAT_RETENTION = {
+    # Read notifications older than this many days are deleted
+    'NOTIFICATION_DAYS': config('CHAT_NOTIFICATION_RETENTION_DAYS', default=90, cast=int),
+    # Messages older than this many days move to chat_messages_archive
+    'ARCHIVE_AFTER_DAYS': config('CHAT_ARCHIVE_AFTER_DAYS', default=365, cast=int),
+    # Rows deleted or moved per transaction
+    'BATCH_SIZE': config('CHAT_RETENTION_BATCH_SIZE', default=1000, cast=int),
+}
+
+# ============================================================================
+# RESPONSE COMPRESSION (see spa_central/compression.py)
+# ============================================================================
+COMPRESSION = {
+    # Buffered responses smaller than this many bytes are sent as-is
+    'MIN_SIZE': config('COMPRESSION_MIN_SIZE', default=1024, cast=int),
+    # Dynamic-content trade-offs; see `manage.py benchmark_compression`
+    'GZIP_LEVEL': config('COMPRESSION_GZIP_LEVEL', default=6, cast=int),
+    'BROTLI_QUALITY': config('COMPRESSION_BROTLI_QUALITY', default=4, cast=int),
+    # Streaming responses are flushed to the client after this many input bytes
+    'STREAM_FLUSH_SIZE': config('COMPRESSION_STREAM_FLUSH_SIZE', default=64 * 1024, cast=int),
+    # Content types compressed (+json types always are). API payloads only:
+    # HTML pages carry CSRF tokens next to reflected input (BREACH), and
+    # images, PDFs, office files and archives are already compressed
+    'TYPES': [
+        'application/json',
+        'application/msgpack',
+        'text/csv',
+    ],
+}
+
+# ============================================================================
+# CELERY BEAT SCHEDULE (run `celery -A spa_central beat` next to the worker)
+# ============================================================================
+CELERY_BEAT_SCHEDULE = {
+    # Time-based health rules (stale_record) only change between saves
+    'refresh-machine-health': {
+        'task': 'apps.machine.tasks.refresh_machine_health_task',
+        'schedule': config('MACHINE_HEALTH_REFRESH_SECONDS', default=60 * 60, cast=int),
+    },
+    # Nightly; retention is measured in days
+    'apply-chat-retention': {
+        'task': 'apps.chat.tasks.apply_chat_retention_task',
+        'schedule': config('CHAT_RETENTION_SECONDS', default=60 * 60 * 24, cast=int),
+    },
+    # Writes is_read behind the read cursors; until then serializers overlay them
+    'sync-chat-read-flags': {
+        'task': 'apps.chat.tasks.sync_read_flags_task',
+        'schedule': config('CHAT_READ_FLAGS_SYNC_SECONDS', default=5 * 60, cast=int),
+    },
+}
+
+
 # Jazzmin basic branding (optional, can be customized further)
 JAZZMIN_SETTINGS = {
     "site_title": "Spa Central Admin",
@@ -356,6 +564,9 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'apps.monitoring.formatters.JsonFormatter',
+        },
     },
     'handlers': {
         'file': {
@@ -364,6 +575,12 @@ LOGGING = {
             'filename': os.path.join(BASE_DIR, 'logs', 'django.log'),
             'formatter': 'verbose',
         },
+        'profiling_file': {
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': os.path.join(BASE_DIR, 'logs', 'profiling.log'),
+            'formatter': 'json',
+        },
         'console': {
             'level': 'INFO',
             'class': 'logging.StreamHandler',
@@ -385,6 +602,11 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': False,
         },
+        'apps.monitoring.profiling': {
+            'handlers': ['profiling_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
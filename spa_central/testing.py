@@ -0,0 +1,46 @@
+"""
+Test helpers shared by the apps' tests.py
+"""
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client, TransactionTestCase, override_settings
+from rest_framework.authtoken.models import Token
+from apps.users.models import User
+
+
+class AsyncParityTestCase(TransactionTestCase):
+    """
+    Compare the async read endpoints (spa_central/async_urls.py, served
+    under daphne) with the sync views WSGI serves for the same path.
+
+    A TransactionTestCase because gather_queries runs queries on pooled
+    threads with their own connections when DB_POOL is on, and those
+    cannot see the rows of a test wrapped in a transaction.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='admin@example.com', password='x', first_name='Ada', last_name='Admin', user_type='admin',
+        )
+        self.token = Token.objects.create(user=self.user)
+
+    def headers(self, user=None):
+        token = self.token if user is None else Token.objects.get_or_create(user=user)[0]
+        return {'Authorization': f'Token {token.key}'}
+
+    def get_sync(self, path, user=None, **headers):
+        return Client().get(path, headers={**self.headers(user), **headers})
+
+    def get_async(self, path, user=None, **headers):
+        with override_settings(ROOT_URLCONF='spa_central.async_urls'):
+            return async_to_sync(AsyncClient().get)(path, headers={**self.headers(user), **headers})
+
+    def assertSameResponse(self, path, user=None, status=200, **headers):
+        """GET ``path`` both ways and require identical status, body and validators"""
+        sync = self.get_sync(path, user, **headers)
+        asynchronous = self.get_async(path, user, **headers)
+        self.assertEqual(sync.status_code, status, sync.content[:500])
+        self.assertEqual(asynchronous.status_code, sync.status_code, asynchronous.content[:500])
+        self.assertEqual(asynchronous.content, sync.content)
+        for header in ('Content-Type', 'ETag', 'Last-Modified'):
+            self.assertEqual(asynchronous.headers.get(header), sync.headers.get(header), header)
+        return asynchronous
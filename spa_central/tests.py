@@ -0,0 +1,324 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.location.models import Area, City, State
+from apps.spas.models import PrimaryOwner, SecondaryOwner, Spa
+from apps.users.models import User
+from .async_views import gather_queries
+from .autocomplete import prefix_lookup
+from .compression import CompressionMiddleware, choose_encoding
+from .db_router import REPLICA, ReplicaPinningMiddleware, RequestState
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """ReplicaRouter/ReplicaPinningMiddleware with the replica in a second SQLite file"""
+
+    @classmethod
+    def setUpClass(cls):
+        # The alias exists only for this class, so it joins ``databases``
+        # here rather than in the class body the test runner reads first
+        handle, cls.replica_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.settings[REPLICA] = {
+            **connections.settings['default'], 'NAME': cls.replica_path, 'TEST': {**connections.settings['default']['TEST'], 'NAME': cls.replica_path, 'MIRROR': None},
+        }
+        call_command('migrate', database=REPLICA, verbosity=0)
+        cls.databases = {'default', REPLICA}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        os.remove(cls.replica_path)
+
+    def setUp(self):
+        cache.clear()
+        State.objects.create(name='Primary')
+        State.objects.using(REPLICA).create(name='Replica')
+        configured = mock.patch('spa_central.db_router.replica_configured', return_value=True)
+        configured.start()
+        self.addCleanup(configured.stop)
+
+    def request(self, method='get', write=False, token=None):
+        """States the view sees for one request through the middleware"""
+        def view(request):
+            if write:
+                State.objects.create(name='Written')
+            return JsonResponse(list(State.objects.values_list('name', flat=True)), safe=False)
+
+        headers = {'Authorization': f'Token {token}'} if token else {}
+        request = getattr(RequestFactory(), method)('/api/states/', headers=headers)
+        return json.loads(ReplicaPinningMiddleware(view)(request).content)
+
+    def test_safe_methods_read_replica(self):
+        self.assertEqual(self.request('get'), ['Replica'])
+        self.assertEqual(self.request('options'), ['Replica'])
+
+    def test_unsafe_methods_read_primary(self):
+        self.assertEqual(self.request('post'), ['Primary'])
+        self.assertEqual(self.request('delete'), ['Primary'])
+
+    def test_read_after_write(self):
+        self.assertEqual(self.request('get', write=True), ['Primary', 'Written'])
+
+    def test_outside_request_and_in_transactions(self):
+        self.assertEqual(list(State.objects.values_list('name', flat=True)), ['Primary'])
+        with transaction.atomic():
+            self.assertEqual(self.request('get'), ['Primary'])
+
+    def test_sticky_window(self):
+        self.request('post', token='alice')
+        self.assertEqual(self.request('get', token='alice'), ['Primary'])
+        self.assertEqual(self.request('get', token='bob'), ['Replica'])
+        self.assertEqual(self.request('get'), ['Replica'])
+        cache.clear()
+        self.assertEqual(self.request('get', token='alice'), ['Replica'])
+
+    def test_without_replica(self):
+        with mock.patch('spa_central.db_router.replica_configured', return_value=False):
+            self.assertEqual(self.request('get'), ['Primary'])
+            self.request('post', token='alice')
+        pin = RequestState(RequestFactory().get('/', headers={'Authorization': 'Token alice'})).client_key
+        self.assertIsNone(cache.get(pin))
+
+
+@override_settings(COMPRESSION={
+    'MIN_SIZE': 200, 'GZIP_LEVEL': 6, 'BROTLI_QUALITY': 4, 'STREAM_FLUSH_SIZE': 1000,
+    'TYPES': ['application/json', 'application/msgpack', 'text/csv'],
+})
+class CompressionTests(SimpleTestCase):
+    """Accept-Encoding negotiation and what CompressionMiddleware leaves alone"""
+
+    body = json.dumps([{'id': index, 'name': f'Spa {index}'} for index in range(50)]).encode()
+
+    def respond(self, response, accept='gzip'):
+        request = RequestFactory().get('/api/spas/', headers={'Accept-Encoding': accept} if accept else {})
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiation(self):
+        self.assertEqual(choose_encoding('gzip, br'), 'br')
+        self.assertEqual(choose_encoding('gzip;q=1, br;q=0.5'), 'gzip')
+        self.assertEqual(choose_encoding('br;q=0, *'), 'gzip')
+        self.assertIsNone(choose_encoding('identity'))
+        self.assertIsNone(choose_encoding(''))
+
+    def test_gzip_json(self):
+        response = self.respond(HttpResponse(self.body, content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_identity(self):
+        response = self.respond(HttpResponse(self.body, content_type='application/json'), accept=None)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_etag_weakened(self):
+        response = HttpResponse(self.body, content_type='application/json')
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.respond(response)['ETag'], 'W/"abc"')
+
+    def test_left_alone(self):
+        cases = {
+            'below MIN_SIZE': HttpResponse(b'{"ok": true}', content_type='application/json'),
+            'html': HttpResponse(b'<input name="csrfmiddlewaretoken">' * 20, content_type='text/html'),
+            'plain text': HttpResponse(b'x' * 500, content_type='text/plain'),
+            'pdf': HttpResponse(b'%PDF' * 200, content_type='application/pdf'),
+            'not modified': HttpResponse(status=304, content_type='application/json'),
+        }
+        for name, response in cases.items():
+            self.assertFalse(self.respond(response).has_header('Content-Encoding'), name)
+        response = HttpResponse(self.body, content_type='application/json')
+        response['Cache-Control'] = 'no-transform'
+        self.assertFalse(self.respond(response).has_header('Content-Encoding'))
+
+    def test_api_types(self):
+        for content_type in ('application/msgpack', 'text/csv; charset=utf-8', 'application/vnd.spacentral.columnar+json'):
+            response = self.respond(HttpResponse(self.body, content_type=content_type))
+            self.assertEqual(response['Content-Encoding'], 'gzip', content_type)
+
+    def test_streaming_is_incremental(self):
+        consumed = []
+
+        def rows():
+            for index in range(10):
+                consumed.append(index)
+                yield (f'{index},' + 'x' * 600 + '\n').encode()
+
+        response = self.respond(StreamingHttpResponse(rows(), content_type='text/csv'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        stream = iter(response.streaming_content)
+        first = next(stream)
+        # Output starts once STREAM_FLUSH_SIZE bytes came in, not at the end
+        self.assertLess(len(consumed), 10)
+        self.assertTrue(first)
+        data = first + b''.join(stream)
+        self.assertEqual(len(consumed), 10)
+        expected = b''.join((f'{index},' + 'x' * 600 + '\n').encode() for index in range(10))
+        self.assertEqual(gzip.decompress(data), expected)
+
+
+class GatherQueriesTests(SimpleTestCase):
+    """gather_queries only leaves the request's connection when a pool backs the extra ones"""
+
+    calls = [threading.get_ident] * 4
+
+    @override_settings(DB_POOL=False)
+    def test_sequential_without_pool(self):
+        idents = async_to_sync(gather_queries)(*self.calls)
+        self.assertEqual(len(set(idents)), 1)
+
+    @override_settings(DB_POOL=True)
+    def test_fans_out_with_pool(self):
+        with mock.patch('spa_central.async_views._run_and_release', side_effect=lambda call: call()) as run:
+            results = async_to_sync(gather_queries)(lambda: 1, lambda: 2, lambda: 3)
+        self.assertEqual(results, [1, 2, 3])
+        self.assertEqual(run.call_count, 3)
+
+
+def _table(model):
+    return connections['default'].ops.quote_name(model._meta.db_table)
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields=/?omit= prune the response and the SQL behind it"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@example.com', password='x', first_name='Ada', last_name='Admin', user_type='admin',
+        ))
+        area = Area.objects.create(name='Baner', city=City.objects.create(
+            name='Pune', state=State.objects.create(name='Maharashtra'),
+        ))
+        self.owner = PrimaryOwner.objects.create(fullname='Priya Owner')
+        self.spa = Spa.objects.create(
+            spa_code='1001', spa_name='Lotus Spa', area=area, primary_owner=self.owner,
+            secondary_owner=SecondaryOwner.objects.create(fullname='Sam Second'),
+        )
+        Spa.objects.create(spa_code='1002', spa_name='Orchid Spa', primary_owner=self.owner)
+
+    def get(self, path):
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response, [query['sql'] for query in queries]
+
+    def spa_selects(self, queries):
+        return [sql for sql in queries if sql.startswith('SELECT') and f'FROM {_table(Spa)}' in sql and 'COUNT(' not in sql]
+
+    def test_fields_and_omit(self):
+        response, _ = self.get('/api/spas/?fields=id,spa_name,spa_code')
+        self.assertEqual([set(row) for row in response.data['results']], [{'id', 'spa_name', 'spa_code'}] * 2)
+        response, _ = self.get('/api/spas/?fields=id,city')
+        self.assertEqual(response.data['results'][0], {'id': self.spa.id, 'city': 'Pune'})
+        response, _ = self.get(f'/api/spas/{self.spa.id}/?omit=primary_owner,secondary_owner,third_owner,fourth_owner')
+        self.assertNotIn('primary_owner', response.data)
+        self.assertEqual(response.data['spa_code'], '1001')
+
+    def test_unknown_fields_rejected(self):
+        response = self.client.get('/api/spas/?fields=id,spa_nmae')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'fields': ['Unknown field(s): spa_nmae']})
+        response = self.client.get(f'/api/spas/{self.spa.id}/?omit=owner')
+        self.assertEqual(response.data, {'omit': ['Unknown field(s): owner']})
+
+    def test_writes_ignore_fields(self):
+        response = self.client.patch(
+            f'/api/spas/{self.spa.id}/?fields=id', {'spa_name': 'Lotus', 'primary_owner': self.owner.id}, format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['spa_name'], 'Lotus')
+
+    def test_columns_and_joins_cut(self):
+        _, full = self.get('/api/spas/')
+        _, sparse = self.get('/api/spas/?fields=id,spa_name')
+        [full_select], [sparse_select] = self.spa_selects(full), self.spa_selects(sparse)
+        self.assertIn('google_map_link', full_select)
+        self.assertIn(_table(Area), full_select)
+        self.assertNotIn('google_map_link', sparse_select)
+        self.assertNotIn('JOIN', sparse_select)
+
+    def test_related_field_keeps_only_its_join(self):
+        _, queries = self.get('/api/spas/?fields=id,city')
+        [select] = self.spa_selects(queries)
+        self.assertIn(_table(City), select)
+        self.assertNotIn(_table(PrimaryOwner), select)
+        self.assertNotIn(_table(State), select)
+
+    def test_detail_prefetches_cut(self):
+        _, full = self.get(f'/api/spas/{self.spa.id}/')
+        _, sparse = self.get(f'/api/spas/{self.spa.id}/?fields=id,spa_name')
+        # The ETag aggregate reads every owner table either way; the owner prefetch is what goes
+        prefetches = lambda queries: [sql for sql in queries if f'FROM {_table(PrimaryOwner)}' in sql and 'MAX(' not in sql]
+        self.assertEqual(len(prefetches(full)), 1)
+        self.assertEqual(prefetches(sparse), [])
+        self.assertLess(len(sparse), len(full))
+
+
+@override_settings(AUTOCOMPLETE={'LIMIT': 2, 'MAX_LIMIT': 3, 'CACHE_TIMEOUT': 300, 'CLIENT_MAX_AGE': 60})
+class AutocompleteTests(TestCase):
+    """Picker prefix matching, ordering, limits and cache generations"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@example.com', password='x', first_name='Ada', last_name='Admin', user_type='admin',
+        ))
+        owner = PrimaryOwner.objects.create(fullname='Priya Owner')
+        self.spas = {
+            code: Spa.objects.create(spa_code=code, spa_name=name, primary_owner=owner)
+            for code, name in (('L-200', 'Lotus  SPA'), ('L-100', 'Lotus Retreat'), ('X-1', 'Lavender Spa'), ('9', 'Orchid'))
+        }
+
+    def suggest(self, q, **params):
+        response = self.client.get('/api/autocomplete/spas/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row['label'] for row in response.data]
+
+    def test_normalized_prefix(self):
+        self.assertEqual(self.suggest('  LOTUS   sp'), ['L-200 - Lotus  SPA'])
+        self.assertEqual(self.suggest('otus'), [])
+        # The second search field (spa code) matches too
+        self.assertEqual(self.suggest('x-'), ['X-1 - Lavender Spa'])
+
+    def test_ranking_and_limit(self):
+        # Ordered by the normalized name, not by which field matched
+        self.assertEqual(self.suggest('l', limit=10), ['X-1 - Lavender Spa', 'L-100 - Lotus Retreat', 'L-200 - Lotus  SPA'])
+        self.assertEqual(len(self.suggest('l')), 2)
+        self.assertEqual(len(self.suggest('', limit='many')), 2)
+        self.assertEqual(self.suggest('lotus', limit=0), ['L-100 - Lotus Retreat'])
+
+    def test_cache_generations(self):
+        self.assertEqual(self.suggest('orch'), ['9 - Orchid'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggest('ORCH'), ['9 - Orchid'])
+        spa = self.spas['9']
+        spa.spa_name = 'Orchard'
+        spa.save()
+        self.assertEqual(self.suggest('orch'), ['9 - Orchard'])
+        spa.delete()
+        self.assertEqual(self.suggest('orch'), [])
+
+    def test_index_friendly_lookup(self):
+        self.assertEqual(prefix_lookup('postgresql'), 'startswith')
+        self.assertEqual(prefix_lookup('sqlite'), 'startswith')
+        # startswith is LIKE BINARY on MySQL, which skips the collation's index
+        self.assertEqual(prefix_lookup('mysql'), 'istartswith')
@@ -19,7 +19,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.authtoken.views import obtain_auth_token
-from apps.views import home, custom_404, custom_500
+from apps.views import home, health_check, custom_404, custom_500
+from apps.monitoring.views import metrics_view, readiness_view
 
 urlpatterns = [
     # Homepage
@@ -36,11 +37,16 @@ urlpatterns = [
     path('api/', include('apps.location.urls')),
     path('api/', include('apps.chat.urls')),
     path('api/', include('apps.simcard.urls')),
+    path('api/', include('apps.monitoring.urls')),
     path('api/auth/token/', obtain_auth_token, name='api_token_auth'),
     path('api/auth/', include('rest_framework.urls')),
     
-    # Health check
-    path('health/', lambda request: __import__('django.http').HttpResponse('OK'), name='health_check'),
+    # Health checks: liveness (process is up) and readiness (dependencies reachable)
+    path('health/', health_check, name='health_check'),
+    path('health/ready/', readiness_view, name='readiness'),
+
+    # Prometheus scrape endpoint
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
 # Custom error handlers